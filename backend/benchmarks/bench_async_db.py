@@ -0,0 +1,107 @@
+"""Concurrency benchmark — slow commits inside async handlers, sync vs. async session.
+
+Run from backend/:  python benchmarks/bench_async_db.py [writers] [seconds]
+
+A background thread keeps taking SQLite's write lock for 200 ms at a time,
+like a long import transaction, so every commit has to wait for it. While
+`writers` clients create patients, a probe calls /api/system/health, which
+touches no database. With a synchronous Session inside an `async def`
+handler (the previous pattern, mounted here as /legacy/create) each lock
+wait freezes the event loop and the probe with it; the migrated
+/api/patients/create waits on the async driver instead.
+"""
+import os
+import sys
+import time
+import asyncio
+import sqlite3
+import tempfile
+import threading
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.chdir(tempfile.mkdtemp())  # DATABASE_URL is relative to the working directory
+os.environ.setdefault("STT_PRELOAD", "0")
+
+import httpx
+
+import main
+from database import SessionLocal, init_db, engine
+from models import Patient
+from schemas import PatientCreate
+
+LOCK_HOLD_S = 0.2
+
+
+@main.app.post("/legacy/create")
+async def legacy_create(patient: PatientCreate):
+    db = SessionLocal()  # blocking calls straight on the event loop, as the routers used to do
+    try:
+        db_patient = Patient(**patient.model_dump())
+        db.add(db_patient)
+        db.commit()
+        return {"id": db_patient.id}
+    finally:
+        db.close()
+
+
+def hold_write_lock(stop: threading.Event):
+    conn = sqlite3.connect(engine.url.database, isolation_level=None, timeout=30)
+    while not stop.is_set():
+        conn.execute("BEGIN IMMEDIATE")
+        conn.execute("INSERT INTO patients (name) VALUES ('lock holder')")
+        time.sleep(LOCK_HOLD_S)
+        conn.execute("COMMIT")
+        time.sleep(0.02)
+    conn.close()
+
+
+def ms(values: list, q: float) -> float:
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * q))] * 1000 if values else 0.0
+
+
+async def run(client: httpx.AsyncClient, url: str, writers: int, seconds: float) -> dict:
+    deadline = time.perf_counter() + seconds
+    writes, probes = [], []
+
+    async def writer():
+        while time.perf_counter() < deadline:
+            start = time.perf_counter()
+            (await client.post(url, json={"name": "Asha patient", "age": 40})).raise_for_status()
+            writes.append(time.perf_counter() - start)
+
+    async def probe():
+        while time.perf_counter() < deadline:
+            start = time.perf_counter()
+            (await client.get("/api/system/health")).raise_for_status()
+            probes.append(time.perf_counter() - start)
+            await asyncio.sleep(0.01)
+
+    await asyncio.gather(probe(), *(writer() for _ in range(writers)))
+    return {"writes": writes, "probes": probes}
+
+
+async def main_async(writers: int, seconds: float):
+    init_db()
+    stop = threading.Event()
+    holder = threading.Thread(target=hold_write_lock, args=(stop,))
+    holder.start()
+    try:
+        transport = httpx.ASGITransport(app=main.app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test", timeout=120) as client:
+            for label, url in (("sync session", "/legacy/create"), ("async session", "/api/patients/create")):
+                result = await run(client, url, writers, seconds)
+                print(f"{label:>13}: {len(result['writes']) / seconds:5.1f} writes/s | "
+                      f"/health during writes: n={len(result['probes'])}, p50 {ms(result['probes'], 0.5):6.1f} ms, "
+                      f"p99 {ms(result['probes'], 0.99):6.1f} ms, max {ms(result['probes'], 1.0):6.1f} ms")
+    finally:
+        stop.set()
+        holder.join()
+        await main.async_engine.dispose()
+
+
+if __name__ == "__main__":
+    writers = int(sys.argv[1]) if len(sys.argv) > 1 else 8
+    seconds = float(sys.argv[2]) if len(sys.argv) > 2 else 5
+    print(f"{writers} writers, {seconds:.0f}s per run, write lock held {LOCK_HOLD_S * 1000:.0f} ms at a time")
+    asyncio.run(main_async(writers, seconds))
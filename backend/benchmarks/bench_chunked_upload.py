@@ -0,0 +1,179 @@
+"""Behaviour check + memory — resumable chunked uploads.
+
+Run from backend/:  python benchmarks/bench_chunked_upload.py [size_mb]
+
+Sends a `size_mb` scan through /api/uploads the way a phone on a bad link
+would: chunks out of order, some corrupted in transit (460, sent again), and
+the connection "lost" halfway, after which the client asks which chunks are
+missing and sends only those. Completing it must queue a report job whose
+stored file is byte-identical to the original; a food photo and a retried
+/complete are checked too, as are a /complete whose server died mid-way and
+a hand-off that fails after taking the file. Peak Python memory per request is compared with
+posting the whole file to /api/reports/jobs. Exits non-zero on any mismatch.
+"""
+import io
+import os
+import sys
+import time
+import base64
+import random
+import hashlib
+import tempfile
+import tracemalloc
+from datetime import datetime, timedelta, timezone
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+# DATABASE_URL is relative to the working directory; the spawned job workers
+# re-run this module, so they have to land in the same directory. Uploads go there too.
+os.chdir(os.environ.setdefault("BENCH_CHUNKED_UPLOAD_DIR", tempfile.mkdtemp()))
+os.environ.setdefault("UPLOAD_DIR", os.path.join(os.getcwd(), "uploads"))
+os.environ.setdefault("STT_PRELOAD", "0")
+
+from fastapi.testclient import TestClient
+
+import main
+import routers.uploads as uploads_router
+from database import SessionLocal
+from services.chunked_upload import part_path
+
+
+def checksum(data: bytes) -> str:
+    return "sha256 " + base64.b64encode(hashlib.sha256(data).digest()).decode()
+
+
+def put_chunk(client: TestClient, upload: dict, index: int, data: bytes, corrupt: bool = False):
+    chunk = data[index * upload["chunk_size"]:(index + 1) * upload["chunk_size"]]
+    header = checksum(chunk)
+    if corrupt:
+        chunk = bytes([chunk[0] ^ 0xFF]) + chunk[1:]  # a flipped byte the link layer missed
+    return client.put(f"/api/uploads/{upload['upload_id']}/chunks/{index}", content=chunk,
+                      headers={"Upload-Checksum": header})
+
+
+def wait_for_job(client: TestClient, job_id: str, timeout: float = 120) -> dict:
+    deadline = time.perf_counter() + timeout
+    while time.perf_counter() < deadline:
+        status = client.get(f"/api/reports/jobs/{job_id}").json()
+        if status["status"] not in ("queued", "running"):
+            return status
+        time.sleep(0.2)
+    return status
+
+
+def peak_mb(fn) -> float:
+    tracemalloc.start()
+    fn()
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return peak / 1024 / 1024
+
+
+if __name__ == "__main__":
+    size_mb = float(sys.argv[1]) if len(sys.argv) > 1 else 15
+    random.seed(3)
+    scan = random.randbytes(int(size_mb * 1024 * 1024))
+    problems = []
+
+    with TestClient(main.app) as client:
+        upload = client.post("/api/uploads", json={
+            "filename": "scan.pdf", "size": len(scan), "target": "report", "patient_id": 7,
+            "sha256": hashlib.sha256(scan).hexdigest(),
+        }).json()
+        order = list(range(upload["total_chunks"]))
+        random.shuffle(order)
+        half, corrupted, resent = order[:len(order) // 2], 0, 0
+
+        for index in half:
+            if random.random() < 0.1:
+                response = put_chunk(client, upload, index, scan, corrupt=True)
+                corrupted += response.status_code == 460
+            put_chunk(client, upload, index, scan).raise_for_status()
+
+        # Connection lost; the client comes back and asks what is missing
+        status = client.get(f"/api/uploads/{upload['upload_id']}").json()
+        if sorted(status["missing_chunks"]) != sorted(order[len(order) // 2:]):
+            problems.append("status did not list exactly the chunks not yet sent")
+        early = client.post(f"/api/uploads/{upload['upload_id']}/complete")
+        if early.status_code != 409:
+            problems.append(f"completing a partial upload returned {early.status_code}")
+        for index in status["missing_chunks"]:
+            put_chunk(client, upload, index, scan).raise_for_status()
+            resent += 1
+        print(f"{upload['total_chunks']} chunks of {upload['chunk_size'] // 1024} KB: "
+              f"{corrupted} corrupted in transit and re-sent, {resent} sent after the reconnect")
+
+        done = client.post(f"/api/uploads/{upload['upload_id']}/complete")
+        job = done.json()
+        replay = client.post(f"/api/uploads/{upload['upload_id']}/complete").json()
+        if done.status_code != 202 or replay.get("job_id") != job.get("job_id"):
+            problems.append(f"/complete returned {done.status_code}; replay gave job {replay.get('job_id')}")
+        final = wait_for_job(client, job["job_id"])
+        from models import ReportJob
+        db = SessionLocal()
+        stored = db.get(ReportJob, job["job_id"])
+        with open(stored.file_path, "rb") as f:
+            identical = f.read() == scan
+        db.close()
+        print(f"report job {final['status']}; stored file identical to the original: {identical}")
+        if not identical or final["status"] != "done":
+            problems.append("the assembled report did not reach its job intact")
+        if os.path.exists(part_path(upload["upload_id"])):
+            problems.append("part file left behind after completion")
+
+        # A food photo through the same protocol
+        from PIL import Image
+        buffer = io.BytesIO()
+        Image.new("RGB", (640, 480), (200, 120, 40)).save(buffer, "JPEG")
+        photo = buffer.getvalue()
+        food = client.post("/api/uploads", json={"filename": "thali.jpg", "size": len(photo), "target": "food"}).json()
+        for index in range(food["total_chunks"]):
+            put_chunk(client, food, index, photo).raise_for_status()
+        scanned = client.post(f"/api/uploads/{food['upload_id']}/complete")
+        print(f"food upload → {scanned.status_code}, {len(scanned.json().get('detected_foods', []))} foods detected")
+        if scanned.status_code != 200 or "nutrition" not in scanned.json():
+            problems.append(f"food upload did not return a scan: {scanned.text[:200]}")
+
+        # A server that died mid-/complete: once the claim is stale, /complete runs it
+        from sqlalchemy import update
+        from models import UploadSession
+        stuck = client.post("/api/uploads", json={"filename": "stuck.jpg", "size": len(photo), "target": "food"}).json()
+        for index in range(stuck["total_chunks"]):
+            put_chunk(client, stuck, index, photo).raise_for_status()
+        db = SessionLocal()
+        db.execute(update(UploadSession).where(UploadSession.id == stuck["upload_id"]).values(
+            status="finalizing", expires_at=datetime.now(timezone.utc) - timedelta(minutes=1)))
+        db.commit()
+        db.close()
+        recovered = client.post(f"/api/uploads/{stuck['upload_id']}/complete")
+        print(f"stale finalizing upload → {recovered.status_code}")
+        if recovered.status_code != 200:
+            problems.append(f"a stale finalizing upload could not be completed: {recovered.status_code}")
+
+        # A hand-off that fails after moving the part file marks the upload failed, not open
+        lost = client.post("/api/uploads", json={"filename": "lost.jpg", "size": len(photo), "target": "food"}).json()
+        for index in range(lost["total_chunks"]):
+            put_chunk(client, lost, index, photo).raise_for_status()
+        scan_food = uploads_router.scan_food_image
+
+        async def moved_then_failed(file_path, *args):
+            os.remove(file_path)
+            raise RuntimeError("pipeline failed after taking the file")
+        uploads_router.scan_food_image = moved_then_failed
+        first = client.post(f"/api/uploads/{lost['upload_id']}/complete")
+        uploads_router.scan_food_image = scan_food
+        retry = client.post(f"/api/uploads/{lost['upload_id']}/complete")
+        state = client.get(f"/api/uploads/{lost['upload_id']}").json()["status"]
+        print(f"hand-off lost the file → {first.status_code}, upload {state}, retry → {retry.status_code}")
+        if state != "failed" or retry.status_code != 410:
+            problems.append(f"an upload without its part file was left {state} (retry {retry.status_code})")
+
+        # Peak memory held by one request: whole-file upload vs. one chunk
+        whole = peak_mb(lambda: client.post("/api/reports/jobs", files={"file": ("again.pdf", scan[::-1], "application/pdf")}))
+        probe = client.post("/api/uploads", json={"filename": "probe.pdf", "size": len(scan), "target": "report"}).json()
+        chunk = peak_mb(lambda: put_chunk(client, probe, 1, scan).raise_for_status())
+        client.delete(f"/api/uploads/{probe['upload_id']}")
+        print(f"peak Python memory per request: whole-file POST {whole:.1f} MB, one chunk PUT {chunk:.1f} MB")
+
+    if problems:
+        sys.exit("\n".join(problems))
+    print("chunked uploads OK")
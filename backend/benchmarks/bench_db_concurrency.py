@@ -0,0 +1,113 @@
+"""Concurrency benchmark — mixed report / food / voice writes plus history reads.
+
+Run from backend/:  python benchmarks/bench_db_concurrency.py [threads] [seconds] [DATABASE_URL]
+
+Compares the previous engine setup (SQLite rollback journal, pysqlite's
+default 5 s lock wait) against database.create_db_engine. Each worker thread
+loops over the same transactions the routers run: a report, food scan or
+voice session plus its timeline row, or a history read. Without a URL a
+throwaway SQLite file is used per run.
+"""
+import os
+import sys
+import json
+import time
+import random
+import tempfile
+import threading
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import create_engine
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.orm import sessionmaker
+
+from database import create_db_engine
+from models import Base, MedicalReport, FoodScan, VoiceSession, HealthTimeline
+
+OCR_TEXT = "Hemoglobin: 11.2 g/dL\nFasting Blood Sugar: 142 mg/dL\n" * 40
+
+
+def write_report(db, patient_id):
+    report = MedicalReport(patient_id=patient_id, filename="report.pdf", ocr_text=OCR_TEXT,
+                           explanation_en="…" * 400, explanation_hi="…" * 400, risk_score=55, risk_level="moderate")
+    db.add(report)
+    db.flush()
+    db.add(HealthTimeline(patient_id=patient_id, event_type="report", title="Report: report.pdf",
+                          risk_score=55, data_json=json.dumps({"report_id": report.id})))
+
+
+def write_food(db, patient_id):
+    db.add(FoodScan(patient_id=patient_id, image_path="food.jpg", detected_foods=json.dumps(["dal", "rice"]),
+                    nutrition_info=json.dumps({"calories": 420}), scan_type="single"))
+    db.add(HealthTimeline(patient_id=patient_id, event_type="scan", title="Food Scan: dal, rice", risk_score=0))
+
+
+def write_voice(db, patient_id):
+    db.add(VoiceSession(patient_id=patient_id, transcript="What should I eat for diabetes?",
+                        ai_response="…" * 300, language="en"))
+    db.add(HealthTimeline(patient_id=patient_id, event_type="voice", title="Voice question", risk_score=0))
+
+
+def read_history(db, patient_id):
+    db.query(HealthTimeline).filter(HealthTimeline.patient_id == patient_id) \
+        .order_by(HealthTimeline.created_at.desc()).limit(20).all()
+
+
+OPERATIONS = [(write_report, 2), (write_food, 3), (write_voice, 3), (read_history, 4)]
+
+
+def worker(Session, deadline, stats, lock):
+    rng = random.Random(threading.get_ident())
+    ops, weights = zip(*OPERATIONS)
+    latencies, errors = [], 0
+    while time.perf_counter() < deadline:
+        op = rng.choices(ops, weights)[0]
+        start = time.perf_counter()
+        db = Session()
+        try:
+            op(db, rng.randint(1, 500))
+            db.commit()
+            latencies.append(time.perf_counter() - start)
+        except OperationalError:  # "database is locked"
+            db.rollback()
+            errors += 1
+        finally:
+            db.close()
+    with lock:
+        stats["latencies"] += latencies
+        stats["errors"] += errors
+
+
+def run(label: str, engine, threads: int, seconds: float):
+    Base.metadata.create_all(bind=engine)
+    Session = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+    stats, lock = {"latencies": [], "errors": 0}, threading.Lock()
+    deadline = time.perf_counter() + seconds
+    pool = [threading.Thread(target=worker, args=(Session, deadline, stats, lock)) for _ in range(threads)]
+    for t in pool:
+        t.start()
+    for t in pool:
+        t.join()
+    engine.dispose()
+
+    latencies = sorted(stats["latencies"])
+    p50 = latencies[len(latencies) // 2] * 1000 if latencies else 0
+    p99 = latencies[int(len(latencies) * 0.99)] * 1000 if latencies else 0
+    print(f"{label:>10}: {len(latencies) / seconds:8.0f} tx/s  p50 {p50:7.1f} ms  p99 {p99:8.1f} ms  "
+          f"locked errors {stats['errors']}")
+
+
+if __name__ == "__main__":
+    threads = int(sys.argv[1]) if len(sys.argv) > 1 else 16
+    seconds = float(sys.argv[2]) if len(sys.argv) > 2 else 5
+    url = sys.argv[3] if len(sys.argv) > 3 else None
+    print(f"{threads} threads, {seconds:.0f}s per run")
+
+    if url:
+        run("configured", create_db_engine(url), threads, seconds)
+    else:
+        tmp = tempfile.mkdtemp()
+        legacy = f"sqlite:///{os.path.join(tmp, 'legacy.db')}"
+        run("legacy", create_engine(legacy, connect_args={"check_same_thread": False}), threads, seconds)
+        run("tuned", create_db_engine(f"sqlite:///{os.path.join(tmp, 'tuned.db')}"), threads, seconds)
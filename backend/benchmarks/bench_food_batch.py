@@ -0,0 +1,81 @@
+"""Throughput benchmark — /api/food/scan-batch vs. looping over /api/food/scan.
+
+Run from backend/:  python benchmarks/bench_food_batch.py [images] [batch sizes...]
+e.g.                python benchmarks/bench_food_batch.py 48 1 8 16
+
+Uses a throwaway database and upload directory. Without ultralytics installed
+both paths use the simulated detector, so only request/DB overhead is compared.
+"""
+import os
+import sys
+import time
+import tempfile
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+WORK_DIR = tempfile.mkdtemp(prefix="bench_food_")
+os.chdir(WORK_DIR)  # DATABASE_URL is relative, so the benchmark DB lands here
+
+from PIL import Image, ImageDraw
+from fastapi.testclient import TestClient
+
+import main
+import routers.food as food_router
+from services import food_detector, media
+
+media.UPLOAD_DIR = os.path.join(WORK_DIR, "uploads")
+
+
+def make_images(count: int) -> list:
+    """Plate-sized JPEGs with a few coloured blobs, encoded once up front."""
+    images = []
+    for i in range(count):
+        image = Image.new("RGB", (1280, 960), (235, 230, 220))
+        draw = ImageDraw.Draw(image)
+        for j in range(4):
+            x, y = 150 + j * 250, 300 + (i * 37 + j * 91) % 300
+            draw.ellipse((x, y, x + 220, y + 220), fill=((i * 40) % 255, 120 + j * 30, 60))
+        path = os.path.join(WORK_DIR, f"plate_{i}.jpg")
+        image.save(path, quality=85)
+        with open(path, "rb") as f:
+            images.append((f"plate_{i}.jpg", f.read()))
+    return images
+
+
+def bench_single(client: TestClient, images: list) -> float:
+    start = time.perf_counter()
+    for name, data in images:
+        r = client.post("/api/food/scan", files={"file": (name, data, "image/jpeg")})
+        r.raise_for_status()
+    return len(images) / (time.perf_counter() - start)
+
+
+def bench_batch(client: TestClient, images: list, batch_size: int) -> float:
+    food_detector_batch = food_router.detect_food_batch
+    food_router.detect_food_batch = lambda paths, scan_type: food_detector_batch(paths, scan_type, batch_size)
+    try:
+        start = time.perf_counter()
+        r = client.post(
+            "/api/food/scan-batch",
+            files=[("files", (name, data, "image/jpeg")) for name, data in images]
+        )
+        r.raise_for_status()
+        return len(images) / (time.perf_counter() - start)
+    finally:
+        food_router.detect_food_batch = food_detector_batch
+
+
+if __name__ == "__main__":
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 40
+    batch_sizes = [int(b) for b in sys.argv[2:]] or [1, 4, 8, 16]
+    images = make_images(count)
+    print(f"detector: {'yolov8' if food_detector.YOLO_AVAILABLE else 'simulated'}, {count} images")
+
+    with TestClient(main.app) as client:
+        if food_detector.YOLO_AVAILABLE:
+            food_detector._get_yolo_model()  # keep model load out of the timings
+        single = bench_single(client, images)
+        print(f"{'loop /scan':>18} {single:>8.1f} img/s")
+        for batch_size in batch_sizes:
+            batched = bench_batch(client, images, batch_size)
+            print(f"{f'scan-batch bs={batch_size}':>18} {batched:>8.1f} img/s  ({batched / single:.1f}x)")
@@ -0,0 +1,115 @@
+"""Consistency check + benchmark — health_stats maintained on write vs. recomputed.
+
+Run from backend/:  python benchmarks/bench_health_stats.py [writes] [users]
+
+Writes `writes` reports, food scans, voice sessions and risk assessments
+through SessionLocal (so the flush hook maintains health_stats) plus one bulk
+import chunk, then checks every incrementally maintained row against
+rebuild_health_stats() and exits non-zero on any difference. Finally times
+/api/auth/me against the COUNT + latest-report queries it used to run.
+"""
+import os
+import sys
+import time
+import random
+import tempfile
+from datetime import datetime, timedelta, timezone
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.chdir(tempfile.mkdtemp())  # DATABASE_URL is relative to the working directory
+os.environ.setdefault("STT_PRELOAD", "0")
+
+from fastapi.testclient import TestClient
+from sqlalchemy import event, insert, select
+
+import main
+from database import engine, async_engine, SessionLocal
+from models import User, HealthStats, MedicalReport, FoodScan, VoiceSession, HealthTimeline
+from routers.auth import create_token
+from routers.risk import _save_assessments
+from services.health_stats import rebuild_health_stats
+
+statements = []
+event.listen(async_engine.sync_engine, "before_cursor_execute", lambda *args: statements.append(args[2]))
+
+
+def write(writes: int, users: int):
+    random.seed(5)
+    start = datetime(2025, 1, 1, tzinfo=timezone.utc)
+    db = SessionLocal()
+    for i in range(writes):
+        owner = {"user_id": random.choice([None, random.randint(1, users)]),
+                 "patient_id": random.choice([None, random.randint(1, users * 2)])}
+        at = {"created_at": start + timedelta(minutes=random.randint(0, 500_000))}
+        kind = random.random()
+        if kind < 0.3:
+            db.add(MedicalReport(filename="report.pdf", risk_score=random.choice([None, 12, 48, 81]),
+                                 risk_level=random.choice(["low", "moderate", "high"]), **owner, **at))
+        elif kind < 0.55:
+            db.add(FoodScan(image_path="food.jpg", **owner, **at))
+        elif kind < 0.75:
+            db.add(VoiceSession(transcript="q", ai_response="a", **owner, **at))
+        else:
+            event_type = random.choice(["vitals", "report", "scan"])  # only vitals count
+            db.add(HealthTimeline(event_type=event_type, title="t", risk_score=40, **owner, **at))
+        if i % 50 == 49:
+            db.commit()
+    db.commit()
+    db.close()
+    result = {"diabetes_risk": 20, "heart_risk": 30}
+    _save_assessments([(n, random.randint(1, users * 2), result, None) for n in range(200)])
+
+
+def snapshot() -> dict:
+    db = SessionLocal()
+    rows = {(r.subject_type, r.subject_id): {c.name: getattr(r, c.name) for c in HealthStats.__table__.columns}
+            for r in db.scalars(select(HealthStats))}
+    db.close()
+    return rows
+
+
+def old_profile_queries(db, user_id: int):
+    db.query(MedicalReport).filter(MedicalReport.user_id == user_id).count()
+    db.query(FoodScan).filter(FoodScan.user_id == user_id).count()
+    db.query(VoiceSession).filter(VoiceSession.user_id == user_id).count()
+    db.query(MedicalReport).filter(MedicalReport.user_id == user_id).order_by(MedicalReport.created_at.desc()).first()
+
+
+if __name__ == "__main__":
+    writes = int(sys.argv[1]) if len(sys.argv) > 1 else 20_000
+    users = int(sys.argv[2]) if len(sys.argv) > 2 else 200
+
+    with TestClient(main.app) as client:
+        with engine.begin() as conn:
+            conn.execute(insert(User), [{"name": f"User {i}", "email": f"u{i}@example.org", "password_hash": "x"}
+                                        for i in range(1, users + 1)])
+        start = time.perf_counter()
+        write(writes, users)
+        print(f"{writes:,} ORM writes + 200 bulk assessments in {time.perf_counter() - start:.1f}s")
+
+        incremental = snapshot()
+        rebuilt = rebuild_health_stats(SessionLocal())
+        recomputed = snapshot()
+        mismatched = [key for key in recomputed if incremental.get(key) != recomputed[key]]
+        print(f"rebuild: {rebuilt} rows, {len(mismatched)} differ from the incrementally maintained table")
+
+        headers = {"Authorization": f"Bearer {create_token(1)}"}
+        statements.clear()
+        profile = client.get("/api/auth/me", headers=headers).json()
+        print(f"/api/auth/me: {len(statements)} statements → {profile['health_stats']}")
+
+        db = SessionLocal()
+        for label, fn in (
+            ("COUNT x3 + latest", lambda uid: old_profile_queries(db, uid)),
+            ("health_stats lookup", lambda uid: db.get(HealthStats, ("user", uid))),
+        ):
+            db.expire_all()
+            start = time.perf_counter()
+            for _ in range(2000):
+                fn(random.randint(1, users))
+            print(f"{label:>20}: {(time.perf_counter() - start) / 2000 * 1e6:7.0f} µs per profile")
+        db.close()
+
+    if mismatched:
+        sys.exit(f"health_stats drifted from the raw tables for {mismatched[:5]}")
+    print("health_stats OK")
@@ -0,0 +1,93 @@
+"""Benchmark — history query latency with and without the composite indexes.
+
+Run from backend/:  python benchmarks/bench_history_indexes.py [rows] [queries]
+
+Seeds a throwaway SQLite database with `rows` timeline entries (default 1M)
+spread over 5,000 patients and 1,000 users, then times the patient timeline
+query from routers/patients.py and the per-user "latest" query from
+/api/auth/me: first with the indexes dropped (a database created before
+they existed), then after database.ensure_indexes() has migrated it.
+"""
+import os
+import sys
+import time
+import random
+import tempfile
+from datetime import datetime, timedelta, timezone
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import insert, text
+from sqlalchemy.orm import sessionmaker
+
+from database import create_db_engine, ensure_indexes
+from models import Base, HealthTimeline
+
+PATIENTS = 5_000
+USERS = 1_000
+
+
+def seed(engine, rows: int):
+    random.seed(7)
+    start_time = datetime(2024, 1, 1, tzinfo=timezone.utc)
+    batch = 50_000
+    with engine.begin() as conn:
+        for offset in range(0, rows, batch):
+            conn.execute(insert(HealthTimeline), [
+                {
+                    "patient_id": random.randint(1, PATIENTS),
+                    "user_id": random.randint(1, USERS),
+                    "event_type": "vitals",
+                    "title": "Health Risk Assessment",
+                    "risk_score": 40.0,
+                    "created_at": start_time + timedelta(seconds=random.randint(0, 60 * 86400)),
+                }
+                for _ in range(min(batch, rows - offset))
+            ])
+
+
+def time_queries(Session, queries: int) -> dict:
+    random.seed(11)
+    results = {}
+    for label, column, key_range, limit in (
+        ("patient timeline", HealthTimeline.patient_id, PATIENTS, 50),
+        ("user latest", HealthTimeline.user_id, USERS, 1),
+    ):
+        latencies = []
+        db = Session()
+        for _ in range(queries):
+            start = time.perf_counter()
+            db.query(HealthTimeline).filter(column == random.randint(1, key_range)) \
+                .order_by(HealthTimeline.created_at.desc()).limit(limit).all()
+            latencies.append(time.perf_counter() - start)
+        db.close()
+        latencies.sort()
+        results[label] = (latencies[len(latencies) // 2] * 1000, latencies[int(len(latencies) * 0.99)] * 1000)
+    return results
+
+
+if __name__ == "__main__":
+    rows = int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000
+    queries = int(sys.argv[2]) if len(sys.argv) > 2 else 200
+
+    engine = create_db_engine(f"sqlite:///{os.path.join(tempfile.mkdtemp(), 'history.db')}")
+    Base.metadata.create_all(bind=engine)
+    with engine.begin() as conn:
+        for index in HealthTimeline.__table__.indexes:
+            conn.execute(text(f"DROP INDEX IF EXISTS {index.name}"))
+
+    start = time.perf_counter()
+    seed(engine, rows)
+    print(f"seeded {rows:,} timeline rows in {time.perf_counter() - start:.1f}s")
+    Session = sessionmaker(bind=engine)
+
+    # Unindexed queries are slow, so fewer of them are timed
+    before = time_queries(Session, max(20, queries // 10))
+    start = time.perf_counter()
+    created = ensure_indexes(engine)
+    print(f"ensure_indexes created {', '.join(created)} in {time.perf_counter() - start:.1f}s")
+    after = time_queries(Session, queries)
+
+    for label in before:
+        (b50, b99), (a50, a99) = before[label], after[label]
+        print(f"{label:>17}: p50 {b50:8.2f} → {a50:6.2f} ms   p99 {b99:8.2f} → {a99:6.2f} ms   ({b50 / a50:,.0f}x at p50)")
@@ -0,0 +1,158 @@
+"""Benchmark — image preprocessing before OCR and YOLO.
+
+Run from backend/:  python benchmarks/bench_image_preprocess.py
+
+Builds a sample set of 12 MP phone "photos" of the simulated lab reports:
+tilted pages, a shadow across them, sensor noise, one stored sideways with
+an EXIF orientation tag. Each photo goes through the old inputs (the whole
+photo decoded at full resolution) and the preprocessed ones. The benchmark
+reports the latency of the decode plus the PNG encode pytesseract does
+before calling Tesseract, the pixels each engine receives, and the peak
+memory of each variant, measured in a fresh process (Linux /proc). It also checks that
+the deskew recovers the applied tilt. With pytesseract and Tesseract
+installed it prints the OCR accuracy delta (character similarity to the
+true text, lab values found); otherwise it says accuracy was not measured.
+"""
+import io
+import os
+import sys
+import time
+import difflib
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault("STT_PRELOAD", "0")
+
+import numpy as np
+from PIL import Image, ImageDraw, ImageFont
+
+from services.image_preprocess import prepare_for_ocr, prepare_for_yolo, estimate_skew, load_image, ocr_target_side
+from services.media import decode_image
+from services.ocr_service import SAMPLE_REPORTS, TESSERACT_AVAILABLE
+from services.lab_parser import extract_lab_values
+
+PHOTO_SIZE = (3024, 4032)  # 12 MP, portrait
+TILTS = (-4.0, 2.5, 6.0)
+EXIF_ORIENTATION = 0x0112
+
+
+def make_photo(text: str, tilt: float, sideways: bool, seed: int) -> bytes:
+    rng = np.random.default_rng(seed)
+    page = Image.new("L", PHOTO_SIZE, 235)
+    ImageDraw.Draw(page).multiline_text((260, 300), text, fill=30, font=ImageFont.load_default(size=58), spacing=26)
+    page = page.rotate(tilt, resample=Image.BICUBIC, fillcolor=120)
+    pixels = np.asarray(page, dtype=np.float32)
+    shadow = np.linspace(0.55, 1.0, PHOTO_SIZE[0], dtype=np.float32)[None, :]  # light falls off to the left
+    pixels = pixels * shadow + rng.normal(0, 6, pixels.shape).astype(np.float32)
+    photo = Image.fromarray(np.clip(pixels, 0, 255).astype(np.uint8)).convert("RGB")
+    exif = Image.Exif()
+    if sideways:
+        photo = photo.rotate(90, expand=True)  # stored landscape; orientation 6 turns it upright
+        exif[EXIF_ORIENTATION] = 6
+    out = io.BytesIO()
+    photo.save(out, "JPEG", quality=90, exif=exif)
+    return out.getvalue()
+
+
+# ── Variants, each timed and measured in its own process ────────────
+
+def ocr_before(data: bytes):
+    return decode_image(data)  # what Tesseract received: the full photo
+
+
+def ocr_after(data: bytes):
+    return prepare_for_ocr(data)
+
+
+def yolo_before(data: bytes):
+    return np.asarray(decode_image(data))  # YOLOv8 converted the full photo to an array before its letterbox
+
+
+def yolo_after(data: bytes):
+    return np.asarray(prepare_for_yolo(data).image)
+
+
+VARIANTS = {"ocr_before": ocr_before, "ocr_after": ocr_after, "yolo_before": yolo_before, "yolo_after": yolo_after}
+
+
+def _status_kb(field: str) -> int:
+    with open("/proc/self/status") as f:
+        return next(int(line.split()[1]) for line in f if line.startswith(field))
+
+
+def ready() -> bool:
+    return True
+
+
+def measure(variant: str, data: bytes) -> dict:
+    with open("/proc/self/clear_refs", "w") as f:
+        f.write("5")  # reset the peak-RSS mark to the current RSS
+    before = _status_kb("VmRSS:")
+    start = time.perf_counter()
+    output = VARIANTS[variant](data)
+    if variant.startswith("ocr"):
+        output.save(io.BytesIO(), "PNG")  # pytesseract writes the image to a temp PNG for Tesseract
+    elapsed = time.perf_counter() - start
+    peak = _status_kb("VmHWM:") - before
+    size = output.size if variant.startswith("ocr") else output.shape[1::-1]
+    return {"seconds": elapsed, "peak_mb": peak / 1024, "pixels": size[0] * size[1]}
+
+
+def in_fresh_process(variant: str, data: bytes) -> dict:
+    with ProcessPoolExecutor(max_workers=1, mp_context=multiprocessing.get_context("spawn")) as pool:
+        pool.submit(ready).result()  # finish imports before measuring
+        return pool.submit(measure, variant, data).result()
+
+
+def ocr_accuracy(image, truth: str) -> tuple[float, int]:
+    import pytesseract
+    text = pytesseract.image_to_string(image, lang="eng")
+    return difflib.SequenceMatcher(None, text, truth).ratio(), len(extract_lab_values(text))
+
+
+if __name__ == "__main__":
+    samples = [(report["text"], tilt, index == 1) for index, (report, tilt) in enumerate(zip(SAMPLE_REPORTS, TILTS))]
+    photos = [make_photo(text, tilt, sideways, seed) for seed, (text, tilt, sideways) in enumerate(samples)]
+    print(f"{len(photos)} photos, {PHOTO_SIZE[0]}x{PHOTO_SIZE[1]} JPEG, "
+          f"{sum(map(len, photos)) / len(photos) / 1024 / 1024:.1f} MB each")
+    problems = []
+
+    totals = {variant: {"seconds": 0.0, "peak_mb": 0.0, "pixels": 0} for variant in VARIANTS}
+    for photo in photos:
+        for variant in VARIANTS:
+            result = in_fresh_process(variant, photo)
+            for key in totals[variant]:
+                totals[variant][key] += result[key] / len(photos)
+    for stage in ("ocr", "yolo"):
+        before, after = totals[f"{stage}_before"], totals[f"{stage}_after"]
+        print(f"{stage.upper():>4}: {before['seconds'] * 1000:6.0f} → {after['seconds'] * 1000:5.0f} ms, "
+              f"peak memory {before['peak_mb']:5.1f} → {after['peak_mb']:4.1f} MB, "
+              f"{before['pixels'] / 1e6:4.1f} → {after['pixels'] / 1e6:.2f} MP handed to the engine")
+
+    for photo, (text, tilt, sideways) in zip(photos, samples):
+        gray, _ = load_image(photo, ocr_target_side(), "L")
+        found = estimate_skew(gray)
+        print(f"tilt {tilt:+.1f}° {'(EXIF sideways) ' if sideways else ''}→ deskew estimate {found:+.2f}°, "
+              f"OCR input {prepare_for_ocr(photo).size}")
+        if abs(found - tilt) > 0.5:
+            problems.append(f"deskew found {found}° for a {tilt}° tilt")
+        yolo = prepare_for_yolo(photo)
+        if max(yolo.image.size) != 640 or abs(yolo.scale * yolo.image.size[0] - PHOTO_SIZE[0]) > yolo.scale:
+            problems.append(f"YOLO input {yolo.image.size} (scale {yolo.scale:.2f}) does not map back to the photo")
+
+    if TESSERACT_AVAILABLE:
+        deltas = []
+        for photo, (text, _, _) in zip(photos, samples):
+            before, after = ocr_accuracy(decode_image(photo), text), ocr_accuracy(prepare_for_ocr(photo), text)
+            deltas.append((before, after))
+            print(f"OCR similarity {before[0]:.3f} → {after[0]:.3f}, lab values {before[1]} → {after[1]} "
+                  f"(of {len(extract_lab_values(text))})")
+        mean = lambda values: sum(values) / len(values)
+        print(f"mean OCR similarity delta: {mean([a[0] - b[0] for b, a in deltas]):+.3f}")
+    else:
+        print("pytesseract / Tesseract not installed: OCR accuracy not measured")
+
+    if problems:
+        sys.exit("\n".join(problems))
+    print("image preprocessing OK")
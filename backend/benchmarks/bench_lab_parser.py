@@ -0,0 +1,81 @@
+"""Microbenchmark — single-pass lab parser vs. the old per-pattern regex scans.
+
+Run from backend/:  python benchmarks/bench_lab_parser.py
+"""
+import os
+import re
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from services.lab_parser import extract_lab_values
+from services.alert_service import check_emergency_from_findings
+from services.ocr_service import SAMPLE_REPORTS
+
+# ── Previous implementation (copied for comparison) ─────────────────
+LEGACY_PATTERNS = [
+    r"(?:hemoglobin|hb|hgb)\s*[:\-]?\s*([\d.]+)\s*(?:g/?dl|gm/?dl)?",
+    r"(?:fasting\s*(?:blood\s*)?sugar|fbs|glucose\s*fasting)\s*[:\-]?\s*([\d.]+)",
+    r"(?:hba1c|glycated\s*hemoglobin|a1c)\s*[:\-]?\s*([\d.]+)\s*%?",
+    r"(?:total\s*cholesterol)\s*[:\-]?\s*([\d.]+)",
+    r"(?:ldl|low\s*density)\s*[:\-]?\s*([\d.]+)",
+    r"(?:hdl|high\s*density)\s*[:\-]?\s*([\d.]+)",
+    r"(?:creatinine|serum\s*creatinine)\s*[:\-]?\s*([\d.]+)",
+    r"(?:sgpt|alt|alanine)\s*[:\-]?\s*([\d.]+)",
+    r"(?:sgot|ast|aspartate)\s*[:\-]?\s*([\d.]+)",
+    r"(?:wbc|white\s*blood\s*cell|leucocyte)\s*(?:count)?\s*[:\-]?\s*([\d,]+)",
+    r"(?:tsh|thyroid\s*stimulating)\s*[:\-]?\s*([\d.]+)",
+    r"(?:vitamin\s*d|vit\s*d|25-oh)\s*[:\-]?\s*([\d.]+)",
+    r"(?:vitamin\s*b12|vit\s*b12|cobalamin)\s*[:\-]?\s*([\d.]+)",
+]
+LEGACY_ALERT_PATTERNS = [
+    r"[Hh]emoglobin[:\s]+(\d+\.?\d*)",
+    r"[Ff]asting\s*(?:[Bb]lood\s*)?[Ss]ugar[:\s]+(\d+\.?\d*)",
+    r"HbA1c[:\s]+(\d+\.?\d*)",
+    r"[Cc]reatinine[:\s]+(\d+\.?\d*)",
+]
+
+
+def legacy(text: str):
+    text_lower = text.lower()
+    values = [re.search(p, text_lower) for p in LEGACY_PATTERNS]
+    alerts = [re.search(p, text) for p in LEGACY_ALERT_PATTERNS]
+    return values, alerts
+
+
+def single_pass(text: str):
+    findings = extract_lab_values(text)
+    return findings, check_emergency_from_findings(findings)
+
+
+# ── Synthetic reports ───────────────────────────────────────────────
+OTHER_TESTS = [
+    "Neutrophils: 62 %", "Lymphocytes: 30 %", "Eosinophils: 3 %", "Monocytes: 4 %",
+    "MCV: 88 fL", "MCH: 29 pg", "Urine pH: 6.0", "Specific gravity: 1.015",
+    "Sodium: 139 mEq/L", "Potassium: 4.2 mEq/L", "Calcium: 9.4 mg/dL", "Uric acid: 5.6 mg/dL",
+    "Bilirubin total: 0.8 mg/dL", "Albumin: 4.1 g/dL", "Remarks: sample collected at 8:30 am",
+]
+
+
+def make_report(repeats: int) -> str:
+    """A long discharge summary: many unrelated tests around one real lab panel."""
+    filler = "\n".join(OTHER_TESTS * repeats)
+    return f"{filler}\n{SAMPLE_REPORTS[0]['text']}\n{filler}"
+
+
+def bench(func, text: str, rounds: int) -> float:
+    start = time.perf_counter()
+    for _ in range(rounds):
+        func(text)
+    return (time.perf_counter() - start) / rounds * 1000
+
+
+if __name__ == "__main__":
+    print(f"{'report size':>12} {'legacy ms':>10} {'single ms':>10} {'speedup':>8}")
+    for repeats in (1, 10, 100, 1000):
+        text = make_report(repeats)
+        rounds = max(5, 2000 // repeats)
+        old_ms = bench(legacy, text, rounds)
+        new_ms = bench(single_pass, text, rounds)
+        print(f"{len(text):>10} B {old_ms:>10.3f} {new_ms:>10.3f} {old_ms / new_ms:>7.1f}x")
@@ -0,0 +1,114 @@
+"""Load test — shift-start login storm against other traffic on the same event loop.
+
+Run from backend/:  python benchmarks/bench_login_storm.py [logins] [users]
+
+Drives the app in-process (httpx ASGI transport, one event loop) with
+`logins` concurrent logins while a probe keeps calling /api/system/health
+and authenticated /api/auth/me. Run twice: with bcrypt called inline in the
+handler, as before, and on the capped hashing pool. Reports login latency,
+probe latency while the storm runs, and /me with and without the user cache.
+"""
+import os
+import sys
+import time
+import asyncio
+import tempfile
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.chdir(tempfile.mkdtemp())  # DATABASE_URL is relative to the working directory
+os.environ.setdefault("STT_PRELOAD", "0")
+
+import bcrypt
+import httpx
+from sqlalchemy import insert
+
+import main
+from database import engine, init_db
+from models import User
+from routers import auth
+from services import password_hashing
+from services.user_cache import user_cache
+
+PASSWORD = "shift-start-123"
+
+
+async def inline_verify(password: str, hashed: str) -> bool:
+    """The previous behaviour: bcrypt on the event loop thread."""
+    return bcrypt.checkpw(password.encode(), hashed.encode())
+
+
+def percentile(values: list, q: float) -> float:
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * q))] * 1000 if values else 0.0
+
+
+async def storm(client: httpx.AsyncClient, logins: int, users: int, token: str) -> dict:
+    login_times, probe_times = [], []
+    done = asyncio.Event()
+
+    async def login(i: int):
+        start = time.perf_counter()
+        r = await client.post("/api/auth/login", data={"email": f"u{i % users}@example.org", "password": PASSWORD})
+        r.raise_for_status()
+        login_times.append(time.perf_counter() - start)
+
+    async def probe():
+        headers = {"Authorization": f"Bearer {token}"}
+        while not done.is_set():
+            for url, kwargs in (("/api/system/health", {}), ("/api/auth/me", {"headers": headers})):
+                start = time.perf_counter()
+                (await client.get(url, **kwargs)).raise_for_status()
+                probe_times.append(time.perf_counter() - start)
+            await asyncio.sleep(0.005)
+
+    prober = asyncio.create_task(probe())
+    start = time.perf_counter()
+    await asyncio.gather(*(login(i) for i in range(logins)))
+    elapsed = time.perf_counter() - start
+    done.set()
+    await prober
+    return {"elapsed": elapsed, "login": login_times, "probe": probe_times}
+
+
+async def time_me(client: httpx.AsyncClient, token: str, n: int = 500) -> float:
+    headers = {"Authorization": f"Bearer {token}"}
+    start = time.perf_counter()
+    for _ in range(n):
+        (await client.get("/api/auth/me", headers=headers)).raise_for_status()
+    return (time.perf_counter() - start) / n * 1000
+
+
+async def main_async(logins: int, users: int):
+    init_db()
+    hashed = bcrypt.hashpw(PASSWORD.encode(), bcrypt.gensalt()).decode()
+    with engine.begin() as conn:
+        conn.execute(insert(User), [{"name": f"User {i}", "email": f"u{i}@example.org", "password_hash": hashed}
+                                    for i in range(users)])
+    token = auth.create_token(1)
+
+    transport = httpx.ASGITransport(app=main.app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+        for label, verify in (("inline bcrypt", inline_verify), ("hashing pool", password_hashing.verify_password)):
+            auth.verify_password = verify
+            result = await storm(client, logins, users, token)
+            print(f"{label:>14}: {logins} logins in {result['elapsed']:.1f}s | "
+                  f"login p50 {percentile(result['login'], 0.5):6.0f} ms | "
+                  f"other requests during storm: n={len(result['probe'])}, "
+                  f"p50 {percentile(result['probe'], 0.5):6.1f} ms, max {percentile(result['probe'], 1.0):7.1f} ms")
+
+        user_cache.ttl_seconds = 0  # every request decodes the JWT and loads the user
+        user_cache.invalidate_user(1)
+        uncached = await time_me(client, token)
+        user_cache.ttl_seconds = 60
+        cached = await time_me(client, token)
+        print(f"/api/auth/me: {uncached:.2f} ms without the user cache, {cached:.2f} ms with it "
+              f"({user_cache.stats()})")
+
+
+if __name__ == "__main__":
+    logins = int(sys.argv[1]) if len(sys.argv) > 1 else 20
+    users = int(sys.argv[2]) if len(sys.argv) > 2 else 20
+    print(f"bcrypt cost {bcrypt.gensalt().decode().split('$')[2]}, hashing pool {password_hashing.BCRYPT_WORKERS} "
+          f"worker(s), {os.cpu_count()} CPU(s)")
+    asyncio.run(main_async(logins, users))
+    password_hashing.shutdown_hashing_executor()
@@ -0,0 +1,83 @@
+"""Benchmark — patient list/detail summaries.
+
+Run from backend/:  python benchmarks/bench_patient_summary.py [patients] [reports per patient]
+
+Seeds a throwaway SQLite database, then times /api/patients/list and
+/api/patients/{id} through the app and counts the SQL statements each one
+runs at that size. The per-patient loading that a `len(p.reports)`
+relationship would do is timed for comparison. The statement counts and
+averages are asserted in test_patient_summary.py.
+"""
+import os
+import sys
+import time
+import random
+import tempfile
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.chdir(tempfile.mkdtemp())  # DATABASE_URL is relative to the working directory
+os.environ.setdefault("STT_PRELOAD", "0")
+
+from fastapi.testclient import TestClient
+from sqlalchemy import event, insert
+
+import main
+from database import engine, async_engine, SessionLocal
+from models import Patient, MedicalReport, HealthTimeline
+
+statements = []
+event.listen(async_engine.sync_engine, "before_cursor_execute", lambda *args: statements.append(args[2]))
+
+
+def seed(patients: int, reports_each: int):
+    random.seed(3)
+    start = datetime(2025, 1, 1)
+    with engine.begin() as conn:
+        conn.execute(insert(Patient), [
+            {"name": f"Patient {i}", "age": random.randint(18, 80), "asha_worker_id": f"asha-{i % 20}",
+             "created_at": start + timedelta(minutes=i)}
+            for i in range(patients)
+        ])
+        conn.execute(insert(MedicalReport), [
+            {"patient_id": p, "filename": "report.pdf", "risk_score": random.choice([None, 0, 20, 45, 80]),
+             "risk_level": "moderate", "created_at": start + timedelta(hours=random.randint(0, 5000))}
+            for p in range(1, patients + 1) for _ in range(reports_each)
+        ])
+        conn.execute(insert(HealthTimeline), [
+            {"patient_id": p, "event_type": "scan", "title": "Food Scan",
+             "created_at": start + timedelta(hours=random.randint(0, 5000))}
+            for p in range(1, patients + 1) for _ in range(reports_each)
+        ])
+
+
+def count_statements(client: TestClient, url: str, **params) -> tuple[int, float, dict]:
+    statements.clear()
+    start = time.perf_counter()
+    response = client.get(url, params=params)
+    elapsed = time.perf_counter() - start
+    response.raise_for_status()
+    return len(statements), elapsed, response.json()
+
+
+if __name__ == "__main__":
+    patients = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+    reports_each = int(sys.argv[2]) if len(sys.argv) > 2 else 5
+
+    with TestClient(main.app) as client:
+        seed(patients, reports_each)
+
+        n_list, list_s, page = count_statements(client, "/api/patients/list", limit=100)
+        n_detail, detail_s, detail = count_statements(client, "/api/patients/1")
+        print(f"/patients/list (100 per page): {n_list} statements, {list_s * 1000:.1f} ms")
+        print(f"/patients/{{id}}:               {n_detail} statements, {detail_s * 1000:.1f} ms")
+
+        # What a per-patient relationship load costs for the same page
+        db = SessionLocal()
+        ids = [item["id"] for item in page["items"]]
+        start = time.perf_counter()
+        for patient_id in ids:
+            db.query(MedicalReport).filter(MedicalReport.patient_id == patient_id).all()
+        n_plus_one_s = time.perf_counter() - start
+        db.close()
+        print(f"per-patient report loads (N+1):  {len(ids)} statements, {n_plus_one_s * 1000:.1f} ms")
@@ -0,0 +1,122 @@
+"""Behaviour check + timing — background report jobs.
+
+Run from backend/:  python benchmarks/bench_report_jobs.py [jobs]
+
+Submits `jobs` distinct reports to /api/reports/jobs with a webhook pointing
+at a local HTTP listener, resubmits each one, and waits for the results.
+Then simulates a server that died mid-job: a job left "running" with a stale
+heartbeat is recovered by recover_jobs() and completes. Exits non-zero if a
+resubmission created a new job, a webhook went missing, a job produced more
+than one report, or the orphaned job was not recovered.
+"""
+import os
+import sys
+import json
+import time
+import uuid
+import hashlib
+import tempfile
+import threading
+from datetime import datetime, timedelta, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+# DATABASE_URL is relative to the working directory; the spawned job workers
+# re-run this module, so they have to land in the same directory. Uploads go there too.
+os.chdir(os.environ.setdefault("BENCH_REPORT_JOBS_DIR", tempfile.mkdtemp()))
+os.environ.setdefault("UPLOAD_DIR", os.path.join(os.getcwd(), "uploads"))
+os.environ.setdefault("STT_PRELOAD", "0")
+
+from fastapi.testclient import TestClient
+from sqlalchemy import select, func
+
+import main
+from database import SessionLocal
+from models import MedicalReport, ReportJob
+from services.report_jobs import JOB_UPLOAD_DIR, recover_jobs
+
+deliveries = []
+
+
+class Webhook(BaseHTTPRequestHandler):
+    def do_POST(self):
+        deliveries.append(json.loads(self.rfile.read(int(self.headers["Content-Length"]))))
+        self.send_response(204)
+        self.end_headers()
+
+    def log_message(self, *args):
+        pass
+
+
+def wait_for(client: TestClient, job_ids: list, timeout: float = 120) -> float:
+    start = time.perf_counter()
+    pending = set(job_ids)
+    while pending and time.perf_counter() - start < timeout:
+        pending = {j for j in pending if client.get(f"/api/reports/jobs/{j}").json()["status"] in ("queued", "running")}
+        time.sleep(0.2)
+    return time.perf_counter() - start
+
+
+if __name__ == "__main__":
+    jobs = int(sys.argv[1]) if len(sys.argv) > 1 else 20
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Webhook)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    webhook_url = f"http://127.0.0.1:{server.server_port}/hook"
+    problems = []
+
+    with TestClient(main.app) as client:
+        submit_times, job_ids = [], []
+        for i in range(jobs):
+            files = {"file": (f"report_{i}.png", f"report {i}".encode(), "image/png")}
+            start = time.perf_counter()
+            response = client.post("/api/reports/jobs", files=files, data={"patient_id": i + 1, "webhook_url": webhook_url})
+            submit_times.append(time.perf_counter() - start)
+            job_ids.append(response.json()["job_id"])
+            again = client.post("/api/reports/jobs", files=files, data={"patient_id": i + 1}).json()
+            if again["job_id"] != job_ids[-1] or not again["duplicate"]:
+                problems.append(f"resubmitting report {i} created job {again['job_id']}")
+        submit_times.sort()
+        print(f"job id returned in p50 {submit_times[len(submit_times) // 2] * 1000:.1f} ms, "
+              f"max {submit_times[-1] * 1000:.1f} ms")
+
+        elapsed = wait_for(client, job_ids)
+        results = [client.get(f"/api/reports/jobs/{j}/result") for j in job_ids]
+        done = sum(r.status_code == 200 and "explanation_en" in r.json() for r in results)
+        print(f"{done}/{jobs} jobs done in {elapsed:.1f}s (includes starting the worker processes)")
+        if done != jobs:
+            problems.append(f"only {done} of {jobs} jobs finished")
+
+        # A job that was running when the server died: claimed once, heartbeat long gone
+        content = b"report from before the restart"
+        file_hash = hashlib.sha256(content).hexdigest()
+        file_path = os.path.join(JOB_UPLOAD_DIR, f"{file_hash}.png")
+        with open(file_path, "wb") as f:
+            f.write(content)
+        orphan = uuid.uuid4().hex
+        long_ago = datetime.now(timezone.utc) - timedelta(minutes=10)
+        db = SessionLocal()
+        db.add(ReportJob(id=orphan, idempotency_key=f"{file_hash}:", file_hash=file_hash, file_path=file_path,
+                         filename="before_restart.png", status="running", attempts=1,
+                         started_at=long_ago, heartbeat_at=long_ago))
+        db.commit()
+        print(f"recover_jobs: {recover_jobs()}")
+        wait_for(client, [orphan])
+        status = client.get(f"/api/reports/jobs/{orphan}").json()
+        print(f"orphaned job → {status['status']} after {status['attempts']} attempts")
+        if status["status"] != "done":
+            problems.append(f"orphaned job ended {status['status']}: {status['error']}")
+
+        time.sleep(1)  # last webhook deliveries
+        db = SessionLocal()
+        reports = db.scalar(select(func.count()).select_from(MedicalReport))
+        db.close()
+        print(f"{len(deliveries)} webhook deliveries, {reports} reports for {jobs + 1} jobs")
+        if sorted(d["job_id"] for d in deliveries) != sorted(job_ids):
+            problems.append(f"expected {jobs} webhook deliveries, got {len(deliveries)}")
+        if reports != jobs + 1:
+            problems.append(f"{reports} reports saved for {jobs + 1} jobs")
+
+    server.shutdown()
+    if problems:
+        sys.exit("\n".join(problems))
+    print("report jobs OK")
@@ -0,0 +1,62 @@
+"""Parity check + benchmark — vectorized batch risk engine vs. the scalar rules.
+
+Run from backend/:  python benchmarks/bench_risk_batch.py [rows]
+
+Every row's risks, levels and recommendation codes must match the scalar
+engine exactly; the script exits non-zero on the first mismatch.
+"""
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from services.risk_engine import score_diabetes_risk, score_heart_risk
+from services.risk_batch import predict_risks_batch, to_columns, score_columns, columns_view
+from sample_vitals import make_rows
+
+
+def scalar(rows: list) -> list:
+    results = []
+    for vitals in rows:
+        d_risk, d_level, d_codes = score_diabetes_risk(vitals)
+        h_risk, h_level, h_codes = score_heart_risk(vitals)
+        results.append((d_risk, d_level, h_risk, h_level, d_codes + h_codes))
+    return results
+
+
+if __name__ == "__main__":
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 100_000
+    rows = make_rows(count)
+
+    start = time.perf_counter()
+    expected = scalar(rows)
+    scalar_s = time.perf_counter() - start
+
+    start = time.perf_counter()
+    batched = predict_risks_batch(rows)
+    batch_s = time.perf_counter() - start
+
+    start = time.perf_counter()
+    columns_view(score_columns(to_columns(rows)))
+    columns_s = time.perf_counter() - start
+
+    columns = to_columns(rows)
+    start = time.perf_counter()
+    score_columns(columns)
+    kernel_s = time.perf_counter() - start
+
+    for i, (want, got) in enumerate(zip(expected, batched)):
+        got = (got["diabetes_risk"], got["diabetes_level"], got["heart_risk"], got["heart_level"],
+               got["recommendation_codes"])
+        if want != got:
+            sys.exit(f"Mismatch at row {i}: {rows[i]}\n  scalar: {want}\n  batch:  {got}")
+
+    print(f"parity: {count} rows identical")
+    for label, seconds in (
+        ("scalar loop", scalar_s),
+        ("batch, row dicts", batch_s),
+        ("batch, columns", columns_s),
+        ("scoring kernel only", kernel_s),
+    ):
+        print(f"{label:>20}: {seconds * 1000:8.1f} ms  ({count / seconds:>12,.0f} rows/s)  {scalar_s / seconds:5.1f}x")
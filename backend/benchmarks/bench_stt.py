@@ -0,0 +1,58 @@
+"""Real-time factor benchmark — each installed STT backend × Whisper model size.
+
+Run from backend/:  python benchmarks/bench_stt.py [audio file] [--sizes tiny base small] [--rounds 3]
+
+RTF = transcription time / audio duration (lower is better; < 1 is faster than
+real time). Load time includes the warm-up transcription. Without an audio file
+a 10 s synthetic clip is used, which exercises the model but not real speech.
+"""
+import os
+import sys
+import time
+import argparse
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from services.media import decode_audio, WHISPER_SAMPLE_RATE
+from services.speech_service import STT_BACKENDS, STT_COMPUTE_TYPE, load_stt_backend, warm_up_clip
+
+
+def load_clip(path: str | None):
+    if path is None:
+        return warm_up_clip(10.0)
+    with open(path, "rb") as f:
+        samples = decode_audio(f.read())
+    if samples is None:
+        sys.exit(f"Could not decode {path} (is ffmpeg installed?)")
+    return samples
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("audio", nargs="?", help="speech recording to transcribe")
+    parser.add_argument("--sizes", nargs="+", default=["tiny", "base", "small"])
+    parser.add_argument("--language", default="en")
+    parser.add_argument("--rounds", type=int, default=3)
+    args = parser.parse_args()
+
+    clip = load_clip(args.audio)
+    duration = len(clip) / WHISPER_SAMPLE_RATE
+    print(f"clip: {duration:.1f}s, faster-whisper compute type: {STT_COMPUTE_TYPE}")
+    print(f"{'backend':>16} {'size':>7} {'load s':>7} {'RTF':>6}  transcript")
+
+    for name, (_, available) in STT_BACKENDS.items():
+        if not available:
+            print(f"{name:>16}  (not installed – skipped)")
+            continue
+        for size in args.sizes:
+            start = time.perf_counter()
+            backend = load_stt_backend(name, size)
+            backend.transcribe(warm_up_clip(), args.language)
+            load_s = time.perf_counter() - start
+
+            start = time.perf_counter()
+            for _ in range(args.rounds):
+                text = backend.transcribe(clip, args.language)
+            rtf = (time.perf_counter() - start) / args.rounds / duration
+            print(f"{name:>16} {size:>7} {load_s:>7.1f} {rtf:>6.3f}  {text[:40]!r}")
+            del backend
@@ -0,0 +1,80 @@
+"""Benchmark — streaming /api/risk/import vs. one /api/risk/predict call per row.
+
+Run from backend/:  python benchmarks/bench_vitals_import.py [rows]
+
+Runs against a throwaway SQLite database in a temp directory. Both paths
+save one timeline row per person. Peak traced memory of the import (the
+server side, consuming events as they are produced) is shown at two file
+sizes to check that it stays flat.
+"""
+import os
+import io
+import sys
+import json
+import time
+import asyncio
+import tempfile
+import tracemalloc
+
+BACKEND = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND)
+os.chdir(tempfile.mkdtemp())  # DATABASE_URL is relative to the working directory
+os.environ.setdefault("STT_PRELOAD", "0")
+
+from fastapi import UploadFile
+from fastapi.testclient import TestClient
+
+import main
+from routers.risk import _stream_import
+from services.rules import get_rules
+from sample_vitals import make_rows
+
+
+def to_csv(rows: list) -> bytes:
+    fields = list(dict.fromkeys(field for row in rows for field in row))  # some rows have no gender
+    out = io.StringIO()
+    out.write(",".join(["patient_id"] + fields) + "\n")
+    for i, row in enumerate(rows):
+        out.write(",".join([str(i + 1)] + ["" if row.get(f) is None else str(row[f]) for f in fields]) + "\n")
+    return out.getvalue().encode()
+
+
+async def drain_import(body: bytes) -> dict:
+    """Consume the import stream directly, keeping only the last event."""
+    last = None
+    async for line in _stream_import(UploadFile(io.BytesIO(body)), "csv", get_rules()):
+        last = line
+    return json.loads(last)
+
+
+def run_import(client: TestClient, body: bytes) -> dict:
+    response = client.post("/api/risk/import?format=csv", content=body, headers={"content-type": "text/csv"})
+    return json.loads(response.text.splitlines()[-1])
+
+
+if __name__ == "__main__":
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 20_000
+    rows = make_rows(count)
+    single = rows[:min(count, 2000)]
+
+    with TestClient(main.app) as client:
+        start = time.perf_counter()
+        for i, row in enumerate(single):
+            client.post("/api/risk/predict", json=row, params={"patient_id": i + 1})
+        single_s = time.perf_counter() - start
+        print(f"{'single /predict':>22}: {len(single) / single_s:>10,.0f} rows/s  ({len(single)} rows)")
+
+        body = to_csv(rows)
+        start = time.perf_counter()
+        done = run_import(client, body)
+        import_s = time.perf_counter() - start
+        print(f"{'streaming /import':>22}: {count / import_s:>10,.0f} rows/s  ({done['saved']} saved, "
+              f"{done['emergencies']} emergencies)  {single_s / len(single) * count / import_s:5.1f}x")
+
+        for size in (count // 4, count):
+            body = to_csv(rows[:size])
+            tracemalloc.start()
+            asyncio.run(drain_import(body))
+            _, peak = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+            print(f"{'peak memory':>22}: {peak / 2**20:6.1f} MB for {size} rows ({len(body) / 2**20:.1f} MB body)")
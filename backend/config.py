@@ -3,32 +3,135 @@ import os
 import secrets
 
 BASE_DIR = os.path.dirname(os.path.abspath(__file__))
-DATABASE_URL = "sqlite:///./healthmitra_v2.db"
-UPLOAD_DIR = os.path.join(BASE_DIR, "uploads")
+DATABASE_URL = os.getenv("DATABASE_URL", "sqlite:///./healthmitra_v2.db")  # or postgresql://…, mysql+pymysql://…
+# Request handlers use an async driver for the same database (sqlite+aiosqlite, postgresql+asyncpg,
+# mysql+aiomysql, derived from DATABASE_URL); set this to pick another one
+ASYNC_DATABASE_URL = os.getenv("ASYNC_DATABASE_URL")
+UPLOAD_DIR = os.getenv("UPLOAD_DIR", os.path.join(BASE_DIR, "uploads"))
 MODELS_DIR = os.path.join(BASE_DIR, "models_cache")
 PROFILE_PHOTO_DIR = os.path.join(UPLOAD_DIR, "profiles")
 os.makedirs(UPLOAD_DIR, exist_ok=True)
 os.makedirs(MODELS_DIR, exist_ok=True)
 os.makedirs(PROFILE_PHOTO_DIR, exist_ok=True)
 
+# SQLite tuning, applied to every new connection
+SQLITE_WAL = os.getenv("SQLITE_WAL", "1") == "1"  # readers no longer block the writer (and vice versa)
+SQLITE_BUSY_TIMEOUT_MS = int(os.getenv("SQLITE_BUSY_TIMEOUT_MS", "15000"))  # wait this long for a lock before "database is locked"
+SQLITE_MMAP_SIZE_MB = int(os.getenv("SQLITE_MMAP_SIZE_MB", "256"))  # 0 disables memory-mapped reads
+
+# Connection pool for server databases (PostgreSQL / MySQL)
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "10"))
+DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", "20"))
+DB_POOL_TIMEOUT = float(os.getenv("DB_POOL_TIMEOUT", "30"))  # seconds to wait for a free connection
+DB_POOL_RECYCLE = int(os.getenv("DB_POOL_RECYCLE", "1800"))  # reconnect before server-side idle timeouts
+
+# History / list endpoints – keyset pagination
+PAGE_SIZE_MAX = int(os.getenv("PAGE_SIZE_MAX", "100"))  # larger ?limit= values are capped to this
+
+# Uploads are decoded in memory; originals are also written to UPLOAD_DIR in the background
+PERSIST_UPLOADS = os.getenv("PERSIST_UPLOADS", "1") == "1"
+
 # JWT Auth settings
 JWT_SECRET = os.getenv("JWT_SECRET", secrets.token_hex(32))
 JWT_ALGORITHM = "HS256"
 JWT_EXPIRY_HOURS = 72
 
+# Password hashing runs on its own small pool; bcrypt is CPU-bound (~250 ms) and
+# releases the GIL, so the cap is how many CPU cores a login burst may occupy
+BCRYPT_WORKERS = int(os.getenv("BCRYPT_WORKERS", str(max(1, min(4, (os.cpu_count() or 2) // 2)))))
+# Verified token → user snapshot cache; profile edits invalidate it in this process,
+# other worker processes see them once the TTL expires
+AUTH_CACHE_TTL_SECONDS = float(os.getenv("AUTH_CACHE_TTL_SECONDS", "60"))
+AUTH_CACHE_MAX_ENTRIES = int(os.getenv("AUTH_CACHE_MAX_ENTRIES", "10000"))
+
 # Ollama settings
 OLLAMA_BASE_URL = os.getenv("OLLAMA_BASE_URL", "http://localhost:11434")
 OLLAMA_MODEL = os.getenv("OLLAMA_MODEL", "phi3")
+OLLAMA_PROBE_INTERVAL = float(os.getenv("OLLAMA_PROBE_INTERVAL", "30"))  # seconds between checks while online
+OLLAMA_PROBE_MIN_BACKOFF = float(os.getenv("OLLAMA_PROBE_MIN_BACKOFF", "5"))  # first retry after going offline
+OLLAMA_PROBE_MAX_BACKOFF = float(os.getenv("OLLAMA_PROBE_MAX_BACKOFF", "300"))
+
+# LLM scheduler – one bounded priority queue in front of Ollama
+LLM_CONCURRENCY = int(os.getenv("LLM_CONCURRENCY", "2"))  # generations in flight (match OLLAMA_NUM_PARALLEL)
+LLM_QUEUE_SIZE = int(os.getenv("LLM_QUEUE_SIZE", "16"))  # waiting requests before degrading to fallbacks
+LLM_MAX_QUEUE_WAIT = float(os.getenv("LLM_MAX_QUEUE_WAIT", "60"))  # seconds a request may wait to start
+
+# Answer cache for repeated health questions
+ANSWER_CACHE_MAX_ENTRIES = int(os.getenv("ANSWER_CACHE_MAX_ENTRIES", "256"))
+ANSWER_CACHE_TTL_SECONDS = float(os.getenv("ANSWER_CACHE_TTL_SECONDS", "86400"))
+ANSWER_CACHE_NEAR_DUPLICATE = os.getenv("ANSWER_CACHE_NEAR_DUPLICATE", "0") == "1"  # n-gram similarity matching
+ANSWER_CACHE_SIMILARITY = float(os.getenv("ANSWER_CACHE_SIMILARITY", "0.85"))  # min trigram Jaccard score
+
+# Inference executor – shared by all routers for blocking OCR / LLM / STT / YOLO calls.
+# Ollama only runs requests concurrently when started with OLLAMA_NUM_PARALLEL >= 2.
+INFERENCE_WORKERS = int(os.getenv("INFERENCE_WORKERS", "4"))
 
 # Tesseract OCR settings
 TESSERACT_CMD = os.getenv("TESSERACT_CMD", r"C:\Program Files\Tesseract-OCR\tesseract.exe")
+OCR_LANG = os.getenv("OCR_LANG", "eng+hin")
+OCR_DPI = int(os.getenv("OCR_DPI", "200"))  # pdf2image render resolution
+OCR_PAGE_WORKERS = int(os.getenv("OCR_PAGE_WORKERS", str(os.cpu_count() or 2)))  # PDF page processes
+# Photos are shrunk and cleaned up before Tesseract (services/image_preprocess.py): EXIF orientation,
+# downscale to OCR_DPI, grayscale, deskew, adaptive binarization
+OCR_PREPROCESS = os.getenv("OCR_PREPROCESS", "1") == "1"
+OCR_PAGE_INCHES = float(os.getenv("OCR_PAGE_INCHES", "11.7"))  # long side of a photographed page (A4) for the DPI estimate
+OCR_DESKEW_MAX_ANGLE = float(os.getenv("OCR_DESKEW_MAX_ANGLE", "15"))  # degrees searched either way
+OCR_BINARIZE_THRESHOLD = float(os.getenv("OCR_BINARIZE_THRESHOLD", "0.15"))  # ink = this much darker than its surroundings
+
+# OCR result cache (content-addressed by SHA-256 of the uploaded file)
+OCR_CACHE_PATH = os.getenv("OCR_CACHE_PATH", os.path.join(MODELS_DIR, "ocr_cache.db"))
+OCR_CACHE_MAX_MB = float(os.getenv("OCR_CACHE_MAX_MB", "64"))
+
+# Background report jobs (/api/reports/jobs) – persisted in the database, run in worker
+# processes; each process has its own LLM scheduler, so Ollama may see
+# REPORT_JOB_WORKERS × LLM_CONCURRENCY generations at once
+REPORT_JOB_WORKERS = int(os.getenv("REPORT_JOB_WORKERS", "2"))
+REPORT_JOB_MAX_ATTEMPTS = int(os.getenv("REPORT_JOB_MAX_ATTEMPTS", "3"))  # worker crashes before a job fails
+REPORT_JOB_HEARTBEAT_SECONDS = float(os.getenv("REPORT_JOB_HEARTBEAT_SECONDS", "10"))  # 3 missed = orphaned
+REPORT_JOB_SWEEP_SECONDS = float(os.getenv("REPORT_JOB_SWEEP_SECONDS", "30"))  # requeue orphaned jobs this often
+REPORT_JOB_WEBHOOK_TIMEOUT = float(os.getenv("REPORT_JOB_WEBHOOK_TIMEOUT", "10"))
+REPORT_JOB_WEBHOOK_RETRIES = int(os.getenv("REPORT_JOB_WEBHOOK_RETRIES", "3"))
+
+# Resumable chunked uploads (/api/uploads) – each chunk is written straight to its offset in a
+# preallocated file, so a request holds at most one chunk in memory whatever the file size
+CHUNKED_UPLOAD_CHUNK_KB = int(os.getenv("CHUNKED_UPLOAD_CHUNK_KB", "256"))  # default; clients may pick 64 KB–8 MB
+CHUNKED_UPLOAD_MAX_MB = float(os.getenv("CHUNKED_UPLOAD_MAX_MB", "200"))
+CHUNKED_UPLOAD_TTL_HOURS = float(os.getenv("CHUNKED_UPLOAD_TTL_HOURS", "24"))  # idle uploads are deleted after this
+# A /complete still finalizing after this long is taken to have died with its process and can be retried
+CHUNKED_UPLOAD_FINALIZE_MINUTES = float(os.getenv("CHUNKED_UPLOAD_FINALIZE_MINUTES", "10"))
 
 # Whisper STT settings
 WHISPER_MODEL_SIZE = os.getenv("WHISPER_MODEL_SIZE", "base")  # tiny, base, small, medium, large
+STT_BACKEND = os.getenv("STT_BACKEND", "openai-whisper")  # openai-whisper | faster-whisper
+STT_COMPUTE_TYPE = os.getenv("STT_COMPUTE_TYPE", "int8")  # faster-whisper only: int8, int8_float32, float32
+STT_PRELOAD = os.getenv("STT_PRELOAD", "1") == "1"  # load + warm up the model at startup
+
+# Batch risk scoring (/api/risk/predict-batch)
+RISK_BATCH_MAX_ROWS = int(os.getenv("RISK_BATCH_MAX_ROWS", "200000"))
+
+# Bulk vitals import (/api/risk/import) – rows scored and saved per chunk
+IMPORT_CHUNK_ROWS = int(os.getenv("IMPORT_CHUNK_ROWS", "2000"))
+IMPORT_SPOOL_MAX_MB = float(os.getenv("IMPORT_SPOOL_MAX_MB", "8"))  # raw bodies above this spill to a temp file
+IMPORT_MAX_LINE_KB = int(os.getenv("IMPORT_MAX_LINE_KB", "64"))  # longer CSV / JSONL lines are rejected as invalid
+
+# Risk scoring + emergency thresholds; edits to the file are picked up without a restart
+RULES_PATH = os.getenv("RULES_PATH", os.path.join(BASE_DIR, "rules", "health_rules.json"))
+RULES_RELOAD_CHECK_SECONDS = float(os.getenv("RULES_RELOAD_CHECK_SECONDS", "2"))  # how often the mtime is checked
+
+# Live voice streaming (/api/voice/stream) – voice activity detection
+VAD_AGGRESSIVENESS = int(os.getenv("VAD_AGGRESSIVENESS", "2"))  # webrtcvad 0-3, if installed
+VAD_ENERGY_THRESHOLD = float(os.getenv("VAD_ENERGY_THRESHOLD", "0.01"))  # min RMS for the energy fallback
+VAD_SEGMENT_SILENCE_MS = int(os.getenv("VAD_SEGMENT_SILENCE_MS", "500"))  # pause that ends a phrase
+VAD_END_SILENCE_MS = int(os.getenv("VAD_END_SILENCE_MS", "1200"))  # pause that ends the question
+VAD_MAX_SEGMENT_SECONDS = float(os.getenv("VAD_MAX_SEGMENT_SECONDS", "20"))
+VOICE_STREAM_MAX_SECONDS = float(os.getenv("VOICE_STREAM_MAX_SECONDS", "120"))
 
 # YOLOv8 settings
 YOLO_MODEL_NAME = os.getenv("YOLO_MODEL_NAME", "yolov8n.pt")  # nano model for speed
 YOLO_CONFIDENCE_THRESHOLD = float(os.getenv("YOLO_CONFIDENCE", "0.25"))
+YOLO_INPUT_SIZE = int(os.getenv("YOLO_INPUT_SIZE", "640"))  # photos are resized to this long side before inference
+YOLO_BATCH_SIZE = int(os.getenv("YOLO_BATCH_SIZE", "8"))  # images per forward pass in /api/food/scan-batch
+FOOD_BATCH_MAX_FILES = int(os.getenv("FOOD_BATCH_MAX_FILES", "64"))
 
 # App settings
 APP_NAME = "HealthMitra Scan"
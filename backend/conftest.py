@@ -0,0 +1,15 @@
+"""Pytest setup — a throwaway database and upload directory for every test module.
+
+Set here, before any test module imports config, so the app never touches
+healthmitra_v2.db or uploads/ whatever order the modules are collected in.
+"""
+import os
+import sys
+import tempfile
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+_tmp = tempfile.mkdtemp(prefix="healthmitra-tests-")
+os.environ.setdefault("DATABASE_URL", f"sqlite:///{os.path.join(_tmp, 'test.db')}")
+os.environ.setdefault("UPLOAD_DIR", os.path.join(_tmp, "uploads"))
+os.environ.setdefault("STT_PRELOAD", "0")
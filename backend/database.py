@@ -1,22 +1,154 @@
 """HealthMitra Scan – Database Setup"""
-from sqlalchemy import create_engine
+import logging
+
+from sqlalchemy import create_engine, event, inspect
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
-from config import DATABASE_URL
+from sqlalchemy.pool import AsyncAdaptedQueuePool
+from config import (DATABASE_URL, ASYNC_DATABASE_URL, SQLITE_WAL, SQLITE_BUSY_TIMEOUT_MS, SQLITE_MMAP_SIZE_MB,
+                    DB_POOL_SIZE, DB_MAX_OVERFLOW, DB_POOL_TIMEOUT, DB_POOL_RECYCLE)
+
+logger = logging.getLogger(__name__)
+
+
+def _server_pool_args() -> dict:
+    return {
+        "pool_size": DB_POOL_SIZE,
+        "max_overflow": DB_MAX_OVERFLOW,
+        "pool_timeout": DB_POOL_TIMEOUT,
+        "pool_recycle": DB_POOL_RECYCLE,
+        "pool_pre_ping": True,
+    }
+
+
+def _is_memory(url) -> bool:
+    return make_url(url).database in (None, "", ":memory:")
+
+
+def _apply_sqlite_pragmas(sync_engine, in_memory: bool):
+    @event.listens_for(sync_engine, "connect")
+    def _sqlite_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        if SQLITE_WAL and not in_memory:
+            cursor.execute("PRAGMA journal_mode=WAL")  # persistent, but cheap to repeat
+            # With WAL, NORMAL only syncs at checkpoints: a power cut can lose the
+            # last commits but never corrupts the database. A rollback journal
+            # keeps SQLite's default FULL, which NORMAL would make unsafe.
+            cursor.execute("PRAGMA synchronous=NORMAL")
+        cursor.execute(f"PRAGMA busy_timeout={SQLITE_BUSY_TIMEOUT_MS}")
+        if not in_memory:
+            cursor.execute(f"PRAGMA mmap_size={SQLITE_MMAP_SIZE_MB * 1024 * 1024}")
+        cursor.close()
+
+
+def create_db_engine(url: str = DATABASE_URL):
+    """
+    Engine for `url`. SQLite gets WAL, synchronous=NORMAL, a busy timeout and
+    mmap reads on every connection; server databases also get pre-ping and
+    recycling, so connections dropped by the server are replaced transparently.
+    """
+    if make_url(url).get_backend_name() != "sqlite":
+        return create_engine(url, **_server_pool_args())
+
+    in_memory = _is_memory(url)
+    # File databases get the same pool bounds; in-memory ones keep SQLAlchemy's per-thread pool
+    pool_args = {} if in_memory else {
+        "pool_size": DB_POOL_SIZE, "max_overflow": DB_MAX_OVERFLOW, "pool_timeout": DB_POOL_TIMEOUT,
+    }
+    engine = create_engine(url, connect_args={
+        "check_same_thread": False,
+        "timeout": SQLITE_BUSY_TIMEOUT_MS / 1000,
+    }, **pool_args)
+    _apply_sqlite_pragmas(engine, in_memory)
+    return engine
 
-engine = create_engine(DATABASE_URL, connect_args={"check_same_thread": False})
+
+# Async drivers for the URLs DATABASE_URL accepts; ASYNC_DATABASE_URL overrides
+ASYNC_DRIVERS = {"sqlite": "aiosqlite", "postgresql": "asyncpg", "mysql": "aiomysql"}
+
+
+def async_database_url(url: str = DATABASE_URL) -> str:
+    parsed = make_url(url)
+    driver = ASYNC_DRIVERS.get(parsed.get_backend_name())
+    if driver is None:
+        raise ValueError(f"No async driver known for {parsed.get_backend_name()}; set ASYNC_DATABASE_URL")
+    return parsed.set(drivername=f"{parsed.get_backend_name()}+{driver}").render_as_string(hide_password=False)
+
+
+def create_async_db_engine(url: str = None):
+    """
+    Async engine over the same database as create_db_engine(), with the same
+    pragmas and pool bounds. In-memory SQLite is not shared between the two
+    engines, so use a file database when both are in play.
+    """
+    url = url or ASYNC_DATABASE_URL or async_database_url()
+    if make_url(url).get_backend_name() != "sqlite":
+        return create_async_engine(url, **_server_pool_args())
+
+    in_memory = _is_memory(url)
+    pool_args = {} if in_memory else {
+        "poolclass": AsyncAdaptedQueuePool,
+        "pool_size": DB_POOL_SIZE, "max_overflow": DB_MAX_OVERFLOW, "pool_timeout": DB_POOL_TIMEOUT,
+    }
+    engine = create_async_engine(url, connect_args={"timeout": SQLITE_BUSY_TIMEOUT_MS / 1000}, **pool_args)
+    _apply_sqlite_pragmas(engine.sync_engine, in_memory)
+    return engine
+
+
+engine = create_db_engine()
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 Base = declarative_base()
 
+# ── Async sessions for request handlers ─────────────────────────────
+# SessionLocal stays for code that already runs on worker threads (bulk
+# import chunks, init_db, scripts). Async sessions flush through the same
+# Session class, so session events registered on SessionLocal fire for both.
+async_engine = create_async_db_engine()
+AsyncSessionLocal = async_sessionmaker(
+    async_engine, autoflush=False, expire_on_commit=False, sync_session_class=SessionLocal.class_,
+)
+
 
-def get_db():
-    db = SessionLocal()
-    try:
+async def get_db():
+    async with AsyncSessionLocal() as db:
         yield db
-    finally:
-        db.close()
+
+
+def ensure_indexes(bind=None) -> list:
+    """
+    Lightweight migration: create_all() skips tables that already exist, so
+    indexes added to models.py later are created here on existing databases.
+    Returns the names of the indexes it created.
+    """
+    from models import Base as ModelBase
+    bind = bind or engine
+    inspector = inspect(bind)
+    created = []
+    for table in ModelBase.metadata.sorted_tables:
+        if not inspector.has_table(table.name):
+            continue
+        existing = {ix["name"] for ix in inspector.get_indexes(table.name)}
+        for index in table.indexes:
+            if index.name not in existing:
+                logger.info(f"Creating index {index.name} on {table.name} (one-time, may take a while)")
+                index.create(bind=bind)
+                created.append(index.name)
+    return created
 
 
 def init_db():
     from models import Base as ModelBase  # noqa: F401
+    from services.health_stats import rebuild_health_stats
+    had_stats = inspect(engine).has_table("health_stats")
     ModelBase.metadata.create_all(bind=engine)
+    ensure_indexes()
+    if not had_stats:
+        # First start after upgrading: fill the new table from existing history
+        db = SessionLocal()
+        try:
+            rebuild_health_stats(db)
+        finally:
+            db.close()
+    logger.info(f"Database: {engine.url.render_as_string(hide_password=True)}")
@@ -5,13 +5,24 @@ import os
 # Add backend directory to path
 sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
 
-from fastapi import FastAPI
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.staticfiles import StaticFiles
-from database import init_db
+from database import init_db, async_engine
+from services.inference_pool import shutdown_inference_executor
+from services.password_hashing import shutdown_hashing_executor
+from services.ocr_service import shutdown_page_pool
+from services.llm_service import start_model_probe, stop_model_probe
+from services.media import flush_pending_uploads
+from services.speech_service import start_stt_preload
+from services.rules import get_rules
+from services.pagination import InvalidCursor
+from services.chunked_upload import UploadError
+from services.report_jobs import start_job_sweeper, stop_job_sweeper, shutdown_job_pool
 from config import APP_NAME, APP_VERSION, CORS_ORIGINS, UPLOAD_DIR
 
-from routers import reports, food, voice, risk, patients, system
+from routers import reports, food, voice, risk, patients, system, uploads
 from routers import auth
 
 # Initialize FastAPI app
@@ -34,6 +45,16 @@ app.add_middleware(
 app.mount("/uploads", StaticFiles(directory=UPLOAD_DIR), name="uploads")
 
 # Register routers
+@app.exception_handler(InvalidCursor)
+async def invalid_cursor_handler(request: Request, exc: InvalidCursor):
+    return JSONResponse(status_code=400, content={"detail": str(exc)})
+
+
+@app.exception_handler(UploadError)
+async def upload_error_handler(request: Request, exc: UploadError):
+    return JSONResponse(status_code=exc.status_code, content={"detail": str(exc)})
+
+
 app.include_router(auth.router)
 app.include_router(reports.router)
 app.include_router(food.router)
@@ -41,16 +62,33 @@ app.include_router(voice.router)
 app.include_router(risk.router)
 app.include_router(patients.router)
 app.include_router(system.router)
+app.include_router(uploads.router)
 
 
 @app.on_event("startup")
 async def startup():
     init_db()
+    get_rules()  # compile the rule table now, so a broken file fails at boot
+    start_model_probe()
+    start_stt_preload()
+    start_job_sweeper()  # also resumes report jobs left queued or running by the last run
     print(f"\n🏥 {APP_NAME} v{APP_VERSION}")
     print(f"📂 Upload directory: {UPLOAD_DIR}")
     print(f"🔗 API docs: http://localhost:8000/docs")
 
 
+@app.on_event("shutdown")
+async def shutdown():
+    await stop_model_probe()
+    await stop_job_sweeper()
+    await flush_pending_uploads()
+    shutdown_inference_executor()
+    shutdown_hashing_executor()
+    await async_engine.dispose()
+    shutdown_page_pool()
+    shutdown_job_pool()
+
+
 @app.get("/")
 def root():
     return {
@@ -1,10 +1,23 @@
 """HealthMitra Scan – Database Models"""
-from sqlalchemy import Column, Integer, String, Float, Text, DateTime, ForeignKey, Boolean
+from sqlalchemy import Column, Integer, String, Float, Text, DateTime, ForeignKey, Boolean, Index
 from sqlalchemy.orm import relationship
 from datetime import datetime, timezone
 from database import Base
 
 
+def _history_indexes(table: str, unfiltered: bool = True) -> tuple:
+    """
+    History queries filter by patient or user and read newest first, so each
+    composite index serves both the WHERE and the ORDER BY … LIMIT without a
+    sort; created_at alone covers the lists served without a filter.
+    """
+    indexes = (
+        Index(f"ix_{table}_patient_created", "patient_id", "created_at"),
+        Index(f"ix_{table}_user_created", "user_id", "created_at"),
+    )
+    return indexes + (Index(f"ix_{table}_created", "created_at"),) if unfiltered else indexes
+
+
 class User(Base):
     __tablename__ = "users"
 
@@ -42,6 +55,11 @@ class Patient(Base):
     asha_worker_id = Column(String(50))
     created_at = Column(DateTime, default=lambda: datetime.now(timezone.utc))
 
+    __table_args__ = (
+        Index("ix_patients_asha_created", "asha_worker_id", "created_at"),
+        Index("ix_patients_created", "created_at"),
+    )
+
 
 class MedicalReport(Base):
     __tablename__ = "medical_reports"
@@ -60,6 +78,8 @@ class MedicalReport(Base):
 
     user = relationship("User", back_populates="reports")
 
+    __table_args__ = _history_indexes("medical_reports")
+
 
 class FoodScan(Base):
     __tablename__ = "food_scans"
@@ -76,6 +96,8 @@ class FoodScan(Base):
 
     user = relationship("User", back_populates="food_scans")
 
+    __table_args__ = _history_indexes("food_scans")
+
 
 class HealthTimeline(Base):
     __tablename__ = "health_timeline"
@@ -92,6 +114,8 @@ class HealthTimeline(Base):
 
     user = relationship("User", back_populates="timeline")
 
+    __table_args__ = _history_indexes("health_timeline", unfiltered=False)
+
 
 class VoiceSession(Base):
     __tablename__ = "voice_sessions"
@@ -105,3 +129,85 @@ class VoiceSession(Base):
     created_at = Column(DateTime, default=lambda: datetime.now(timezone.utc))
 
     user = relationship("User", back_populates="voice_sessions")
+
+    __table_args__ = _history_indexes("voice_sessions")
+
+
+class ReportJob(Base):
+    """A report upload processed in the background (see services/report_jobs.py)."""
+    __tablename__ = "report_jobs"
+
+    id = Column(String(32), primary_key=True)  # uuid4 hex, handed to the client
+    idempotency_key = Column(String(80), unique=True, nullable=False)  # file sha256 + patient
+    file_hash = Column(String(64), nullable=False)
+    file_path = Column(String(255), nullable=False)
+    filename = Column(String(255))
+    patient_id = Column(Integer, nullable=True)
+    status = Column(String(10), nullable=False, default="queued")  # queued, running, done, failed
+    attempts = Column(Integer, nullable=False, default=0)
+    error = Column(Text)
+    report_id = Column(Integer)
+    result_json = Column(Text)  # the same body /api/reports/upload returns
+    webhook_url = Column(String(500))
+    webhook_status = Column(String(200))
+    created_at = Column(DateTime, default=lambda: datetime.now(timezone.utc))
+    started_at = Column(DateTime)
+    heartbeat_at = Column(DateTime)
+    finished_at = Column(DateTime)
+
+    __table_args__ = (
+        Index("ix_report_jobs_status_created", "status", "created_at"),
+    )
+
+
+class UploadSession(Base):
+    """A resumable chunked upload being assembled on disk (see services/chunked_upload.py)."""
+    __tablename__ = "upload_sessions"
+
+    id = Column(String(32), primary_key=True)  # uuid4 hex, handed to the client
+    target = Column(String(10), nullable=False)  # report, food, meal or voice – the pipeline it goes to
+    filename = Column(String(255))
+    size = Column(Integer, nullable=False)
+    chunk_size = Column(Integer, nullable=False)
+    sha256 = Column(String(64))  # optional whole-file checksum sent by the client
+    patient_id = Column(Integer, nullable=True)
+    language = Column(String(5), default="en")
+    scan_type = Column(String(20), default="single")
+    webhook_url = Column(String(500))
+    status = Column(String(10), nullable=False, default="open")  # open, finalizing, done, failed
+    result_json = Column(Text)  # the pipeline's response, replayed if /complete is retried
+    created_at = Column(DateTime, default=lambda: datetime.now(timezone.utc))
+    expires_at = Column(DateTime, nullable=False)  # pushed back by every chunk; while finalizing, when the claim goes stale
+
+    __table_args__ = (
+        Index("ix_upload_sessions_expires", "expires_at"),
+    )
+
+
+class UploadChunk(Base):
+    """One verified chunk of an UploadSession; its bytes are already at their offset in the part file."""
+    __tablename__ = "upload_chunks"
+
+    upload_id = Column(String(32), ForeignKey("upload_sessions.id"), primary_key=True)
+    index = Column(Integer, primary_key=True)
+    sha256 = Column(String(64), nullable=False)
+
+
+class HealthStats(Base):
+    """
+    Running totals per user and per patient, kept current on every write by
+    services/health_stats.py so profile reads are one primary-key lookup.
+    Rebuild from the raw tables with `python -m services.health_stats`.
+    """
+    __tablename__ = "health_stats"
+
+    subject_type = Column(String(10), primary_key=True)  # user or patient
+    subject_id = Column(Integer, primary_key=True)
+    report_count = Column(Integer, nullable=False, default=0)
+    food_scan_count = Column(Integer, nullable=False, default=0)
+    voice_session_count = Column(Integer, nullable=False, default=0)
+    risk_assessment_count = Column(Integer, nullable=False, default=0)
+    latest_risk_score = Column(Float)
+    latest_risk_level = Column(String(20))
+    latest_report_at = Column(DateTime)
+    last_activity = Column(DateTime)
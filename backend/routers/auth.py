@@ -3,12 +3,15 @@ import os
 import json
 from datetime import datetime, timedelta, timezone
 from fastapi import APIRouter, Depends, HTTPException, UploadFile, File, Form
-from sqlalchemy.orm import Session
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from database import get_db
-from models import User, MedicalReport, FoodScan, VoiceSession
+from models import User
+from services.health_stats import get_health_stats
+from services.password_hashing import hash_password, verify_password
+from services.user_cache import user_cache, snapshot_user, UserSnapshot
 from config import JWT_SECRET, JWT_ALGORITHM, JWT_EXPIRY_HOURS, PROFILE_PHOTO_DIR
 
-import bcrypt
 from jose import jwt, JWTError
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 
@@ -18,14 +21,6 @@ router = APIRouter(prefix="/api/auth", tags=["Authentication"])
 
 # ── Helper functions ────────────────────────────────────────────────
 
-def hash_password(password: str) -> str:
-    return bcrypt.hashpw(password.encode(), bcrypt.gensalt()).decode()
-
-
-def verify_password(password: str, hashed: str) -> bool:
-    return bcrypt.checkpw(password.encode(), hashed.encode())
-
-
 def create_token(user_id: int) -> str:
     payload = {
         "sub": str(user_id),
@@ -35,41 +30,52 @@ def create_token(user_id: int) -> str:
     return jwt.encode(payload, JWT_SECRET, algorithm=JWT_ALGORITHM)
 
 
-def get_current_user(
-    credentials: HTTPAuthorizationCredentials = Depends(security),
-    db: Session = Depends(get_db)
-) -> User:
-    """Decode JWT token and return current user."""
-    if not credentials:
-        raise HTTPException(status_code=401, detail="Not authenticated")
+async def _authenticate(token: str, db: AsyncSession) -> UserSnapshot | None:
+    """User for a bearer token: from the cache, else verified and loaded once."""
+    cached = user_cache.get(token)
+    if cached:
+        return cached
     try:
-        payload = jwt.decode(credentials.credentials, JWT_SECRET, algorithms=[JWT_ALGORITHM])
+        payload = jwt.decode(token, JWT_SECRET, algorithms=[JWT_ALGORITHM])
         user_id = int(payload.get("sub"))
     except (JWTError, ValueError, TypeError):
         raise HTTPException(status_code=401, detail="Invalid or expired token")
 
-    user = db.query(User).filter(User.id == user_id).first()
+    user = await db.get(User, user_id)
+    if not user:
+        return None
+    snapshot = snapshot_user(user)
+    user_cache.put(token, snapshot, payload["exp"])
+    return snapshot
+
+
+async def get_current_user(
+    credentials: HTTPAuthorizationCredentials = Depends(security),
+    db: AsyncSession = Depends(get_db)
+) -> UserSnapshot:
+    """Decode JWT token and return a read-only snapshot of the current user."""
+    if not credentials:
+        raise HTTPException(status_code=401, detail="Not authenticated")
+    user = await _authenticate(credentials.credentials, db)
     if not user:
         raise HTTPException(status_code=401, detail="User not found")
     return user
 
 
-def get_optional_user(
+async def get_optional_user(
     credentials: HTTPAuthorizationCredentials = Depends(security),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """Try to get current user, return None if not authenticated."""
     if not credentials:
         return None
     try:
-        payload = jwt.decode(credentials.credentials, JWT_SECRET, algorithms=[JWT_ALGORITHM])
-        user_id = int(payload.get("sub"))
-        return db.query(User).filter(User.id == user_id).first()
+        return await _authenticate(credentials.credentials, db)
     except Exception:
         return None
 
 
-def _user_to_dict(user: User) -> dict:
+def _user_to_dict(user: User | UserSnapshot) -> dict:
     return {
         "id": user.id,
         "name": user.name,
@@ -97,26 +103,25 @@ async def register(
     age: int = Form(None),
     gender: str = Form(None),
     blood_group: str = Form(None),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """Register a new user account."""
     # Check if email already exists
-    existing = db.query(User).filter(User.email == email).first()
+    existing = await db.scalar(select(User).where(User.email == email))
     if existing:
         raise HTTPException(status_code=400, detail="Email already registered")
 
     user = User(
         name=name,
         email=email,
-        password_hash=hash_password(password),
+        password_hash=await hash_password(password),
         phone=phone,
         age=age,
         gender=gender,
         blood_group=blood_group,
     )
     db.add(user)
-    db.commit()
-    db.refresh(user)
+    await db.commit()
 
     token = create_token(user.id)
     return {
@@ -130,11 +135,11 @@ async def register(
 async def login(
     email: str = Form(...),
     password: str = Form(...),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """Login with email and password."""
-    user = db.query(User).filter(User.email == email).first()
-    if not user or not verify_password(password, user.password_hash):
+    user = await db.scalar(select(User).where(User.email == email))
+    if not user or not await verify_password(password, user.password_hash):
         raise HTTPException(status_code=401, detail="Invalid email or password")
 
     token = create_token(user.id)
@@ -146,25 +151,19 @@ async def login(
 
 
 @router.get("/me")
-async def get_profile(user: User = Depends(get_current_user), db: Session = Depends(get_db)):
+async def get_profile(user: UserSnapshot = Depends(get_current_user), db: AsyncSession = Depends(get_db)):
     """Get current user profile with health data summary."""
-    # Gather health stats
-    report_count = db.query(MedicalReport).filter(MedicalReport.user_id == user.id).count()
-    scan_count = db.query(FoodScan).filter(FoodScan.user_id == user.id).count()
-    voice_count = db.query(VoiceSession).filter(VoiceSession.user_id == user.id).count()
-
-    # Latest risk score
-    latest_report = db.query(MedicalReport).filter(
-        MedicalReport.user_id == user.id
-    ).order_by(MedicalReport.created_at.desc()).first()
+    stats = await get_health_stats(db, "user", user.id)  # one primary-key lookup
 
     profile = _user_to_dict(user)
     profile["health_stats"] = {
-        "total_reports": report_count,
-        "total_food_scans": scan_count,
-        "total_voice_sessions": voice_count,
-        "latest_risk_score": latest_report.risk_score if latest_report else None,
-        "latest_risk_level": latest_report.risk_level if latest_report else None,
+        "total_reports": stats["report_count"],
+        "total_food_scans": stats["food_scan_count"],
+        "total_voice_sessions": stats["voice_session_count"],
+        "total_risk_assessments": stats["risk_assessment_count"],
+        "latest_risk_score": stats["latest_risk_score"],
+        "latest_risk_level": stats["latest_risk_level"],
+        "last_activity": stats["last_activity"].isoformat() if stats["last_activity"] else None,
     }
     return profile
 
@@ -179,10 +178,13 @@ async def update_profile(
     medical_conditions: str = Form(None),
     allergies: str = Form(None),
     emergency_contact: str = Form(None),
-    user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    current: UserSnapshot = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db)
 ):
     """Update user profile fields."""
+    user = await db.get(User, current.id)
+    if not user:
+        raise HTTPException(status_code=401, detail="User not found")
     if name:
         user.name = name
     if phone is not None:
@@ -200,18 +202,21 @@ async def update_profile(
     if emergency_contact is not None:
         user.emergency_contact = emergency_contact
 
-    db.commit()
-    db.refresh(user)
+    await db.commit()
+    user_cache.invalidate_user(user.id)
     return {"user": _user_to_dict(user), "message": "Profile updated successfully"}
 
 
 @router.post("/upload-photo")
 async def upload_profile_photo(
     file: UploadFile = File(...),
-    user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    current: UserSnapshot = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db)
 ):
     """Upload/update profile photo."""
+    user = await db.get(User, current.id)
+    if not user:
+        raise HTTPException(status_code=401, detail="User not found")
     # Delete old photo
     if user.profile_photo and os.path.exists(user.profile_photo):
         os.remove(user.profile_photo)
@@ -226,8 +231,8 @@ async def upload_profile_photo(
         f.write(content)
 
     user.profile_photo = file_path
-    db.commit()
-    db.refresh(user)
+    await db.commit()
+    user_cache.invalidate_user(user.id)
 
     return {
         "profile_photo": f"/uploads/profiles/{filename}",
@@ -1,21 +1,82 @@
 """HealthMitra Scan – Food Scanner Router"""
-import os
 import json
+import asyncio
 import logging
 import traceback
-import asyncio
-from concurrent.futures import ThreadPoolExecutor
 from fastapi import APIRouter, UploadFile, File, Depends, Form, HTTPException
-from sqlalchemy.orm import Session
-from database import get_db, SessionLocal
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from database import get_db, AsyncSessionLocal
 from models import FoodScan, HealthTimeline
-from services.food_detector import detect_food
-from config import UPLOAD_DIR
+from services.food_detector import detect_food, detect_food_batch
+from services.inference_pool import run_inference
+from services.media import persist_upload
+from services.image_preprocess import prepare_for_yolo
+from services.pagination import keyset_page, page_response
+from config import FOOD_BATCH_MAX_FILES
 
 logger = logging.getLogger(__name__)
 router = APIRouter(prefix="/api/food", tags=["Food Scanner"])
 
-_pool = ThreadPoolExecutor(max_workers=2)
+
+async def scan_food_image(source: bytes | str, file_path: str | None, patient_id: int | None,
+                          scan_type: str = "single") -> dict:
+    """Detect foods in an image (bytes, or a path to it) and save the scan with its timeline entry."""
+    image = await run_inference(prepare_for_yolo, source)
+    result = await run_inference(detect_food, image, scan_type)
+
+    async with AsyncSessionLocal() as db:
+        scan = FoodScan(
+            patient_id=patient_id,
+            image_path=file_path,
+            detected_foods=json.dumps(result["detected_foods"]),
+            nutrition_info=json.dumps(result["nutrition"]),
+            warnings=json.dumps(result["warnings"]),
+            scan_type=scan_type
+        )
+        db.add(scan)
+        await db.flush()  # assigns the scan id for the timeline entry
+
+        food_names = ", ".join([f["name"] for f in result["detected_foods"]])
+        timeline_entry = HealthTimeline(
+            patient_id=patient_id,
+            event_type="scan",
+            title=f"Food Scan: {food_names}",
+            description=f"Total calories: {result['nutrition']['calories']} kcal",
+            data_json=json.dumps({"scan_id": scan.id})
+        )
+        db.add(timeline_entry)
+        await db.commit()
+
+    return result
+
+
+async def scan_meal_image(source: bytes | str, file_path: str | None, patient_id: int | None) -> dict:
+    """Detect every item on a meal plate (image bytes or path), save the scan and score the meal."""
+    image = await run_inference(prepare_for_yolo, source)
+    result = await run_inference(detect_food, image, "meal")
+
+    safe_foods = [f for f in result["detected_foods"] if f["is_safe"]]
+    unsafe_foods = [f for f in result["detected_foods"] if not f["is_safe"]]
+
+    async with AsyncSessionLocal() as db:
+        scan = FoodScan(
+            patient_id=patient_id,
+            image_path=file_path,
+            detected_foods=json.dumps(result["detected_foods"]),
+            nutrition_info=json.dumps(result["nutrition"]),
+            warnings=json.dumps(result["warnings"]),
+            scan_type="meal"
+        )
+        db.add(scan)
+        await db.commit()
+
+    return {
+        **result,
+        "safe_foods": safe_foods,
+        "unsafe_foods": unsafe_foods,
+        "meal_score": round((len(safe_foods) / max(len(result["detected_foods"]), 1)) * 100)
+    }
 
 
 @router.post("/scan")
@@ -26,43 +87,9 @@ async def scan_food(
 ):
     """Scan food image using YOLOv8 to detect Indian food items and nutrition."""
     try:
-        file_path = os.path.join(UPLOAD_DIR, f"food_{file.filename}")
-        os.makedirs(UPLOAD_DIR, exist_ok=True)
-        with open(file_path, "wb") as f:
-            content = await file.read()
-            f.write(content)
-
-        loop = asyncio.get_event_loop()
-        result = await loop.run_in_executor(_pool, detect_food, file_path, scan_type)
-
-        db = SessionLocal()
-        try:
-            scan = FoodScan(
-                patient_id=patient_id,
-                image_path=file_path,
-                detected_foods=json.dumps(result["detected_foods"]),
-                nutrition_info=json.dumps(result["nutrition"]),
-                warnings=json.dumps(result["warnings"]),
-                scan_type=scan_type
-            )
-            db.add(scan)
-            db.commit()
-            db.refresh(scan)
-
-            food_names = ", ".join([f["name"] for f in result["detected_foods"]])
-            timeline_entry = HealthTimeline(
-                patient_id=patient_id,
-                event_type="scan",
-                title=f"Food Scan: {food_names}",
-                description=f"Total calories: {result['nutrition']['calories']} kcal",
-                data_json=json.dumps({"scan_id": scan.id})
-            )
-            db.add(timeline_entry)
-            db.commit()
-        finally:
-            db.close()
-
-        return result
+        content = await file.read()
+        file_path = persist_upload(content, file.filename, "food_")
+        return await scan_food_image(content, file_path, patient_id, scan_type)
 
     except Exception as e:
         logger.error(f"Food scan failed: {e}")
@@ -70,6 +97,71 @@ async def scan_food(
         raise HTTPException(status_code=500, detail=f"Food scan failed: {str(e)}")
 
 
+@router.post("/scan-batch")
+async def scan_food_batch(
+    files: list[UploadFile] = File(...),
+    patient_id: int = Form(None),
+    scan_type: str = Form("single"),
+):
+    """Scan many food images in one request; YOLOv8 runs on them in batches."""
+    if len(files) > FOOD_BATCH_MAX_FILES:
+        raise HTTPException(status_code=400, detail=f"At most {FOOD_BATCH_MAX_FILES} images per batch")
+
+    try:
+        contents = [await file.read() for file in files]
+        # Index prefix keeps same-named photos from different phones apart
+        file_paths = [
+            persist_upload(content, file.filename, f"food_{index}_")
+            for index, (file, content) in enumerate(zip(files, contents))
+        ]
+
+        images = await asyncio.gather(*(run_inference(prepare_for_yolo, content) for content in contents))
+        results = await run_inference(detect_food_batch, list(images), scan_type)
+
+        # One transaction for the whole batch: all scans and timeline entries or none
+        async with AsyncSessionLocal() as db:
+            scans = [
+                FoodScan(
+                    patient_id=patient_id,
+                    image_path=file_path,
+                    detected_foods=json.dumps(result["detected_foods"]),
+                    nutrition_info=json.dumps(result["nutrition"]),
+                    warnings=json.dumps(result["warnings"]),
+                    scan_type=scan_type
+                )
+                for file_path, result in zip(file_paths, results)
+            ]
+            db.add_all(scans)
+            await db.flush()  # assigns scan ids for the timeline entries
+
+            db.add_all([
+                HealthTimeline(
+                    patient_id=patient_id,
+                    event_type="scan",
+                    title=f"Food Scan: {', '.join(f['name'] for f in result['detected_foods'])}",
+                    description=f"Total calories: {result['nutrition']['calories']} kcal",
+                    data_json=json.dumps({"scan_id": scan.id})
+                )
+                for scan, result in zip(scans, results)
+            ])
+            await db.commit()  # leaving the block without committing rolls everything back
+            scan_ids = [scan.id for scan in scans]
+
+        return {
+            "results": [
+                {"filename": file.filename, "scan_id": scan_id, **result}
+                for file, scan_id, result in zip(files, scan_ids, results)
+            ],
+            "total_images": len(results),
+            "total_calories": sum(result["nutrition"]["calories"] for result in results)
+        }
+
+    except Exception as e:
+        logger.error(f"Food batch scan failed: {e}")
+        logger.error(traceback.format_exc())
+        raise HTTPException(status_code=500, detail=f"Food batch scan failed: {str(e)}")
+
+
 @router.post("/meal")
 async def scan_meal(
     file: UploadFile = File(...),
@@ -77,39 +169,9 @@ async def scan_meal(
 ):
     """Scan a meal plate to detect multiple food items and analyze the full meal."""
     try:
-        file_path = os.path.join(UPLOAD_DIR, f"meal_{file.filename}")
-        os.makedirs(UPLOAD_DIR, exist_ok=True)
-        with open(file_path, "wb") as f:
-            content = await file.read()
-            f.write(content)
-
-        loop = asyncio.get_event_loop()
-        result = await loop.run_in_executor(_pool, detect_food, file_path, "meal")
-
-        safe_foods = [f for f in result["detected_foods"] if f["is_safe"]]
-        unsafe_foods = [f for f in result["detected_foods"] if not f["is_safe"]]
-
-        db = SessionLocal()
-        try:
-            scan = FoodScan(
-                patient_id=patient_id,
-                image_path=file_path,
-                detected_foods=json.dumps(result["detected_foods"]),
-                nutrition_info=json.dumps(result["nutrition"]),
-                warnings=json.dumps(result["warnings"]),
-                scan_type="meal"
-            )
-            db.add(scan)
-            db.commit()
-        finally:
-            db.close()
-
-        return {
-            **result,
-            "safe_foods": safe_foods,
-            "unsafe_foods": unsafe_foods,
-            "meal_score": round((len(safe_foods) / max(len(result["detected_foods"]), 1)) * 100)
-        }
+        content = await file.read()
+        file_path = persist_upload(content, file.filename, "meal_")
+        return await scan_meal_image(content, file_path, patient_id)
 
     except Exception as e:
         logger.error(f"Meal scan failed: {e}")
@@ -118,17 +180,18 @@ async def scan_meal(
 
 
 @router.get("/history")
-def get_food_history(patient_id: int = None, db: Session = Depends(get_db)):
-    """Get food scan history."""
-    query = db.query(FoodScan)
+async def get_food_history(patient_id: int = None, cursor: str = None, limit: int = 30,
+                           db: AsyncSession = Depends(get_db)):
+    """Get food scan history, newest first. Pass `next_cursor` back as `cursor` for the next page."""
+    stmt = select(FoodScan)
     if patient_id:
-        query = query.filter(FoodScan.patient_id == patient_id)
-    scans = query.order_by(FoodScan.created_at.desc()).limit(30).all()
+        stmt = stmt.where(FoodScan.patient_id == patient_id)
+    scans, next_cursor = await keyset_page(db, stmt, FoodScan, cursor, limit)
 
-    return [{
+    return page_response([{
         "id": s.id,
         "detected_foods": json.loads(s.detected_foods) if s.detected_foods else [],
         "nutrition_info": json.loads(s.nutrition_info) if s.nutrition_info else {},
         "scan_type": s.scan_type,
         "created_at": s.created_at.isoformat() if s.created_at else None
-    } for s in scans]
+    } for s in scans], next_cursor)
@@ -1,21 +1,23 @@
 """HealthMitra Scan – Patient Management Router"""
 import json
 from fastapi import APIRouter, Depends
-from sqlalchemy.orm import Session
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from database import get_db
-from models import Patient, MedicalReport, HealthTimeline
+from models import Patient, HealthTimeline
 from schemas import PatientCreate
+from services.pagination import keyset_page, page_response
+from services.patient_summary import patient_summaries, patient_summary
 
 router = APIRouter(prefix="/api/patients", tags=["Patients"])
 
 
 @router.post("/create")
-def create_patient(patient: PatientCreate, db: Session = Depends(get_db)):
+async def create_patient(patient: PatientCreate, db: AsyncSession = Depends(get_db)):
     """Create a new patient profile (for rural ASHA worker mode)."""
     db_patient = Patient(**patient.model_dump())
     db.add(db_patient)
-    db.commit()
-    db.refresh(db_patient)
+    await db.commit()
     return {
         "id": db_patient.id,
         "name": db_patient.name,
@@ -28,37 +30,38 @@ def create_patient(patient: PatientCreate, db: Session = Depends(get_db)):
 
 
 @router.get("/list")
-def list_patients(asha_worker_id: str = None, db: Session = Depends(get_db)):
-    """List all patients, optionally filtered by ASHA worker."""
-    query = db.query(Patient)
+async def list_patients(asha_worker_id: str = None, cursor: str = None, limit: int = 50,
+                        db: AsyncSession = Depends(get_db)):
+    """List patients, newest first, optionally filtered by ASHA worker. Pass `next_cursor` back as `cursor` for the next page."""
+    stmt = select(Patient)
     if asha_worker_id:
-        query = query.filter(Patient.asha_worker_id == asha_worker_id)
-    patients = query.order_by(Patient.created_at.desc()).all()
+        stmt = stmt.where(Patient.asha_worker_id == asha_worker_id)
+    patients, next_cursor = await keyset_page(db, stmt, Patient, cursor, limit)
+    summaries = await patient_summaries(db, [p.id for p in patients])
 
-    return [{
+    return page_response([{
         "id": p.id,
         "name": p.name,
         "age": p.age,
         "gender": p.gender,
         "blood_group": p.blood_group,
         "village": p.village,
-        "report_count": len(p.reports)
-    } for p in patients]
+        **summaries[p.id]
+    } for p in patients], next_cursor)
 
 
 @router.get("/{patient_id}")
-def get_patient(patient_id: int, db: Session = Depends(get_db)):
+async def get_patient(patient_id: int, db: AsyncSession = Depends(get_db)):
     """Get patient details with health summary."""
-    patient = db.query(Patient).filter(Patient.id == patient_id).first()
+    patient = await db.get(Patient, patient_id)
     if not patient:
         return {"error": "Patient not found"}
 
-    reports = db.query(MedicalReport).filter(MedicalReport.patient_id == patient_id).all()
-    timeline = db.query(HealthTimeline).filter(
-        HealthTimeline.patient_id == patient_id
-    ).order_by(HealthTimeline.created_at.desc()).limit(20).all()
-
-    avg_risk = sum(r.risk_score for r in reports if r.risk_score) / max(len(reports), 1)
+    summary = await patient_summary(db, patient_id)
+    timeline = (await db.scalars(
+        select(HealthTimeline).where(HealthTimeline.patient_id == patient_id)
+        .order_by(HealthTimeline.created_at.desc()).limit(20)
+    )).all()
 
     return {
         "id": patient.id,
@@ -68,8 +71,7 @@ def get_patient(patient_id: int, db: Session = Depends(get_db)):
         "blood_group": patient.blood_group,
         "village": patient.village,
         "phone": patient.phone,
-        "report_count": len(reports),
-        "avg_risk_score": round(avg_risk, 1),
+        **summary,
         "timeline": [{
             "id": t.id,
             "event_type": t.event_type,
@@ -82,13 +84,13 @@ def get_patient(patient_id: int, db: Session = Depends(get_db)):
 
 
 @router.get("/timeline/{patient_id}")
-def get_patient_timeline(patient_id: int, db: Session = Depends(get_db)):
-    """Get health timeline for a patient."""
-    timeline = db.query(HealthTimeline).filter(
-        HealthTimeline.patient_id == patient_id
-    ).order_by(HealthTimeline.created_at.desc()).limit(50).all()
+async def get_patient_timeline(patient_id: int, cursor: str = None, limit: int = 50,
+                               db: AsyncSession = Depends(get_db)):
+    """Get health timeline for a patient, newest first. Pass `next_cursor` back as `cursor` for the next page."""
+    stmt = select(HealthTimeline).where(HealthTimeline.patient_id == patient_id)
+    timeline, next_cursor = await keyset_page(db, stmt, HealthTimeline, cursor, limit)
 
-    return [{
+    return page_response([{
         "id": t.id,
         "event_type": t.event_type,
         "title": t.title,
@@ -96,4 +98,4 @@ def get_patient_timeline(patient_id: int, db: Session = Depends(get_db)):
         "risk_score": t.risk_score,
         "data": json.loads(t.data_json) if t.data_json else {},
         "created_at": t.created_at.isoformat() if t.created_at else None
-    } for t in timeline]
+    } for t in timeline], next_cursor)
@@ -4,21 +4,64 @@ import json
 import logging
 import traceback
 import asyncio
-from concurrent.futures import ThreadPoolExecutor
 from fastapi import APIRouter, UploadFile, File, Depends, Form, HTTPException
-from sqlalchemy.orm import Session
-from database import get_db, SessionLocal
-from models import MedicalReport, HealthTimeline
-from services.ocr_service import extract_text_from_file
-from services.llm_service import explain_report
-from services.alert_service import check_emergency_from_text
-from config import UPLOAD_DIR
+from fastapi.responses import StreamingResponse, JSONResponse
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from database import get_db, AsyncSessionLocal
+from models import MedicalReport, ReportJob
+from services.ocr_service import (
+    TESSERACT_AVAILABLE, PDF_SUPPORT, extract_text_from_file, extract_text_from_image_bytes, lookup_ocr_cache,
+    build_ocr_result, simulated_ocr_result, get_pdf_page_count, get_page_pool, analyze_pdf_page,
+)
+from services.ocr_cache import ocr_cache
+from services.report_pipeline import submit_explanations, new_report, report_timeline_entry, report_response
+from services.inference_pool import run_inference
+from services.media import upload_path, save_upload, persist_upload
+from services.pagination import keyset_page, page_response
+from services.report_jobs import submit_report_job, job_status, job_result
 
 logger = logging.getLogger(__name__)
 router = APIRouter(prefix="/api/reports", tags=["Medical Reports"])
 
-# Thread pool for blocking OCR / LLM calls
-_pool = ThreadPoolExecutor(max_workers=2)
+
+async def _receive_upload(file: UploadFile) -> tuple[str | None, bytes]:
+    """
+    Read an upload into memory. PDFs are written to UPLOAD_DIR first, since
+    pdf2image and the page workers read from a path; images are OCR'd from
+    the bytes and their original is persisted in the background.
+    Returns (file_path or None, content).
+    """
+    content = await file.read()
+    if os.path.splitext(file.filename or "")[1].lower() == ".pdf":
+        file_path = upload_path(file.filename)
+        await save_upload(content, file_path)
+        return file_path, content
+    persist_upload(content, file.filename)
+    return None, content
+
+
+async def _run_ocr(file_path: str | None, content: bytes) -> dict:
+    if file_path:
+        return await run_inference(extract_text_from_file, file_path)
+    return await run_inference(extract_text_from_image_bytes, content)
+
+
+async def _explain_and_save(ocr_result: dict, filename: str, patient_id: int | None) -> dict:
+    """Post-OCR stages of the report pipeline: explain, check for emergencies, persist."""
+    emergency, explain_en, explain_hi = submit_explanations(ocr_result)
+    explanation_en, explanation_hi = await asyncio.gather(asyncio.wrap_future(explain_en),
+                                                          asyncio.wrap_future(explain_hi))
+
+    # Save to database — use a FRESH session after the long blocking calls
+    async with AsyncSessionLocal() as db:
+        report = new_report(ocr_result, filename, patient_id, explanation_en, explanation_hi, emergency)
+        db.add(report)
+        await db.flush()  # assigns the report id for the timeline entry
+        db.add(report_timeline_entry(report))
+        await db.commit()
+
+    return report_response(report, ocr_result, emergency)
 
 
 @router.post("/upload")
@@ -29,76 +72,14 @@ async def upload_report(
 ):
     """Upload a medical report (PDF/image), extract text via OCR, and explain it."""
     try:
-        # Save uploaded file
-        os.makedirs(UPLOAD_DIR, exist_ok=True)
-        file_path = os.path.join(UPLOAD_DIR, file.filename)
-        with open(file_path, "wb") as f:
-            content = await file.read()
-            f.write(content)
-
-        loop = asyncio.get_event_loop()
+        file_path, content = await _receive_upload(file)
 
-        # OCR extraction (blocking → run in thread)
-        ocr_result = await loop.run_in_executor(_pool, extract_text_from_file, file_path)
+        # Stage 1: OCR extraction – everything else depends on its text
+        ocr_result = await _run_ocr(file_path, content)
         logger.info(f"OCR done: {len(ocr_result.get('ocr_text', ''))} chars, risk={ocr_result.get('risk_level')}")
 
-        # LLM explanation in both languages (blocking → run in thread)
-        explanation_en = await loop.run_in_executor(
-            _pool, explain_report, ocr_result["ocr_text"], ocr_result["risk_level"], "en"
-        )
-        explanation_hi = await loop.run_in_executor(
-            _pool, explain_report, ocr_result["ocr_text"], ocr_result["risk_level"], "hi"
-        )
-
-        # Emergency check
-        emergency = await loop.run_in_executor(
-            _pool, check_emergency_from_text, ocr_result["ocr_text"]
-        )
-
-        # Save to database — use a FRESH session after the long blocking calls
-        db = SessionLocal()
-        try:
-            report = MedicalReport(
-                patient_id=patient_id,
-                filename=file.filename,
-                ocr_text=ocr_result["ocr_text"],
-                explanation_en=explanation_en,
-                explanation_hi=explanation_hi,
-                risk_score=ocr_result["risk_score"],
-                risk_level=ocr_result["risk_level"],
-                critical_alerts=json.dumps(emergency["alerts"]) if emergency["alerts"] else None
-            )
-            db.add(report)
-            db.commit()
-            db.refresh(report)
-
-            # Add to health timeline
-            timeline_entry = HealthTimeline(
-                patient_id=patient_id,
-                event_type="report",
-                title=f"Medical Report: {file.filename}",
-                description=f"Risk Score: {ocr_result['risk_score']}% ({ocr_result['risk_level']})",
-                risk_score=ocr_result["risk_score"],
-                data_json=json.dumps({"report_id": report.id})
-            )
-            db.add(timeline_entry)
-            db.commit()
-
-            report_id = report.id
-        finally:
-            db.close()
-
-        return {
-            "id": report_id,
-            "filename": file.filename,
-            "ocr_text": ocr_result["ocr_text"],
-            "explanation_en": explanation_en,
-            "explanation_hi": explanation_hi,
-            "risk_score": ocr_result["risk_score"],
-            "risk_level": ocr_result["risk_level"],
-            "emergency": emergency,
-            "ocr_confidence": ocr_result["confidence"]
-        }
+        # Stage 2: explanations + emergency scan in parallel, then persist
+        return await _explain_and_save(ocr_result, file.filename, patient_id)
 
     except Exception as e:
         logger.error(f"Report upload failed: {e}")
@@ -106,27 +87,174 @@ async def upload_report(
         raise HTTPException(status_code=500, detail=f"Report processing failed: {str(e)}")
 
 
+def _ndjson(event: dict) -> str:
+    return json.dumps(event, ensure_ascii=False) + "\n"
+
+
+async def _ocr_page(pool, file_path: str, page_number: int) -> dict:
+    """OCR one PDF page in the page pool; a page that fails comes back empty, as /upload treats it."""
+    try:
+        return await asyncio.get_running_loop().run_in_executor(pool, analyze_pdf_page, file_path, page_number)
+    except Exception as e:
+        logger.error(f"OCR of PDF page {page_number} failed: {e}")
+        return {"page": page_number, "text": "", "findings": [], "error": str(e)}
+
+
+async def _stream_report(file_path: str | None, content: bytes, filename: str, patient_id: int | None):
+    """Yield NDJSON events: one per OCR'd page as it finishes, then the full result."""
+    try:
+        is_pdf = file_path is not None
+        ocr_result = None
+        cache_key = None
+
+        if is_pdf and TESSERACT_AVAILABLE and PDF_SUPPORT:
+            cache_key, ocr_result = await run_inference(lookup_ocr_cache, file_path)
+
+        if ocr_result is None and is_pdf and TESSERACT_AVAILABLE and PDF_SUPPORT:
+            try:
+                page_count = await run_inference(get_pdf_page_count, file_path)
+            except Exception as e:
+                logger.error(f"OCR PDF extraction error: {e}")
+                page_count = 0  # no text, so the simulated fallback applies as in /upload
+            yield _ndjson({"type": "start", "filename": filename, "pages": page_count})
+
+            # Each page is rendered and OCR'd in its own worker process;
+            # pages are sent in completion order, not page order
+            pool = get_page_pool()
+            pending = [asyncio.ensure_future(_ocr_page(pool, file_path, n)) for n in range(1, page_count + 1)]
+            page_texts, failed_pages = {}, 0
+            try:
+                for next_page in asyncio.as_completed(pending):
+                    page = await next_page
+                    page_texts[page["page"]] = page["text"]
+                    failed_pages += "error" in page
+                    yield _ndjson({"type": "page", **page})
+            finally:
+                for task in pending:
+                    task.cancel()  # after an error or a client disconnect; pages not yet started never run
+
+            ocr_text = "\n\n".join(page_texts[n] for n in sorted(page_texts))
+            ocr_result = build_ocr_result(ocr_text)
+            if ocr_result and cache_key and not failed_pages:  # a partial read is not cached
+                await run_inference(ocr_cache.put, cache_key, ocr_result)
+            elif ocr_result is None:
+                logger.warning("OCR returned very little text, falling back to simulated data")
+                ocr_result = simulated_ocr_result()
+        else:
+            # Images, cache hits and simulated OCR produce a single "page"
+            if ocr_result is None:
+                ocr_result = await _run_ocr(file_path, content)
+            yield _ndjson({"type": "start", "filename": filename, "pages": 1})
+            yield _ndjson({
+                "type": "page",
+                "page": 1,
+                "text": ocr_result["ocr_text"],
+                "findings": ocr_result.get("medical_findings", []),
+            })
+
+        yield _ndjson({
+            "type": "ocr_complete",
+            "risk_score": ocr_result["risk_score"],
+            "risk_level": ocr_result["risk_level"],
+            "ocr_confidence": ocr_result["confidence"],
+            "source": ocr_result.get("source"),
+        })
+
+        result = await _explain_and_save(ocr_result, filename, patient_id)
+        yield _ndjson({"type": "complete", **result})
+
+    except Exception as e:
+        logger.error(f"Streamed report upload failed: {e}")
+        logger.error(traceback.format_exc())
+        yield _ndjson({"type": "error", "detail": f"Report processing failed: {str(e)}"})
+
+
+@router.post("/upload-stream")
+async def upload_report_stream(
+    file: UploadFile = File(...),
+    patient_id: int = Form(None),
+    language: str = Form("en"),
+):
+    """
+    Same pipeline as /upload, but streams newline-delimited JSON so each PDF
+    page's text and findings reach the client as soon as that page is OCR'd.
+    """
+    file_path, content = await _receive_upload(file)
+
+    return StreamingResponse(
+        _stream_report(file_path, content, file.filename, patient_id),
+        media_type="application/x-ndjson"
+    )
+
+
+# ── Background jobs ─────────────────────────────────────────────────
+@router.post("/jobs", status_code=202)
+async def submit_report(
+    file: UploadFile = File(...),
+    patient_id: int = Form(None),
+    webhook_url: str = Form(None),
+    db: AsyncSession = Depends(get_db)
+):
+    """
+    Queue a report for background processing and return its job id at once.
+    Poll `status_url` / `result_url`, or pass `webhook_url` to be POSTed the
+    outcome. Re-uploading the same file for the same patient returns the
+    existing job (retrying it if it failed), so clients can safely resubmit
+    after a dropped connection.
+    """
+    if webhook_url and not webhook_url.startswith(("http://", "https://")):
+        raise HTTPException(status_code=400, detail="webhook_url must be an http(s) URL")
+    content = await file.read()
+    job, created = await submit_report_job(db, content, file.filename, patient_id, webhook_url)
+    return {**job_status(job), "duplicate": not created}
+
+
+async def _get_job(db: AsyncSession, job_id: str) -> ReportJob:
+    job = await db.get(ReportJob, job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return job
+
+
+@router.get("/jobs/{job_id}")
+async def get_job_status(job_id: str, db: AsyncSession = Depends(get_db)):
+    """Status of a background report job: queued, running, done or failed."""
+    return job_status(await _get_job(db, job_id))
+
+
+@router.get("/jobs/{job_id}/result")
+async def get_job_result(job_id: str, db: AsyncSession = Depends(get_db)):
+    """The same body /upload returns once the job is done; 202 with the status while it is still pending."""
+    job = await _get_job(db, job_id)
+    if job.status == "done":
+        return job_result(job)
+    if job.status == "failed":
+        raise HTTPException(status_code=500, detail=f"Report processing failed: {job.error}")
+    return JSONResponse(status_code=202, content=job_status(job))
+
+
 @router.get("/history")
-def get_report_history(patient_id: int = None, db: Session = Depends(get_db)):
-    """Get report history, optionally filtered by patient."""
-    query = db.query(MedicalReport)
+async def get_report_history(patient_id: int = None, cursor: str = None, limit: int = 50,
+                             db: AsyncSession = Depends(get_db)):
+    """Get report history, optionally filtered by patient. Pass `next_cursor` back as `cursor` for the next page."""
+    stmt = select(MedicalReport)
     if patient_id:
-        query = query.filter(MedicalReport.patient_id == patient_id)
-    reports = query.order_by(MedicalReport.created_at.desc()).limit(50).all()
+        stmt = stmt.where(MedicalReport.patient_id == patient_id)
+    reports, next_cursor = await keyset_page(db, stmt, MedicalReport, cursor, limit)
 
-    return [{
+    return page_response([{
         "id": r.id,
         "filename": r.filename,
         "risk_score": r.risk_score,
         "risk_level": r.risk_level,
         "created_at": r.created_at.isoformat() if r.created_at else None
-    } for r in reports]
+    } for r in reports], next_cursor)
 
 
 @router.get("/{report_id}")
-def get_report(report_id: int, db: Session = Depends(get_db)):
+async def get_report(report_id: int, db: AsyncSession = Depends(get_db)):
     """Get a specific report by ID."""
-    report = db.query(MedicalReport).filter(MedicalReport.id == report_id).first()
+    report = await db.get(MedicalReport, report_id)
     if not report:
         return {"error": "Report not found"}
 
@@ -1,18 +1,34 @@
 """HealthMitra Scan – Risk Predictor Router"""
-from fastapi import APIRouter, Depends
-from sqlalchemy.orm import Session
-from database import get_db
+import io
+import csv
+import json
+import time
+import logging
+import tempfile
+from datetime import datetime, timezone
+from fastapi import APIRouter, Depends, Request, HTTPException, Query, UploadFile
+from fastapi.responses import StreamingResponse
+from pydantic import TypeAdapter, ValidationError
+from sqlalchemy import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+from database import get_db, SessionLocal
 from models import HealthTimeline
 from schemas import VitalsInput
 from services.risk_engine import predict_risks
+from services.risk_batch import to_columns, score_columns, rows_view, columns_view, summarize, recommendation_texts
 from services.alert_service import check_emergency_from_vitals
-import json
+from services.health_stats import record_inserts
+from services.rules import get_rules, reload_rules
+from services.vitals_import import FORMATS, detect_format, iter_record_chunks, assess_chunk
+from services.inference_pool import run_inference
+from config import RISK_BATCH_MAX_ROWS, IMPORT_CHUNK_ROWS, IMPORT_SPOOL_MAX_MB
 
+logger = logging.getLogger(__name__)
 router = APIRouter(prefix="/api/risk", tags=["Risk Predictor"])
 
 
 @router.post("/predict")
-def predict_risk(vitals: VitalsInput, patient_id: int = None, db: Session = Depends(get_db)):
+async def predict_risk(vitals: VitalsInput, patient_id: int = None, db: AsyncSession = Depends(get_db)):
     """Predict diabetes and heart disease risk based on vitals."""
     vitals_dict = vitals.model_dump()
     result = predict_risks(vitals_dict)
@@ -29,9 +45,209 @@ def predict_risk(vitals: VitalsInput, patient_id: int = None, db: Session = Depe
             data_json=json.dumps(result)
         )
         db.add(timeline_entry)
-        db.commit()
+        await db.commit()
 
     return {
         **result,
         "emergency": emergency
     }
+
+
+# ── Population screening (batch) ────────────────────────────────────
+_vitals_list = TypeAdapter(list[VitalsInput])
+
+
+def _rows_from_csv(text: str) -> list:
+    """CSV with a header of VitalsInput field names; blank cells mean 'not measured'."""
+    return [
+        {key.strip(): value.strip() for key, value in row.items() if key and value and value.strip()}
+        for row in csv.DictReader(io.StringIO(text))
+    ]
+
+
+def _score_batch(rows: list, layout: str) -> dict:
+    try:
+        vitals = [v.model_dump() for v in _vitals_list.validate_python(rows)]
+    except ValidationError as e:
+        raise HTTPException(status_code=422, detail=e.errors(include_url=False, include_input=False)[:20])
+    rules = get_rules()
+    scored = score_columns(to_columns(vitals, rules), rules)
+    return {
+        "total": len(vitals),
+        "summary": summarize(scored),
+        "results": columns_view(scored) if layout == "columns" else rows_view(scored),
+        "recommendations": recommendation_texts(scored)
+    }
+
+
+@router.post("/predict-batch")
+async def predict_risk_batch(request: Request, layout: str = "rows"):
+    """
+    Score many people at once with the vectorized engine. Send a JSON array of
+    VitalsInput objects, a CSV body (Content-Type: text/csv), or a CSV file as
+    multipart field `file`. Results are in input order, as one object per row
+    or (layout=columns) one list per field; recommendation codes are mapped
+    to text once in `recommendations`.
+    """
+    content_type = request.headers.get("content-type", "")
+    if content_type.startswith("multipart/form-data"):
+        form = await request.form()
+        upload = form.get("file")
+        if upload is None or isinstance(upload, str):
+            raise HTTPException(status_code=400, detail="Upload the CSV as form field 'file'")
+        rows = _rows_from_csv((await upload.read()).decode("utf-8-sig"))
+    elif "csv" in content_type:
+        rows = _rows_from_csv((await request.body()).decode("utf-8-sig"))
+    else:
+        try:
+            rows = await request.json()
+        except ValueError:
+            raise HTTPException(status_code=400, detail="Body must be a JSON array or CSV")
+        if not isinstance(rows, list):
+            raise HTTPException(status_code=400, detail="Body must be a JSON array of vitals")
+
+    if len(rows) > RISK_BATCH_MAX_ROWS:
+        raise HTTPException(status_code=413, detail=f"At most {RISK_BATCH_MAX_ROWS} rows per batch")
+
+    return await run_inference(_score_batch, rows, layout)
+
+
+# ── Bulk import (streaming) ─────────────────────────────────────────
+MAX_REPORTED_INVALID = 100  # further bad rows are only counted
+
+
+def _ndjson(event: dict) -> str:
+    return json.dumps(event, ensure_ascii=False) + "\n"
+
+
+def _save_assessments(assessed: list) -> int:
+    """One executemany INSERT for the chunk's timeline rows (people with a patient_id)."""
+    saved_at = datetime.now(timezone.utc)
+    entries = [
+        {
+            "patient_id": patient_id,
+            "event_type": "vitals",
+            "title": "Health Risk Assessment",
+            "description": f"Diabetes: {result['diabetes_risk']}% | Heart: {result['heart_risk']}%",
+            "risk_score": (result["diabetes_risk"] + result["heart_risk"]) / 2,
+            "data_json": json.dumps(result),
+            "created_at": saved_at,
+        }
+        for _, patient_id, result, _ in assessed if patient_id
+    ]
+    if entries:
+        db = SessionLocal()
+        try:
+            db.execute(insert(HealthTimeline), entries)
+            record_inserts(db.connection(), HealthTimeline, entries)  # Core inserts skip the flush hook
+            db.commit()
+        finally:
+            db.close()
+    return len(entries)
+
+
+def _import_chunk(chunk: list, rules) -> dict:
+    assessment = assess_chunk(chunk, rules)
+    assessment["saved"] = _save_assessments(assessment["assessed"])
+    return assessment
+
+
+async def _stream_import(upload: UploadFile, fmt: str, rules):
+    """Yield NDJSON events: invalid rows and emergencies as found, progress per chunk, then totals."""
+    totals = {"rows": 0, "scored": 0, "saved": 0, "invalid": 0, "emergencies": 0}
+    summary = {}
+    start = time.perf_counter()
+    try:
+        yield _ndjson({"type": "start", "format": fmt, "chunk_rows": IMPORT_CHUNK_ROWS})
+        async for chunk in iter_record_chunks(upload, fmt, IMPORT_CHUNK_ROWS):
+            result = await run_inference(_import_chunk, chunk, rules)
+
+            for invalid in result["invalid"]:
+                if totals["invalid"] < MAX_REPORTED_INVALID:
+                    yield _ndjson({"type": "invalid", **invalid})
+                totals["invalid"] += 1
+
+            for line_no, patient_id, risk, emergency in result["assessed"]:
+                if emergency["is_emergency"]:
+                    totals["emergencies"] += 1
+                    yield _ndjson({
+                        "type": "emergency",
+                        "line": line_no,
+                        "patient_id": patient_id,
+                        "diabetes_risk": risk["diabetes_risk"],
+                        "heart_risk": risk["heart_risk"],
+                        "severity": emergency["severity"],
+                        "alerts": emergency["alerts"],
+                    })
+
+            for disease, levels in (result["summary"] or {}).items():
+                for level, count in levels.items():
+                    summary.setdefault(disease, {}).setdefault(level, 0)
+                    summary[disease][level] += count
+
+            totals["rows"] += len(chunk)
+            totals["scored"] += len(result["assessed"])
+            totals["saved"] += result["saved"]
+            yield _ndjson({"type": "progress", **totals})
+
+        yield _ndjson({
+            "type": "complete",
+            **totals,
+            "summary": summary,
+            "seconds": round(time.perf_counter() - start, 2),
+        })
+
+    except Exception as e:
+        # Chunks already committed stay saved; `rows` says how far the import got
+        logger.error(f"Vitals import failed: {e}")
+        yield _ndjson({"type": "error", "detail": f"Import failed: {str(e)}", **totals})
+    finally:
+        await upload.close()
+
+
+@router.post("/import")
+async def import_vitals(request: Request, fmt: str = Query(None, alias="format")):
+    """
+    Bulk-import digitized camp forms: a CSV (header of VitalsInput field
+    names) or JSONL file, as multipart field `file` or as the raw body. Rows
+    are parsed as they are read and scored, emergency-checked and saved to
+    the timeline (rows with a `patient_id`) in chunks of IMPORT_CHUNK_ROWS,
+    so memory stays flat however large the file is. Streams NDJSON
+    progress, invalid rows and emergency cases while it runs.
+    """
+    content_type = request.headers.get("content-type", "")
+    if content_type.startswith("multipart/form-data"):
+        form = await request.form()
+        upload = form.get("file")
+        if upload is None or isinstance(upload, str):
+            raise HTTPException(status_code=400, detail="Upload the file as form field 'file'")
+        fmt = fmt or detect_format(upload.filename, upload.content_type)
+    else:
+        # Spool the body first: the stream cannot be read once the response has started
+        upload = UploadFile(tempfile.SpooledTemporaryFile(max_size=int(IMPORT_SPOOL_MAX_MB * 1024 * 1024)))
+        async for block in request.stream():
+            await upload.write(block)
+        await upload.seek(0)
+        fmt = fmt or detect_format(None, content_type)
+
+    if fmt not in FORMATS:
+        await upload.close()
+        raise HTTPException(status_code=400, detail="Send a .csv or .jsonl file, or pass ?format=csv|jsonl")
+
+    return StreamingResponse(_stream_import(upload, fmt, get_rules()), media_type="application/x-ndjson")
+
+
+# ── Rule table ──────────────────────────────────────────────────────
+@router.get("/rules")
+def get_rule_table():
+    """Version and size of the active risk / emergency rule table."""
+    return get_rules().summary()
+
+
+@router.post("/rules/reload")
+def reload_rule_table():
+    """Recompile rules/health_rules.json now instead of waiting for the mtime check."""
+    try:
+        return reload_rules().summary()
+    except (OSError, ValueError) as e:
+        raise HTTPException(status_code=400, detail=f"Rule table not reloaded, previous rules still active: {e}")
@@ -2,7 +2,11 @@
 import random
 import platform
 from fastapi import APIRouter
-from services.llm_service import get_ollama_status
+from services.llm_service import get_ollama_status, llm_scheduler
+from services.ocr_cache import ocr_cache
+from services.answer_cache import answer_cache
+from services.user_cache import user_cache
+from services.speech_service import get_stt_status
 
 router = APIRouter(prefix="/api/system", tags=["System Status"])
 
@@ -26,6 +30,11 @@ def get_system_status():
         "model_loaded": ollama["model_loaded"],
         "ollama_installed": ollama["ollama_installed"],
         "amd_optimized": True,
+        "ocr_cache": ocr_cache.stats(),
+        "answer_cache": answer_cache.stats(),
+        "auth_cache": user_cache.stats(),
+        "llm_queue": llm_scheduler.stats(),
+        "stt": get_stt_status(),
         "platform": platform.processor() or "AMD Ryzen AI",
         "python_version": platform.python_version(),
         "os": platform.system()
@@ -0,0 +1,115 @@
+"""HealthMitra Scan – Resumable Upload Router (chunked uploads for slow connections)
+
+1. POST /api/uploads with the file's size and the pipeline it is for →
+   upload id, chunk size and the chunks still missing (all of them).
+2. PUT each chunk's raw bytes to /api/uploads/{id}/chunks/{index} with an
+   `Upload-Checksum: sha256 <base64>` header; retry any that fail.
+3. After a dropped connection, GET /api/uploads/{id} lists what is missing.
+4. POST /api/uploads/{id}/complete runs the report, food, meal or voice
+   pipeline on the assembled file and returns what its usual endpoint would.
+"""
+import os
+import asyncio
+import logging
+import traceback
+from fastapi import APIRouter, Depends, Header, HTTPException, Request
+from fastapi.responses import JSONResponse
+from sqlalchemy.ext.asyncio import AsyncSession
+from database import get_db
+from models import UploadSession
+from schemas import UploadCreate
+from services.chunked_upload import (create_upload, get_upload, write_chunk, upload_status, upload_result,
+                                     assemble_upload, reopen_upload, finish_upload, abort_upload)
+from services.report_jobs import submit_report_file, job_status
+from services.speech_service import transcribe_audio_bytes
+from services.inference_pool import run_inference
+from services.media import upload_path
+from routers.food import scan_food_image, scan_meal_image
+from routers.voice import answer_question
+from config import PERSIST_UPLOADS
+
+logger = logging.getLogger(__name__)
+router = APIRouter(prefix="/api/uploads", tags=["Resumable Uploads"])
+
+
+@router.post("", status_code=201)
+async def open_upload(body: UploadCreate, db: AsyncSession = Depends(get_db)):
+    """Start a resumable upload; `target` is report, food, meal or voice."""
+    if body.webhook_url and not body.webhook_url.startswith(("http://", "https://")):
+        raise HTTPException(status_code=400, detail="webhook_url must be an http(s) URL")
+    upload = await create_upload(db, **body.model_dump())
+    return await upload_status(db, upload)
+
+
+@router.get("/{upload_id}")
+async def get_upload_status(upload_id: str, db: AsyncSession = Depends(get_db)):
+    """Progress of an upload: the chunks still missing, and the pipeline's response once complete."""
+    upload = await get_upload(db, upload_id)
+    return {**await upload_status(db, upload), "result": upload_result(upload)}
+
+
+@router.put("/{upload_id}/chunks/{index}")
+async def put_chunk(
+    upload_id: str,
+    index: int,
+    request: Request,
+    upload_checksum: str = Header(None),
+    db: AsyncSession = Depends(get_db)
+):
+    """Store one chunk (raw request body). 460 means it arrived corrupted and should be sent again."""
+    upload = await get_upload(db, upload_id)
+    return await write_chunk(db, upload, index, request.stream(), upload_checksum)
+
+
+@router.post("/{upload_id}/complete")
+async def complete_upload(upload_id: str, db: AsyncSession = Depends(get_db)):
+    """
+    Hand the assembled file to its pipeline. Report uploads become a
+    background job (202 with the job's status and result URLs); food, meal
+    and voice uploads return the same body as /api/food/scan, /api/food/meal
+    and /api/voice/ask. Calling this again after a lost response replays it.
+    """
+    upload = await get_upload(db, upload_id)
+    if upload.status == "done":
+        return _respond(upload, upload_result(upload))
+
+    file_path, file_hash = await assemble_upload(db, upload)
+    try:
+        result = await _hand_off(db, upload, file_path, file_hash)
+    except Exception as e:
+        logger.error(f"Processing upload {upload_id} ({upload.target}) failed: {e}")
+        logger.error(traceback.format_exc())
+        await reopen_upload(db, upload)
+        raise HTTPException(status_code=500, detail=f"Processing the upload failed: {str(e)}")
+    await finish_upload(db, upload, result)
+    return _respond(upload, result)
+
+
+@router.delete("/{upload_id}", status_code=204)
+async def cancel_upload(upload_id: str, db: AsyncSession = Depends(get_db)):
+    """Abandon an upload and delete what was received."""
+    await abort_upload(db, await get_upload(db, upload_id))
+
+
+async def _hand_off(db: AsyncSession, upload: UploadSession, file_path: str, file_hash: str) -> dict:
+    if upload.target == "report":
+        job, created = await submit_report_file(db, file_path, file_hash, upload.filename,
+                                                upload.patient_id, upload.webhook_url)
+        return {**job_status(job), "duplicate": not created}
+
+    # Kept under the same name a direct upload to that endpoint would get
+    kept_path = upload_path(upload.filename, f"{upload.target}_") if PERSIST_UPLOADS else None
+    if upload.target == "food":
+        result = await scan_food_image(file_path, kept_path, upload.patient_id, upload.scan_type)
+    elif upload.target == "meal":
+        result = await scan_meal_image(file_path, kept_path, upload.patient_id)
+    else:
+        transcript = await run_inference(transcribe_audio_bytes, file_path, upload.language)
+        result = await answer_question(transcript, upload.language, upload.patient_id, db)
+    if kept_path:
+        await asyncio.to_thread(os.replace, file_path, kept_path)
+    return result
+
+
+def _respond(upload: UploadSession, result: dict):
+    return JSONResponse(status_code=202, content=result) if upload.target == "report" else result
@@ -1,21 +1,45 @@
 """HealthMitra Scan – Voice AI Doctor Router"""
-import os
+import json
+import asyncio
 import logging
 import traceback
-import asyncio
-from concurrent.futures import ThreadPoolExecutor
-from fastapi import APIRouter, UploadFile, File, Form, Depends, HTTPException
-from sqlalchemy.orm import Session
-from database import get_db
+from fastapi import APIRouter, UploadFile, File, Form, Depends, HTTPException, WebSocket, WebSocketDisconnect
+from fastapi.responses import StreamingResponse
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from database import get_db, AsyncSessionLocal
 from models import VoiceSession
-from services.speech_service import transcribe_audio
-from services.llm_service import answer_health_question
-from config import UPLOAD_DIR
+from services.speech_service import transcribe_audio_bytes, transcribe_segment, simulated_transcript
+from services.llm_service import submit_health_answer, stream_health_answer
+from services.inference_pool import run_inference, stream_inference
+from services.media import persist_upload
+from services.vad import SpeechSegmenter, pcm16_to_float32, SAMPLE_RATE
+from services.pagination import keyset_page, page_response
+from config import VOICE_STREAM_MAX_SECONDS
 
 logger = logging.getLogger(__name__)
 router = APIRouter(prefix="/api/voice", tags=["Voice AI Doctor"])
 
-_pool = ThreadPoolExecutor(max_workers=2)
+
+async def answer_question(transcript: str, language: str, patient_id: int | None, db: AsyncSession) -> dict:
+    """Answer a (transcribed) question and save it as a VoiceSession."""
+    ai_response = await asyncio.wrap_future(submit_health_answer(transcript, language))
+
+    session = VoiceSession(
+        patient_id=patient_id,
+        transcript=transcript,
+        ai_response=ai_response,
+        language=language
+    )
+    db.add(session)
+    await db.commit()
+
+    return {
+        "session_id": session.id,
+        "transcript": transcript,
+        "ai_response": ai_response,
+        "language": language
+    }
 
 
 @router.post("/ask")
@@ -24,46 +48,23 @@ async def voice_ask(
     text_query: str = Form(None),
     language: str = Form("en"),
     patient_id: int = Form(None),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """Process voice or text health question and return AI response."""
     try:
         transcript = ""
-        loop = asyncio.get_event_loop()
 
         if audio:
-            # Save audio file
-            audio_path = os.path.join(UPLOAD_DIR, f"voice_{audio.filename}")
-            with open(audio_path, "wb") as f:
-                content = await audio.read()
-                f.write(content)
-            # Speech-to-text (blocking → thread)
-            transcript = await loop.run_in_executor(_pool, transcribe_audio, audio_path, language)
+            content = await audio.read()
+            persist_upload(content, audio.filename, "voice_")
+            # Speech-to-text from memory (blocking → thread)
+            transcript = await run_inference(transcribe_audio_bytes, content, language)
         elif text_query:
             transcript = text_query
         else:
             return {"error": "Please provide either audio file or text query"}
 
-        # Get AI response using LLM (blocking → thread)
-        ai_response = await loop.run_in_executor(_pool, answer_health_question, transcript, language)
-
-        # Save session
-        session = VoiceSession(
-            patient_id=patient_id,
-            transcript=transcript,
-            ai_response=ai_response,
-            language=language
-        )
-        db.add(session)
-        db.commit()
-        db.refresh(session)
-
-        return {
-            "session_id": session.id,
-            "transcript": transcript,
-            "ai_response": ai_response,
-            "language": language
-        }
+        return await answer_question(transcript, language, patient_id, db)
 
     except Exception as e:
         logger.error(f"Voice ask failed: {e}")
@@ -76,12 +77,11 @@ async def text_ask(
     question: str = Form(...),
     language: str = Form("en"),
     patient_id: int = Form(None),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """Text-based health Q&A (no audio)."""
     try:
-        loop = asyncio.get_event_loop()
-        ai_response = await loop.run_in_executor(_pool, answer_health_question, question, language)
+        ai_response = await asyncio.wrap_future(submit_health_answer(question, language))
 
         session = VoiceSession(
             patient_id=patient_id,
@@ -90,7 +90,7 @@ async def text_ask(
             language=language
         )
         db.add(session)
-        db.commit()
+        await db.commit()
 
         return {
             "question": question,
@@ -104,18 +104,194 @@ async def text_ask(
         raise HTTPException(status_code=500, detail=f"Text processing failed: {str(e)}")
 
 
+# ── Streaming (Server-Sent Events) ──────────────────────────────────
+def _sse(event: str, data: dict) -> str:
+    return f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n"
+
+
+async def _answer_events(question: str, language: str, patient_id: int | None, audio: bytes = None):
+    """
+    Yields (event, data): `transcript` (audio only), one `token` per generated
+    chunk, then `done` once the full answer has been saved as a VoiceSession,
+    or `error`. Shared by the SSE endpoints and the live WebSocket.
+    """
+    try:
+        if audio is not None:
+            question = await run_inference(transcribe_audio_bytes, audio, language)
+            yield "transcript", {"transcript": question}
+
+        chunks = []
+        async for text in stream_inference(stream_health_answer, question, language):
+            chunks.append(text)
+            yield "token", {"text": text}
+        ai_response = "".join(chunks)
+
+        async with AsyncSessionLocal() as db:
+            session = VoiceSession(
+                patient_id=patient_id,
+                transcript=question,
+                ai_response=ai_response,
+                language=language
+            )
+            db.add(session)
+            await db.commit()
+            session_id = session.id
+
+        yield "done", {
+            "session_id": session_id,
+            "transcript": question,
+            "ai_response": ai_response,
+            "language": language
+        }
+
+    except Exception as e:
+        logger.error(f"Streaming answer failed: {e}")
+        logger.error(traceback.format_exc())
+        yield "error", {"detail": f"Voice processing failed: {str(e)}"}
+
+
+async def _stream_answer(question: str, language: str, patient_id: int | None, audio: bytes = None):
+    """SSE framing of _answer_events."""
+    async for event, data in _answer_events(question, language, patient_id, audio):
+        yield _sse(event, data)
+
+
+@router.post("/ask-stream")
+async def voice_ask_stream(
+    audio: UploadFile = File(None),
+    text_query: str = Form(None),
+    language: str = Form("en"),
+    patient_id: int = Form(None),
+):
+    """Streaming variant of /ask – sends the transcript, then answer tokens as they are generated."""
+    content = None
+    if audio:
+        content = await audio.read()
+        persist_upload(content, audio.filename, "voice_")
+    elif not text_query:
+        raise HTTPException(status_code=400, detail="Please provide either audio file or text query")
+
+    return StreamingResponse(
+        _stream_answer(text_query or "", language, patient_id, content),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+
+@router.post("/text-ask-stream")
+async def text_ask_stream(
+    question: str = Form(...),
+    language: str = Form("en"),
+    patient_id: int = Form(None),
+):
+    """Streaming variant of /text-ask – answer tokens are sent as they are generated."""
+    return StreamingResponse(
+        _stream_answer(question, language, patient_id),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+
+# ── Live voice (WebSocket + VAD) ────────────────────────────────────
+@router.websocket("/stream")
+async def voice_stream(websocket: WebSocket, language: str = "en", patient_id: int = None):
+    """
+    Live voice questions. The client sends binary frames of 16 kHz mono PCM16
+    audio (and may send {"type": "stop"} to end early). The server replies with
+    JSON messages: `speech_start`, a `partial` transcript per spoken phrase,
+    `final` once the speaker pauses, then the answer as `token` … `done`
+    (same payloads as /ask-stream).
+    """
+    await websocket.accept()
+    segmenter = SpeechSegmenter()
+    segments = asyncio.Queue()
+    parts = []
+
+    async def transcribe_segments():
+        # One segment at a time, in order, while the client keeps talking
+        while True:
+            samples = await segments.get()
+            if samples is None:
+                return
+            text = await run_inference(transcribe_segment, samples, language)
+            if text:
+                parts.append(text)
+                await websocket.send_json({"type": "partial", "text": text, "transcript": " ".join(parts)})
+
+    transcriber = asyncio.create_task(transcribe_segments())
+    max_samples = int(VOICE_STREAM_MAX_SECONDS * SAMPLE_RATE)
+    received = 0
+    leftover = b""
+
+    try:
+        listening = True
+        while listening:
+            message = await websocket.receive()
+            if message["type"] == "websocket.disconnect":
+                raise WebSocketDisconnect(message.get("code", 1000))
+
+            if message.get("bytes"):
+                data = leftover + message["bytes"]
+                usable = len(data) - len(data) % 2  # keep a split 16-bit sample for the next frame
+                leftover = data[usable:]
+                samples = pcm16_to_float32(data[:usable])
+                received += len(samples)
+
+                for event, segment in segmenter.feed(samples):
+                    if event == "speech_start":
+                        await websocket.send_json({"type": "speech_start"})
+                    elif event == "segment":
+                        segments.put_nowait(segment)
+                    elif event == "end":
+                        listening = False
+                if received >= max_samples:
+                    listening = False
+            elif message.get("text") and json.loads(message["text"]).get("type") == "stop":
+                listening = False
+
+        # Speaker has stopped: transcribe whatever is left, then answer
+        tail = segmenter.flush()
+        if tail is not None:
+            segments.put_nowait(tail)
+        segments.put_nowait(None)
+        await transcriber
+
+        question = " ".join(parts).strip()
+        if not question:
+            question = simulated_transcript(language)
+        await websocket.send_json({"type": "final", "transcript": question})
+
+        async for event, data in _answer_events(question, language, patient_id):
+            await websocket.send_json({"type": event, **data})
+        await websocket.close()
+
+    except WebSocketDisconnect:
+        logger.info("Voice stream closed by client")
+    except Exception as e:
+        logger.error(f"Voice stream failed: {e}")
+        logger.error(traceback.format_exc())
+        try:
+            await websocket.send_json({"type": "error", "detail": f"Voice processing failed: {str(e)}"})
+            await websocket.close()
+        except Exception:
+            pass
+    finally:
+        transcriber.cancel()
+
+
 @router.get("/history")
-def get_voice_history(patient_id: int = None, limit: int = 20, db: Session = Depends(get_db)):
-    """Get voice session history."""
-    query = db.query(VoiceSession)
+async def get_voice_history(patient_id: int = None, cursor: str = None, limit: int = 20,
+                            db: AsyncSession = Depends(get_db)):
+    """Get voice session history, newest first. Pass `next_cursor` back as `cursor` for the next page."""
+    stmt = select(VoiceSession)
     if patient_id:
-        query = query.filter(VoiceSession.patient_id == patient_id)
-    sessions = query.order_by(VoiceSession.created_at.desc()).limit(limit).all()
+        stmt = stmt.where(VoiceSession.patient_id == patient_id)
+    sessions, next_cursor = await keyset_page(db, stmt, VoiceSession, cursor, limit)
 
-    return [{
+    return page_response([{
         "id": s.id,
         "transcript": s.transcript,
         "ai_response": s.ai_response,
         "language": s.language,
         "created_at": s.created_at.isoformat() if s.created_at else None
-    } for s in sessions]
+    } for s in sessions], next_cursor)
@@ -0,0 +1,39 @@
+"""HealthMitra Scan – Sample Vitals (synthetic camp-form rows for tests and benchmarks)"""
+import random
+
+
+def make_rows(count: int, seed: int = 42) -> list:
+    """
+    `count` vitals dicts as digitized camp forms give them: optional readings
+    missing ~15% of the time, genders including "", None, unknown values and
+    no key at all, and ~10% of rows on the > / >= rule boundaries.
+    """
+    rng = random.Random(seed)
+
+    def optional(low: float, high: float, cast=float):
+        return None if rng.random() < 0.15 else cast(rng.uniform(low, high))
+
+    rows = []
+    for _ in range(count):
+        row = {
+            "age": rng.randint(18, 90),
+            "gender": rng.choice(["male", "female", "other", "", None, "Female"]),
+            "bmi": optional(15, 42),
+            "blood_pressure_systolic": optional(90, 210, int),
+            "blood_pressure_diastolic": optional(50, 125, int),
+            "blood_sugar_fasting": optional(60, 450),
+            "cholesterol_total": optional(120, 320),
+            "heart_rate": optional(35, 160, int),
+            "smoking": rng.random() < 0.25,
+            "family_history_diabetes": rng.random() < 0.3,
+            "family_history_heart": rng.random() < 0.3,
+            "exercise_minutes_weekly": rng.choice([0, 30, 60, 90, 150, 300]),
+        }
+        if rng.random() < 0.1:
+            del row["gender"]  # only a missing key falls back to the rule's default_case
+        if rng.random() < 0.1:
+            row.update(age=rng.choice([35, 45, 55]), bmi=rng.choice([25.0, 30.0]),
+                       blood_sugar_fasting=rng.choice([100.0, 126.0]),
+                       blood_pressure_systolic=rng.choice([130, 140]))
+        rows.append(row)
+    return rows
@@ -117,3 +117,16 @@ class SystemStatusResponse(BaseModel):
     ollama_status: str
     model_loaded: str
     amd_optimized: bool
+
+
+# ── Resumable Upload ─────────────────────────────────
+class UploadCreate(BaseModel):
+    filename: str
+    size: int  # bytes
+    target: str  # report, food, meal or voice
+    chunk_size: Optional[int] = None  # bytes; server default if omitted
+    sha256: Optional[str] = None  # hex digest of the whole file, checked on completion
+    patient_id: Optional[int] = None
+    language: str = "en"
+    scan_type: str = "single"
+    webhook_url: Optional[str] = None  # report uploads only
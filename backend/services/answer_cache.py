@@ -0,0 +1,151 @@
+"""HealthMitra Scan – Answer Cache for repeated health questions"""
+import re
+import time
+import hashlib
+import logging
+import threading
+import unicodedata
+from collections import OrderedDict
+
+logger = logging.getLogger(__name__)
+
+try:
+    from config import (ANSWER_CACHE_MAX_ENTRIES, ANSWER_CACHE_TTL_SECONDS,
+                        ANSWER_CACHE_NEAR_DUPLICATE, ANSWER_CACHE_SIMILARITY)
+except Exception:
+    ANSWER_CACHE_MAX_ENTRIES, ANSWER_CACHE_TTL_SECONDS = 256, 86400.0
+    ANSWER_CACHE_NEAR_DUPLICATE, ANSWER_CACHE_SIMILARITY = False, 0.85
+
+NGRAM_SIZE = 3
+
+
+def normalize_question(question: str) -> str:
+    """Lowercase, drop punctuation/symbols and collapse whitespace (keeps Hindi matras)."""
+    text = unicodedata.normalize("NFKC", question).lower()
+    text = "".join(" " if unicodedata.category(ch)[0] in "PS" else ch for ch in text)
+    return re.sub(r"\s+", " ", text).strip()
+
+
+def _ngrams(text: str) -> frozenset:
+    padded = f" {text} "
+    return frozenset(padded[i:i + NGRAM_SIZE] for i in range(len(padded) - NGRAM_SIZE + 1))
+
+
+class AnswerCache:
+    """
+    LRU + TTL cache of LLM answers keyed by (language, patient context, normalized
+    question). With near-duplicate mode on, a miss falls back to the most similar
+    cached question by character-trigram Jaccard similarity, found through an
+    inverted n-gram index. Answers are never shared across patient contexts.
+    """
+
+    def __init__(self, max_entries: int, ttl_seconds: float,
+                 near_duplicate: bool = False, similarity: float = 0.85):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.near_duplicate = near_duplicate
+        self.similarity = similarity
+        self.hits = 0
+        self.near_hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()  # key -> (answer, expires_at, ngrams)
+        self._index = {}  # (language, context) -> {ngram: set(keys)}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _scope(language: str, context: str) -> tuple:
+        context_id = hashlib.sha256(context.encode("utf-8")).hexdigest() if context else ""
+        return (language, context_id)
+
+    def get(self, question: str, language: str = "en", context: str = "") -> str | None:
+        scope = self._scope(language, context)
+        normalized = normalize_question(question)
+        key = scope + (normalized,)
+        now = time.time()
+
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry and entry[1] < now:
+                self._remove(key)
+                entry = None
+            if entry:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry[0]
+
+            if self.near_duplicate:
+                match = self._nearest(scope, _ngrams(normalized), now)
+                if match:
+                    self._entries.move_to_end(match)
+                    self.near_hits += 1
+                    return self._entries[match][0]
+
+            self.misses += 1
+            return None
+
+    def _nearest(self, scope: tuple, grams: frozenset, now: float):
+        index = self._index.get(scope)
+        if not index or not grams:
+            return None
+        shared = {}
+        for gram in grams:
+            for key in index.get(gram, ()):
+                shared[key] = shared.get(key, 0) + 1
+
+        best_key, best_score = None, 0.0
+        for key, common in shared.items():
+            answer, expires_at, other = self._entries[key]
+            if expires_at < now:
+                continue
+            score = common / (len(grams) + len(other) - common)
+            if score > best_score:
+                best_key, best_score = key, score
+        return best_key if best_score >= self.similarity else None
+
+    def put(self, question: str, answer: str, language: str = "en", context: str = ""):
+        scope = self._scope(language, context)
+        normalized = normalize_question(question)
+        if not normalized:
+            return
+        key = scope + (normalized,)
+        grams = _ngrams(normalized)
+
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+            self._entries[key] = (answer, time.time() + self.ttl_seconds, grams)
+            if self.near_duplicate:
+                index = self._index.setdefault(scope, {})
+                for gram in grams:
+                    index.setdefault(gram, set()).add(key)
+            while len(self._entries) > self.max_entries:
+                self._remove(next(iter(self._entries)))
+
+    def _remove(self, key: tuple):
+        _, _, grams = self._entries.pop(key)
+        index = self._index.get(key[:2])
+        if index:
+            for gram in grams:
+                keys = index.get(gram)
+                if keys:
+                    keys.discard(key)
+                    if not keys:
+                        del index[gram]
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self.hits + self.near_hits + self.misses
+            return {
+                "hits": self.hits,
+                "near_duplicate_hits": self.near_hits,
+                "misses": self.misses,
+                "hit_ratio": round((self.hits + self.near_hits) / lookups, 3) if lookups else 0.0,
+                "entries": len(self._entries),
+                "near_duplicate_mode": self.near_duplicate,
+            }
+
+
+answer_cache = AnswerCache(
+    ANSWER_CACHE_MAX_ENTRIES, ANSWER_CACHE_TTL_SECONDS,
+    ANSWER_CACHE_NEAR_DUPLICATE, ANSWER_CACHE_SIMILARITY
+)
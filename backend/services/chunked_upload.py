@@ -0,0 +1,317 @@
+"""HealthMitra Scan – Resumable Chunked Uploads (tus-style, assembled on disk)
+
+A client opens an upload with the file's size, then PUTs fixed-size chunks,
+in any order and as often as needed, each with its SHA-256 in an
+`Upload-Checksum: sha256 <base64>` header. A verified chunk is written
+straight to its offset in a preallocated part file under UPLOAD_DIR/chunked,
+so a request never holds more than one chunk in memory and a dropped
+connection costs only the chunk in flight: the status call lists the chunks
+still missing. Sessions and received chunks are rows in the database, so an
+upload resumes across server restarts. Completing the upload checks that
+every chunk arrived, hashes the assembled file from disk and hands its path
+to the report, food or voice pipeline (routers/uploads.py). A completion
+whose process died is retried once its claim goes stale; an upload whose
+part file is gone by then is marked failed.
+"""
+import os
+import json
+import uuid
+import base64
+import asyncio
+import hashlib
+import logging
+import binascii
+from datetime import datetime, timedelta, timezone
+from typing import AsyncIterator
+
+from sqlalchemy import select, update, delete, func
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from config import (UPLOAD_DIR, CHUNKED_UPLOAD_CHUNK_KB, CHUNKED_UPLOAD_MAX_MB, CHUNKED_UPLOAD_TTL_HOURS,
+                    CHUNKED_UPLOAD_FINALIZE_MINUTES)
+from models import UploadSession, UploadChunk
+
+logger = logging.getLogger(__name__)
+
+CHUNK_DIR = os.path.join(UPLOAD_DIR, "chunked")
+UPLOAD_TARGETS = ("report", "food", "meal", "voice")
+MIN_CHUNK_SIZE = 64 * 1024
+MAX_CHUNK_SIZE = 8 * 1024 * 1024
+HASH_READ_SIZE = 1024 * 1024
+CHECKSUM_MISMATCH = 460  # tus' status code for a chunk whose checksum does not match
+FILE_GONE = "Processing this upload failed and its file is gone; start a new upload"
+
+
+class UploadError(ValueError):
+    """A request the upload protocol rejects; main.py turns it into `status_code` + detail."""
+
+    def __init__(self, status_code: int, detail: str):
+        super().__init__(detail)
+        self.status_code = status_code
+
+
+def _now() -> datetime:
+    return datetime.now(timezone.utc)
+
+
+def _expiry() -> datetime:
+    return _now() + timedelta(hours=CHUNKED_UPLOAD_TTL_HOURS)
+
+
+def _finalize_deadline() -> datetime:
+    return _now() + timedelta(minutes=CHUNKED_UPLOAD_FINALIZE_MINUTES)
+
+
+def part_path(upload_id: str) -> str:
+    return os.path.join(CHUNK_DIR, f"{upload_id}.part")
+
+
+def total_chunks(upload: UploadSession) -> int:
+    return -(-upload.size // upload.chunk_size)
+
+
+def chunk_length(upload: UploadSession, index: int) -> int:
+    return min(upload.chunk_size, upload.size - index * upload.chunk_size)
+
+
+# ── File I/O (worker threads) ───────────────────────────────────────
+
+def _preallocate(file_path: str, size: int):
+    os.makedirs(os.path.dirname(file_path), exist_ok=True)
+    with open(file_path, "wb") as f:
+        f.truncate(size)  # sparse where the filesystem allows it
+
+
+def _write_verified(file_path: str, offset: int, data: bytes, digest: bytes) -> str | None:
+    """Write `data` at `offset` if it hashes to `digest`; returns its hex digest, or None on a mismatch."""
+    sha = hashlib.sha256(data)
+    if sha.digest() != digest:
+        return None
+    with open(file_path, "r+b") as f:
+        f.seek(offset)
+        f.write(data)
+    return sha.hexdigest()
+
+
+def _hash_file(file_path: str) -> str:
+    sha = hashlib.sha256()
+    with open(file_path, "rb") as f:
+        while block := f.read(HASH_READ_SIZE):
+            sha.update(block)
+    return sha.hexdigest()
+
+
+def _remove(file_path: str):
+    try:
+        os.remove(file_path)
+    except FileNotFoundError:
+        pass
+
+
+# ── Protocol ────────────────────────────────────────────────────────
+
+async def create_upload(db: AsyncSession, filename: str, size: int, target: str, chunk_size: int | None = None,
+                        sha256: str | None = None, patient_id: int | None = None, language: str = "en",
+                        scan_type: str = "single", webhook_url: str | None = None) -> UploadSession:
+    """Open an upload and preallocate its part file."""
+    if target not in UPLOAD_TARGETS:
+        raise UploadError(400, f"target must be one of {', '.join(UPLOAD_TARGETS)}")
+    if size <= 0:
+        raise UploadError(400, "size must be positive")
+    if size > CHUNKED_UPLOAD_MAX_MB * 1024 * 1024:
+        raise UploadError(413, f"Uploads are limited to {CHUNKED_UPLOAD_MAX_MB:g} MB")
+    chunk_size = min(MAX_CHUNK_SIZE, max(MIN_CHUNK_SIZE, chunk_size or CHUNKED_UPLOAD_CHUNK_KB * 1024))
+    if sha256 is not None:
+        sha256 = sha256.lower()
+        if len(sha256) != 64 or any(c not in "0123456789abcdef" for c in sha256):
+            raise UploadError(400, "sha256 must be a hex SHA-256 digest")
+
+    await purge_expired_uploads(db)
+    upload = UploadSession(id=uuid.uuid4().hex, target=target, filename=os.path.basename(filename or "upload"),
+                           size=size, chunk_size=chunk_size, sha256=sha256, patient_id=patient_id,
+                           language=language, scan_type=scan_type, webhook_url=webhook_url,
+                           status="open", expires_at=_expiry())
+    await asyncio.to_thread(_preallocate, part_path(upload.id), size)
+    db.add(upload)
+    await db.commit()
+    return upload
+
+
+async def get_upload(db: AsyncSession, upload_id: str) -> UploadSession:
+    upload = await db.get(UploadSession, upload_id)
+    if upload is None:
+        raise UploadError(404, "Upload not found (it may have expired)")
+    return upload
+
+
+def parse_checksum(header: str | None) -> bytes:
+    """`sha256 <base64 digest>` (the tus Upload-Checksum format) → raw digest."""
+    if not header:
+        raise UploadError(400, "Upload-Checksum header is required: sha256 <base64 digest>")
+    algorithm, _, value = header.strip().partition(" ")
+    if algorithm.lower() != "sha256":
+        raise UploadError(400, "Only sha256 chunk checksums are supported")
+    try:
+        digest = base64.b64decode(value.strip(), validate=True)
+    except (binascii.Error, ValueError):
+        digest = b""
+    if len(digest) != 32:
+        raise UploadError(400, "Upload-Checksum is not a base64 SHA-256 digest")
+    return digest
+
+
+async def write_chunk(db: AsyncSession, upload: UploadSession, index: int, body: AsyncIterator[bytes],
+                      checksum: str | None) -> dict:
+    """
+    Receive chunk `index`, verify it against its checksum and write it at its
+    offset. Re-sending a chunk is harmless: the last verified copy wins.
+    """
+    digest = parse_checksum(checksum)
+    if upload.status != "open":
+        raise UploadError(409, f"Upload is {upload.status}; no more chunks are accepted")
+    total = total_chunks(upload)
+    if not 0 <= index < total:
+        raise UploadError(400, f"Chunk index must be between 0 and {total - 1}")
+
+    expected = chunk_length(upload, index)
+    data = bytearray()
+    async for piece in body:
+        data.extend(piece)
+        if len(data) > expected:
+            raise UploadError(413, f"Chunk {index} must be {expected} bytes")
+    if len(data) != expected:
+        raise UploadError(400, f"Chunk {index} must be {expected} bytes, got {len(data)}")
+
+    upload_id = upload.id
+    sha = await asyncio.to_thread(_write_verified, part_path(upload_id), index * upload.chunk_size,
+                                  bytes(data), digest)
+    if sha is None:
+        raise UploadError(CHECKSUM_MISMATCH, f"Chunk {index} does not match its checksum; send it again")
+
+    chunk = await db.get(UploadChunk, (upload_id, index))
+    if chunk is None:
+        db.add(UploadChunk(upload_id=upload_id, index=index, sha256=sha))
+    else:
+        chunk.sha256 = sha
+    upload.expires_at = _expiry()
+    try:
+        await db.commit()
+    except IntegrityError:
+        await db.rollback()  # the same chunk was recorded concurrently; the bytes on disk are verified either way
+
+    received = await db.scalar(select(func.count()).select_from(UploadChunk).where(UploadChunk.upload_id == upload_id))
+    return {"upload_id": upload_id, "chunk": index, "received_chunks": received, "total_chunks": total}
+
+
+async def upload_status(db: AsyncSession, upload: UploadSession) -> dict:
+    received = set(await db.scalars(select(UploadChunk.index).where(UploadChunk.upload_id == upload.id)))
+    missing = [] if upload.status == "done" else [i for i in range(total_chunks(upload)) if i not in received]
+    return {
+        "upload_id": upload.id,
+        "status": upload.status,
+        "target": upload.target,
+        "filename": upload.filename,
+        "size": upload.size,
+        "chunk_size": upload.chunk_size,
+        "total_chunks": total_chunks(upload),
+        "received_chunks": total_chunks(upload) - len(missing),
+        "missing_chunks": missing,
+        "expires_at": upload.expires_at.isoformat() if upload.expires_at else None,
+        "chunk_url": f"/api/uploads/{upload.id}/chunks/{{index}}",
+        "complete_url": f"/api/uploads/{upload.id}/complete",
+    }
+
+
+async def assemble_upload(db: AsyncSession, upload: UploadSession) -> tuple[str, str]:
+    """
+    Claim an open upload (or one whose earlier finalization went stale) and
+    check it is whole. Returns (path of the assembled file, its sha256).
+    Call finish_upload after the hand-off, or reopen_upload if the pipeline failed.
+    """
+    claimed = await db.execute(update(UploadSession).where(
+        UploadSession.id == upload.id,
+        (UploadSession.status == "open") | ((UploadSession.status == "finalizing") & (UploadSession.expires_at < _now())),
+    ).values(status="finalizing", expires_at=_finalize_deadline()).execution_options(synchronize_session=False))
+    await db.commit()
+    await db.refresh(upload)
+    if claimed.rowcount != 1:
+        if upload.status == "failed":
+            raise UploadError(410, FILE_GONE)
+        raise UploadError(409, f"Upload is already {upload.status}")
+
+    try:
+        received = await db.scalar(select(func.count()).select_from(UploadChunk).where(UploadChunk.upload_id == upload.id))
+        if received != total_chunks(upload):
+            raise UploadError(409, f"{total_chunks(upload) - received} of {total_chunks(upload)} chunks are missing")
+        file_path = part_path(upload.id)
+        if not await asyncio.to_thread(os.path.exists, file_path):
+            raise UploadError(410, FILE_GONE)
+        file_hash = await asyncio.to_thread(_hash_file, file_path)
+        if upload.sha256 and file_hash != upload.sha256:
+            raise UploadError(CHECKSUM_MISMATCH, "The assembled file does not match the sha256 given at creation")
+    except Exception:
+        await reopen_upload(db, upload)
+        raise
+    return file_path, file_hash
+
+
+async def reopen_upload(db: AsyncSession, upload: UploadSession):
+    """
+    Put an upload back to open (its chunks are kept) so /complete can be
+    retried, or mark it failed if the hand-off already moved its part file away.
+    """
+    upload_id = upload.id  # read before the rollback expires it
+    await db.rollback()
+    if await asyncio.to_thread(os.path.exists, part_path(upload_id)):
+        values = {"status": "open", "expires_at": _expiry()}
+    else:
+        logger.warning(f"Upload {upload_id} lost its part file during processing; marking it failed")
+        values = {"status": "failed", "expires_at": _expiry()}
+    await db.execute(update(UploadSession).where(UploadSession.id == upload_id).values(**values))
+    await db.commit()
+    await db.refresh(upload)
+
+
+async def finish_upload(db: AsyncSession, upload: UploadSession, result: dict):
+    """Record the pipeline's response and drop the chunk bookkeeping and any leftover part file."""
+    await db.execute(delete(UploadChunk).where(UploadChunk.upload_id == upload.id))
+    await db.execute(update(UploadSession).where(UploadSession.id == upload.id).values(
+        status="done", result_json=json.dumps(result, ensure_ascii=False), expires_at=_expiry(),
+    ))
+    await db.commit()
+    await asyncio.to_thread(_remove, part_path(upload.id))
+
+
+def upload_result(upload: UploadSession) -> dict | None:
+    return json.loads(upload.result_json) if upload.result_json else None
+
+
+async def abort_upload(db: AsyncSession, upload: UploadSession):
+    await _delete_uploads(db, [upload.id])
+
+
+async def purge_expired_uploads(db: AsyncSession) -> int:
+    """
+    Delete uploads idle for longer than CHUNKED_UPLOAD_TTL_HOURS, with their
+    part files. Finalizing uploads are left to /complete until a full TTL
+    past their stale claim, then deleted too.
+    """
+    now = _now()
+    stale_finalizing = now - timedelta(hours=CHUNKED_UPLOAD_TTL_HOURS)
+    expired = list(await db.scalars(select(UploadSession.id).where(
+        (UploadSession.status != "finalizing") & (UploadSession.expires_at < now)
+        | (UploadSession.status == "finalizing") & (UploadSession.expires_at < stale_finalizing)
+    )))
+    if expired:
+        await _delete_uploads(db, expired)
+        logger.info(f"Deleted {len(expired)} expired uploads")
+    return len(expired)
+
+
+async def _delete_uploads(db: AsyncSession, upload_ids: list):
+    await db.execute(delete(UploadChunk).where(UploadChunk.upload_id.in_(upload_ids)))
+    await db.execute(delete(UploadSession).where(UploadSession.id.in_(upload_ids)))
+    await db.commit()
+    for upload_id in upload_ids:
+        await asyncio.to_thread(_remove, part_path(upload_id))
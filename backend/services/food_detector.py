@@ -13,6 +13,8 @@ except ImportError:
     YOLO_AVAILABLE = False
     logger.warning("ultralytics not installed. Using simulated food detection.")
 
+from services.image_preprocess import prepare_for_yolo, YOLO_INPUT_SIZE
+
 
 # ── Indian food nutrition database ──────────────────────────────────
 INDIAN_FOODS = {
@@ -245,111 +247,66 @@ def _get_yolo_model():
     return _yolo_model
 
 
-def _detect_with_yolo(image_path: str) -> list:
-    """Run YOLOv8 inference on an image and return detected food items."""
+def _confidence_threshold() -> float:
     try:
         from config import YOLO_CONFIDENCE_THRESHOLD
-        conf_threshold = YOLO_CONFIDENCE_THRESHOLD
+        return YOLO_CONFIDENCE_THRESHOLD
     except Exception:
-        conf_threshold = 0.25
+        return 0.25
 
-    model = _get_yolo_model()
-    results = model(image_path, conf=conf_threshold, verbose=False)
 
+def _food_items(result, names: dict, scale: float = 1.0) -> list:
+    """Turn one YOLOv8 result into the detected food items it contains, boxes in the original photo's pixels."""
     detected_items = []
-    for result in results:
-        for box in result.boxes:
-            class_id = int(box.cls[0])
-            class_name = model.names[class_id]
-            confidence = float(box.conf[0])
-
-            # Check if it's a food-related class
-            if class_name in COCO_FOOD_CLASSES:
-                food_info = COCO_FOOD_MAP.get(class_name)
-                if food_info is not None:
-                    detected_items.append({
-                        "class_name": class_name,
-                        "confidence": round(confidence, 2),
-                        "food_info": food_info,
-                        "bbox": box.xyxy[0].tolist()
-                    })
+    for box in result.boxes:
+        class_id = int(box.cls[0])
+        class_name = names[class_id]
+        confidence = float(box.conf[0])
 
+        # Check if it's a food-related class
+        if class_name in COCO_FOOD_CLASSES:
+            food_info = COCO_FOOD_MAP.get(class_name)
+            if food_info is not None:
+                detected_items.append({
+                    "class_name": class_name,
+                    "confidence": round(confidence, 2),
+                    "food_info": food_info,
+                    "bbox": [v * scale for v in box.xyxy[0].tolist()]
+                })
     return detected_items
 
 
-def detect_food(image_path: str, scan_type: str = "single") -> dict:
-    """
-    Detect food items in an image using YOLOv8.
-    Falls back to simulated detection if ultralytics is not available.
-
-    Returns: dict with detected_foods, nutrition, warnings, scan_type, total_items
-    """
-    detected_foods = []
-    total_nutrition = {"calories": 0, "protein": 0, "carbs": 0, "fat": 0, "fiber": 0}
-    all_warnings = []
-    source = "simulated"
-
-    # ── Try real YOLOv8 detection ───────────────────────────────────
-    if YOLO_AVAILABLE:
-        try:
-            yolo_results = _detect_with_yolo(image_path)
+def _detect_with_yolo(image) -> list:
+    """Run YOLOv8 inference on a preprocessed image (YoloInput) and return detected food items."""
+    model = _get_yolo_model()
+    results = model(image.image, imgsz=YOLO_INPUT_SIZE, conf=_confidence_threshold(), verbose=False)
 
-            if yolo_results:
-                source = "yolov8"
-                for item in yolo_results:
-                    food = item["food_info"]
-                    detected_foods.append({
-                        "name": food["name"],
-                        "confidence": item["confidence"],
-                        "category": food["category"],
-                        "is_safe": food["is_safe"],
-                        "calories": food["calories"],
-                        "protein": food["protein"],
-                        "carbs": food["carbs"],
-                        "fat": food["fat"],
-                        "fiber": food["fiber"],
-                        "warnings": food["warnings"],
-                        "benefits": food.get("benefits", [])
-                    })
-
-                    total_nutrition["calories"] += food["calories"]
-                    total_nutrition["protein"] += food["protein"]
-                    total_nutrition["carbs"] += food["carbs"]
-                    total_nutrition["fat"] += food["fat"]
-                    total_nutrition["fiber"] += food["fiber"]
-                    all_warnings.extend(food["warnings"])
-
-                logger.info(f"YOLOv8 detected {len(detected_foods)} food items")
-
-                return {
-                    "detected_foods": detected_foods,
-                    "nutrition": total_nutrition,
-                    "warnings": list(set(all_warnings)),
-                    "scan_type": scan_type,
-                    "total_items": len(detected_foods),
-                    "source": source
-                }
-            else:
-                logger.info("YOLOv8 detected no food items, falling back to simulated")
+    detected_items = []
+    for result in results:
+        detected_items.extend(_food_items(result, model.names, image.scale))
+    return detected_items
 
-        except Exception as e:
-            logger.error(f"YOLOv8 detection failed: {e}. Falling back to simulated.")
 
-    # ── Fallback: simulated detection ───────────────────────────────
-    logger.info("Using simulated food detection")
-    food_keys = list(INDIAN_FOODS.keys())
+def _detect_with_yolo_batch(images: list, batch_size: int) -> list:
+    """Run YOLOv8 on many images, batch_size per forward pass; one item list per image."""
+    model = _get_yolo_model()
+    conf_threshold = _confidence_threshold()
 
-    if scan_type == "meal":
-        num_items = random.randint(3, 5)
-    else:
-        num_items = random.randint(1, 2)
+    detected = []
+    for start in range(0, len(images), batch_size):
+        chunk = images[start:start + batch_size]
+        results = model([image.image for image in chunk], imgsz=YOLO_INPUT_SIZE, conf=conf_threshold, verbose=False)
+        detected.extend(_food_items(result, model.names, image.scale) for image, result in zip(chunk, results))
+    return detected
 
-    selected_keys = random.sample(food_keys, min(num_items, len(food_keys)))
 
-    for key in selected_keys:
-        food = INDIAN_FOODS[key]
-        confidence = round(random.uniform(0.78, 0.99), 2)
+def _build_result(food_infos: list, confidences: list, scan_type: str, source: str) -> dict:
+    """Assemble the scan response from matched nutrition entries."""
+    detected_foods = []
+    total_nutrition = {"calories": 0, "protein": 0, "carbs": 0, "fat": 0, "fiber": 0}
+    all_warnings = []
 
+    for food, confidence in zip(food_infos, confidences):
         detected_foods.append({
             "name": food["name"],
             "confidence": confidence,
@@ -379,3 +336,95 @@ def detect_food(image_path: str, scan_type: str = "single") -> dict:
         "total_items": len(detected_foods),
         "source": source
     }
+
+
+def _yolo_result(yolo_results: list, scan_type: str) -> dict:
+    logger.info(f"YOLOv8 detected {len(yolo_results)} food items")
+    return _build_result(
+        [item["food_info"] for item in yolo_results],
+        [item["confidence"] for item in yolo_results],
+        scan_type, "yolov8"
+    )
+
+
+def _simulated_result(scan_type: str) -> dict:
+    """Fallback: pick plausible Indian dishes when YOLOv8 is unavailable or finds nothing."""
+    food_keys = list(INDIAN_FOODS.keys())
+
+    if scan_type == "meal":
+        num_items = random.randint(3, 5)
+    else:
+        num_items = random.randint(1, 2)
+
+    selected_keys = random.sample(food_keys, min(num_items, len(food_keys)))
+    return _build_result(
+        [INDIAN_FOODS[key] for key in selected_keys],
+        [round(random.uniform(0.78, 0.99), 2) for _ in selected_keys],
+        scan_type, "simulated"
+    )
+
+
+def detect_food(image, scan_type: str = "single") -> dict:
+    """
+    Detect food items in an image using YOLOv8.
+    `image` is a file path, image bytes, a PIL image or a prepare_for_yolo
+    result (None if the upload could not be decoded); it is shrunk to the
+    model input size before inference.
+    Falls back to simulated detection if ultralytics is not available.
+
+    Returns: dict with detected_foods, nutrition, warnings, scan_type, total_items
+    """
+    # ── Try real YOLOv8 detection ───────────────────────────────────
+    image = prepare_for_yolo(image)
+    if YOLO_AVAILABLE and image is not None:
+        try:
+            yolo_results = _detect_with_yolo(image)
+
+            if yolo_results:
+                return _yolo_result(yolo_results, scan_type)
+            else:
+                logger.info("YOLOv8 detected no food items, falling back to simulated")
+
+        except Exception as e:
+            logger.error(f"YOLOv8 detection failed: {e}. Falling back to simulated.")
+
+    # ── Fallback: simulated detection ───────────────────────────────
+    logger.info("Using simulated food detection")
+    return _simulated_result(scan_type)
+
+
+def detect_food_batch(images: list, scan_type: str = "single", batch_size: int = None) -> list:
+    """
+    Detect food items in many images (as for detect_food), batch_size images
+    per YOLOv8 forward pass. Returns one detect_food-style dict per image, in
+    input order. Undecodable images, images with no detections, or every image
+    if YOLOv8 is unavailable or fails, use the simulated fallback exactly as
+    detect_food does.
+    """
+    if batch_size is None:
+        try:
+            from config import YOLO_BATCH_SIZE
+            batch_size = YOLO_BATCH_SIZE
+        except Exception:
+            batch_size = 8
+    batch_size = max(1, batch_size)
+
+    images = [prepare_for_yolo(image) for image in images]
+    detections = [None] * len(images)
+    valid = [i for i, image in enumerate(images) if image is not None]
+    if YOLO_AVAILABLE and valid:
+        try:
+            for i, items in zip(valid, _detect_with_yolo_batch([images[i] for i in valid], batch_size)):
+                detections[i] = items
+        except Exception as e:
+            logger.error(f"YOLOv8 batch detection failed: {e}. Falling back to simulated.")
+            detections = [None] * len(images)
+
+    results = []
+    for yolo_results in detections:
+        if yolo_results:
+            results.append(_yolo_result(yolo_results, scan_type))
+        else:
+            results.append(_simulated_result(scan_type))
+    logger.info(f"Food batch: {len(images)} images in batches of {batch_size}")
+    return results
@@ -0,0 +1,185 @@
+"""HealthMitra Scan – Health Stats (per-user and per-patient totals maintained on write)
+
+Every report, food scan, voice session and risk assessment written through
+SessionLocal or AsyncSessionLocal is folded into the `health_stats` row of
+its user and of its patient in the same transaction, so `/api/auth/me` reads
+one row by primary key instead of counting four tables. Bulk Core inserts
+bypass the ORM and call record_inserts() themselves.
+
+Rebuild from the raw tables (after manual edits or a restore), from backend/:
+    python -m services.health_stats
+"""
+import logging
+from types import SimpleNamespace
+from collections import defaultdict
+
+from sqlalchemy import event, select, func, delete, insert, update, and_, or_, case, literal
+from sqlalchemy.dialects import sqlite, postgresql
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from database import SessionLocal
+from models import HealthStats, MedicalReport, FoodScan, VoiceSession, HealthTimeline
+
+logger = logging.getLogger(__name__)
+
+# Which counter each written row bumps; timeline rows only count as risk assessments
+COUNTERS = {
+    MedicalReport: "report_count",
+    FoodScan: "food_scan_count",
+    VoiceSession: "voice_session_count",
+    HealthTimeline: "risk_assessment_count",
+}
+SUBJECTS = (("user", "user_id"), ("patient", "patient_id"))
+_table = HealthStats.__table__
+
+
+def _counted(model, row) -> bool:
+    return model is not HealthTimeline or _value(row, "event_type") == "vitals"
+
+
+def _value(row, name: str):
+    return row.get(name) if isinstance(row, dict) else getattr(row, name, None)
+
+
+def _empty_stats() -> dict:
+    stats = {counter: 0 for counter in COUNTERS.values()}
+    stats.update(latest_risk_score=None, latest_risk_level=None, latest_report_at=None, last_activity=None)
+    return stats
+
+
+def _fold(stats: dict, counter: str, created_at, count: int = 1, report=None):
+    """Add `count` rows of one kind, the newest written at `created_at`, to `stats`."""
+    stats[counter] += count
+    if created_at is not None and (stats["last_activity"] is None or created_at > stats["last_activity"]):
+        stats["last_activity"] = created_at
+    if report and (stats["latest_report_at"] is None or created_at >= stats["latest_report_at"]):
+        stats.update(latest_report_at=created_at, latest_risk_score=report[0], latest_risk_level=report[1])
+
+
+# ── Incremental updates ─────────────────────────────────────────────
+
+def _merged(new) -> dict:
+    """SET clause folding the incoming deltas (`new`) into the stored row."""
+    c = _table.c
+    newer_report = and_(new.latest_report_at.isnot(None),
+                        or_(c.latest_report_at.is_(None), new.latest_report_at >= c.latest_report_at))
+    newer_activity = or_(c.last_activity.is_(None), new.last_activity > c.last_activity)
+    return {
+        **{counter: getattr(c, counter) + getattr(new, counter) for counter in COUNTERS.values()},
+        "latest_risk_score": case((newer_report, new.latest_risk_score), else_=c.latest_risk_score),
+        "latest_risk_level": case((newer_report, new.latest_risk_level), else_=c.latest_risk_level),
+        "latest_report_at": case((newer_report, new.latest_report_at), else_=c.latest_report_at),
+        "last_activity": case((newer_activity, new.last_activity), else_=c.last_activity),
+    }
+
+
+def _apply(connection, deltas: dict):
+    rows = [{"subject_type": kind, "subject_id": sid, **stats} for (kind, sid), stats in deltas.items()]
+    if not rows:
+        return
+    dialect = {"sqlite": sqlite, "postgresql": postgresql}.get(connection.dialect.name)
+    if dialect:
+        # One executemany upsert, atomic per row under concurrent writers
+        stmt = dialect.insert(_table)
+        stmt = stmt.on_conflict_do_update(index_elements=["subject_type", "subject_id"], set_=_merged(stmt.excluded))
+        connection.execute(stmt, rows)
+        return
+    for row in rows:  # other backends: update in place, insert the first time
+        new = SimpleNamespace(**{name: literal(value, _table.c[name].type) for name, value in row.items()})
+        result = connection.execute(update(_table).where(and_(
+            _table.c.subject_type == row["subject_type"], _table.c.subject_id == row["subject_id"],
+        )).values(_merged(new)))
+        if result.rowcount == 0:
+            connection.execute(insert(_table), row)
+
+
+def record_inserts(connection, model, rows):
+    """Fold newly inserted `rows` (ORM objects or column dicts) of `model` into health_stats."""
+    counter = COUNTERS[model]
+    deltas = defaultdict(_empty_stats)
+    for row in rows:
+        if not _counted(model, row):
+            continue
+        report = (_value(row, "risk_score"), _value(row, "risk_level")) if model is MedicalReport else None
+        for kind, column in SUBJECTS:
+            subject_id = _value(row, column)
+            if subject_id is not None:
+                _fold(deltas[(kind, subject_id)], counter, _value(row, "created_at"), report=report)
+    _apply(connection, deltas)
+
+
+@event.listens_for(SessionLocal, "after_flush")
+def _after_flush(session: Session, flush_context):
+    # created_at defaults are populated by now, and the upsert joins the flush's transaction.
+    # Async sessions flush on a greenlet, so the same sync calls work for them too.
+    by_model = defaultdict(list)
+    for obj in session.new:
+        if type(obj) in COUNTERS:
+            by_model[type(obj)].append(obj)
+    for model, rows in by_model.items():
+        record_inserts(session.connection(), model, rows)
+
+
+# ── Reads ───────────────────────────────────────────────────────────
+
+async def get_health_stats(db: AsyncSession, subject_type: str, subject_id: int) -> dict:
+    row = await db.get(HealthStats, (subject_type, subject_id))
+    if row is None:
+        return _empty_stats()
+    return {name: getattr(row, name) for name in _empty_stats()}
+
+
+# ── Rebuild ─────────────────────────────────────────────────────────
+
+def rebuild_health_stats(db: Session) -> int:
+    """
+    Recompute every health_stats row from the raw tables with grouped
+    queries and replace the table in one transaction. Returns the row count.
+    """
+    stats = defaultdict(_empty_stats)
+    for kind, column in SUBJECTS:
+        for model, counter in COUNTERS.items():
+            key = getattr(model, column)
+            query = select(key, func.count(), func.max(model.created_at)).where(key.isnot(None)).group_by(key)
+            if model is HealthTimeline:
+                query = query.where(HealthTimeline.event_type == "vitals")
+            for subject_id, count, last in db.execute(query):
+                _fold(stats[(kind, subject_id)], counter, last, count=count)
+
+        key = getattr(MedicalReport, column)
+        latest = select(
+            key.label("subject_id"),
+            MedicalReport.risk_score,
+            MedicalReport.risk_level,
+            MedicalReport.created_at,
+            func.row_number().over(
+                partition_by=key, order_by=(MedicalReport.created_at.desc(), MedicalReport.id.desc())
+            ).label("recency"),
+        ).where(key.isnot(None)).subquery()
+        for subject_id, score, level, created_at in db.execute(
+            select(latest.c.subject_id, latest.c.risk_score, latest.c.risk_level, latest.c.created_at)
+            .where(latest.c.recency == 1)
+        ):
+            stats[(kind, subject_id)].update(latest_report_at=created_at, latest_risk_score=score,
+                                             latest_risk_level=level)
+
+    db.execute(delete(HealthStats))
+    rows = [{"subject_type": kind, "subject_id": sid, **values} for (kind, sid), values in stats.items()]
+    if rows:
+        db.execute(insert(HealthStats), rows)
+    db.commit()
+    logger.info(f"Rebuilt health_stats: {len(rows)} rows")
+    return len(rows)
+
+
+if __name__ == "__main__":
+    from database import init_db
+
+    logging.basicConfig(level=logging.INFO)
+    init_db()
+    session = SessionLocal()
+    try:
+        print(f"health_stats rebuilt: {rebuild_health_stats(session)} rows")
+    finally:
+        session.close()
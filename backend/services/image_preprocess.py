@@ -0,0 +1,186 @@
+"""HealthMitra Scan – Image Preprocessing (shrink and normalise before OCR / YOLO)
+
+Phone photos arrive at 12 MP, far more pixels than either engine uses.
+JPEGs are decoded at a reduced scale straight from the DCT (Image.draft),
+so the full-resolution bitmap is never built.
+
+- OCR: EXIF orientation, downscale so the page comes out at OCR_DPI,
+  grayscale, deskew (projection-profile search) and adaptive (Bradley)
+  binarization, which evens out shadows and uneven lighting.
+- YOLO: EXIF orientation and a resize of the long side to the model input
+  size, which is what YOLOv8's letterbox would do after decoding everything.
+
+Shared by ocr_service.py and food_detector.py.
+"""
+import io
+import math
+import logging
+from typing import NamedTuple
+
+logger = logging.getLogger(__name__)
+
+try:
+    from PIL import Image, ImageOps, ImageFilter, ImageChops
+    PIL_AVAILABLE = True
+except ImportError:
+    PIL_AVAILABLE = False
+    logger.warning("Pillow not installed. Images go to OCR / YOLO unprocessed.")
+
+try:
+    import numpy as np
+    NUMPY_AVAILABLE = True
+except ImportError:
+    NUMPY_AVAILABLE = False
+    logger.warning("numpy not installed. OCR images will not be deskewed.")
+
+try:
+    from config import (OCR_DPI, OCR_PAGE_INCHES, OCR_DESKEW_MAX_ANGLE, OCR_BINARIZE_THRESHOLD,
+                        YOLO_INPUT_SIZE)
+except Exception:
+    OCR_DPI, OCR_PAGE_INCHES, OCR_DESKEW_MAX_ANGLE, OCR_BINARIZE_THRESHOLD = 200, 11.7, 15.0, 0.15
+    YOLO_INPUT_SIZE = 640
+
+DESKEW_SAMPLE_SIDE = 1200  # the skew angle is estimated on a copy this size
+DESKEW_MAX_POINTS = 60_000
+DESKEW_MIN_ANGLE = 0.2  # degrees; smaller corrections are not worth a resample
+PREPROCESS_VERSION = 1  # bump when the OCR preprocessing changes, so cached OCR text is redone
+
+
+class YoloInput(NamedTuple):
+    image: "Image.Image"
+    scale: float  # original pixels per input pixel; multiply boxes by this to map them back
+
+
+# ── Loading ─────────────────────────────────────────────────────────
+
+def _open(source):
+    """A PIL image (not yet decoded, for files and bytes) from a path, bytes or an image."""
+    if isinstance(source, Image.Image):
+        return source
+    return Image.open(source if isinstance(source, str) else io.BytesIO(source))
+
+
+def load_image(source, max_side: int, mode: str):
+    """
+    Open `source` (path, bytes or PIL image), decoding JPEGs at the smallest
+    DCT scale that still covers `max_side`, then apply the EXIF orientation,
+    convert to `mode` and shrink the long side to `max_side`.
+    Returns (image, long side of the original) or (None, 0) if it is not an image.
+    """
+    try:
+        image = _open(source)
+        width, height = image.size
+        original_side = max(width, height)
+        if original_side > max_side:
+            ratio = max_side / original_side
+            image.draft(mode, (math.ceil(width * ratio), math.ceil(height * ratio)))  # no-op except for JPEG
+        image = ImageOps.exif_transpose(image)  # phone photos carry rotation in EXIF
+        if image.mode != mode:
+            image = image.convert(mode)
+        if max(image.size) > max_side:
+            image.thumbnail((max_side, max_side), Image.LANCZOS)
+        return image, original_side
+    except Exception as e:
+        logger.warning(f"Could not decode image for preprocessing: {e}")
+        return None, 0
+
+
+# ── OCR ─────────────────────────────────────────────────────────────
+
+def ocr_settings_tag() -> str:
+    """The OCR preprocessing version and settings, for OCR cache keys."""
+    return (f"prep{PREPROCESS_VERSION}-{OCR_PAGE_INCHES:g}in-{OCR_DESKEW_MAX_ANGLE:g}deg"
+            f"-{OCR_BINARIZE_THRESHOLD:g}")
+
+
+def ocr_target_side(dpi: int = OCR_DPI) -> int:
+    """Long side, in pixels, of a photographed page at `dpi`."""
+    return int(dpi * OCR_PAGE_INCHES)
+
+
+def binarize(gray, threshold: float = OCR_BINARIZE_THRESHOLD):
+    """
+    Bradley–Roth adaptive threshold: a pixel is ink (0) when it is `threshold`
+    darker than the mean of its neighbourhood (about 1/50 of the long side),
+    paper (255) otherwise. Every step is an 8-bit PIL operation, so the
+    page is never copied into wider arrays.
+    """
+    radius = max(7, max(gray.size) // 100)
+    limit = gray.filter(ImageFilter.BoxBlur(radius)).point(lambda v: int(v * (1 - threshold)))
+    darker = ImageChops.subtract(limit, gray)  # > 0 where the pixel is below its local limit
+    return darker.point(lambda v: 0 if v else 255)
+
+
+def estimate_skew(gray) -> float:
+    """
+    Skew of the text lines in degrees (counter-clockwise positive), found by
+    rotating the ink pixels' coordinates and keeping the angle whose row
+    histogram has the sharpest peaks. 0.0 if there is no clear answer.
+    """
+    sample = gray.copy()
+    sample.thumbnail((DESKEW_SAMPLE_SIDE, DESKEW_SAMPLE_SIDE))
+    ys, xs = np.nonzero(np.asarray(binarize(sample)) == 0)
+    if len(ys) < 500:
+        return 0.0
+    if len(ys) > DESKEW_MAX_POINTS:
+        pick = np.random.default_rng(0).choice(len(ys), DESKEW_MAX_POINTS, replace=False)
+        ys, xs = ys[pick], xs[pick]
+    ys, xs = ys.astype(np.float32), xs.astype(np.float32)
+
+    def sharpness(angle: float) -> int:
+        theta = math.radians(angle)
+        rows = np.rint(ys * math.cos(theta) + xs * math.sin(theta)).astype(np.int64)
+        counts = np.bincount(rows - rows.min())
+        return int(np.dot(counts, counts))
+
+    coarse = np.arange(-OCR_DESKEW_MAX_ANGLE, OCR_DESKEW_MAX_ANGLE + 0.25, 0.5)
+    best = max(coarse, key=sharpness)
+    fine = np.arange(best - 0.5, best + 0.55, 0.05)
+    best = float(max(fine, key=sharpness))
+    if sharpness(best) < 1.05 * sharpness(0.0):
+        return 0.0  # no dominant line direction (a photo, or barely any text)
+    return round(best, 2)
+
+
+def deskew(gray, angle: float | None = None):
+    """Rotate a grayscale page so its text lines are horizontal."""
+    angle = estimate_skew(gray) if angle is None else angle
+    if abs(angle) < DESKEW_MIN_ANGLE:
+        return gray
+    return gray.rotate(-angle, resample=Image.BICUBIC, expand=True, fillcolor=255)
+
+
+def prepare_for_ocr(source, max_side: int | None = None):
+    """
+    Photo or rendered page (path, bytes or PIL image) → oriented, downscaled,
+    deskewed, binarized grayscale image for Tesseract. `max_side` defaults to
+    a page at OCR_DPI; pass the page's own size for PDF pages already rendered
+    at that DPI. Without numpy the deskew is skipped. None if the source is
+    not an image.
+    """
+    if not PIL_AVAILABLE:
+        return None
+    gray, _ = load_image(source, max_side or ocr_target_side(), "L")
+    if gray is None:
+        return None
+    if NUMPY_AVAILABLE:
+        gray = deskew(gray)
+    return binarize(gray)
+
+
+# ── YOLO ────────────────────────────────────────────────────────────
+
+def prepare_for_yolo(source, size: int = YOLO_INPUT_SIZE) -> YoloInput | None:
+    """
+    Photo (path, bytes or PIL image) → oriented RGB image whose long side is
+    the model input size, plus the factor that maps boxes back to the photo.
+    Passes a YoloInput through; None if the source is not an image.
+    """
+    if source is None or isinstance(source, YoloInput):
+        return source
+    if not PIL_AVAILABLE:
+        return None
+    image, original_side = load_image(source, size, "RGB")
+    if image is None:
+        return None
+    return YoloInput(image, original_side / max(image.size))
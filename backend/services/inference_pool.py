@@ -0,0 +1,67 @@
+"""HealthMitra Scan – Shared Inference Executor"""
+import asyncio
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from config import INFERENCE_WORKERS
+
+logger = logging.getLogger(__name__)
+
+# ── Single bounded pool for every blocking model call ───────────────
+_executor = None
+
+
+def get_inference_executor() -> ThreadPoolExecutor:
+    """Return the process-wide inference thread pool (created on first use)."""
+    global _executor
+    if _executor is None:
+        workers = max(1, INFERENCE_WORKERS)
+        logger.info(f"Starting inference executor with {workers} workers")
+        _executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="inference")
+    return _executor
+
+
+async def run_inference(func, *args):
+    """Run a blocking OCR / LLM / STT / detection call on the shared pool."""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(get_inference_executor(), func, *args)
+
+
+async def stream_inference(gen_func, *args):
+    """
+    Run a blocking generator (e.g. LLM token stream) on the shared pool and
+    yield its items to async code as soon as each one is produced.
+    """
+    loop = asyncio.get_running_loop()
+    queue = asyncio.Queue()
+    finished = object()
+    cancelled = threading.Event()
+
+    def produce():
+        try:
+            for item in gen_func(*args):
+                if cancelled.is_set():
+                    break  # client went away – stop generating
+                loop.call_soon_threadsafe(queue.put_nowait, item)
+        finally:
+            loop.call_soon_threadsafe(queue.put_nowait, finished)
+
+    producer = loop.run_in_executor(get_inference_executor(), produce)
+    try:
+        while True:
+            item = await queue.get()
+            if item is finished:
+                break
+            yield item
+        await producer  # re-raise anything the generator raised
+    finally:
+        cancelled.set()
+
+
+def shutdown_inference_executor():
+    """Stop the pool on application shutdown, letting running calls finish."""
+    global _executor
+    if _executor is not None:
+        _executor.shutdown(wait=True, cancel_futures=True)
+        _executor = None
@@ -0,0 +1,154 @@
+"""HealthMitra Scan – Lab Value Extractor (single pass over report text)"""
+import re
+from dataclasses import dataclass
+
+
+# ── Lab tests recognised in reports ─────────────────────────────────
+# Aliases are lowercase phrases; a space matches any (or no) whitespace.
+LAB_TESTS = {
+    "hemoglobin": {
+        "aliases": ["hemoglobin", "hb", "hgb"],
+        "normal_range": (12.0, 17.0),
+        "unit": "g/dL"
+    },
+    "fasting_blood_sugar": {
+        "aliases": ["fasting blood sugar", "fasting sugar", "fbs", "glucose fasting"],
+        "normal_range": (70.0, 100.0),
+        "unit": "mg/dL"
+    },
+    "hba1c": {
+        "aliases": ["hba1c", "glycated hemoglobin", "a1c"],
+        "normal_range": (4.0, 5.7),
+        "unit": "%"
+    },
+    "total_cholesterol": {
+        "aliases": ["total cholesterol"],
+        "normal_range": (0.0, 200.0),
+        "unit": "mg/dL"
+    },
+    "ldl": {
+        "aliases": ["ldl", "low density"],
+        "normal_range": (0.0, 100.0),
+        "unit": "mg/dL"
+    },
+    "hdl": {
+        "aliases": ["hdl", "high density"],
+        "normal_range": (40.0, 100.0),
+        "unit": "mg/dL"
+    },
+    "creatinine": {
+        "aliases": ["serum creatinine", "creatinine"],
+        "normal_range": (0.7, 1.3),
+        "unit": "mg/dL"
+    },
+    "sgpt": {
+        "aliases": ["sgpt", "alt", "alanine"],
+        "normal_range": (7.0, 56.0),
+        "unit": "U/L"
+    },
+    "sgot": {
+        "aliases": ["sgot", "ast", "aspartate"],
+        "normal_range": (10.0, 40.0),
+        "unit": "U/L"
+    },
+    "wbc": {
+        "aliases": ["wbc", "white blood cell", "leucocyte"],
+        "normal_range": (4000.0, 11000.0),
+        "unit": "/cumm",
+        "thousands_separator": True  # "12,500 /cumm"
+    },
+    "tsh": {
+        "aliases": ["tsh", "thyroid stimulating"],
+        "normal_range": (0.4, 4.0),
+        "unit": "mIU/L"
+    },
+    "vitamin_d": {
+        "aliases": ["vitamin d", "vit d", "25-oh"],
+        "normal_range": (30.0, 100.0),
+        "unit": "ng/mL"
+    },
+    "vitamin_b12": {
+        "aliases": ["vitamin b12", "vit b12", "cobalamin"],
+        "normal_range": (200.0, 900.0),
+        "unit": "pg/mL"
+    },
+}
+
+
+@dataclass(frozen=True)
+class LabFinding:
+    """One lab value read from a report, with its reference range."""
+    parameter: str
+    value: float
+    unit: str
+    normal_low: float
+    normal_high: float
+
+    @property
+    def status(self) -> str:
+        if self.value < self.normal_low:
+            return "low"
+        if self.value > self.normal_high:
+            return "high"
+        return "normal"
+
+    def to_dict(self) -> dict:
+        return {
+            "parameter": self.parameter,
+            "value": self.value,
+            "unit": self.unit,
+            "normal_range": f"{self.normal_low}-{self.normal_high}",
+            "status": self.status
+        }
+
+
+# ── Compiled once at import ─────────────────────────────────────────
+def _alias_key(alias: str) -> str:
+    return re.sub(r"\s+", "", alias)
+
+
+_ALIAS_TO_TEST = {
+    _alias_key(alias): name
+    for name, test in LAB_TESTS.items()
+    for alias in test["aliases"]
+}
+
+# One alternation of every alias. The leading lookahead lets the regex engine
+# skip positions that cannot start any alias without trying each branch, and
+# the optional "count" / "(ALT)" suffixes cover "WBC Count:" and "SGPT (ALT):".
+_LAB_VALUE_RE = re.compile(
+    r"(?=[" + "".join(sorted({a[0] for a in _ALIAS_TO_TEST})) + r"])\b"
+    r"(" + "|".join(
+        r"\s*".join(re.escape(word) for word in alias.split())
+        for test in LAB_TESTS.values() for alias in test["aliases"]
+    ) + r")"
+    r"(?:\s*count)?(?:\s*\([a-z0-9 ]{1,12}\))?"
+    r"\s*[:\-]?\s*(\d[\d.,]*)"
+)
+
+
+def extract_lab_values(text: str) -> dict[str, LabFinding]:
+    """
+    Read every known lab value from report text in a single regex pass.
+    Returns findings keyed by parameter, in the order they appear; only the
+    first valid reading of each parameter is kept.
+    """
+    findings: dict[str, LabFinding] = {}
+    for match in _LAB_VALUE_RE.finditer(text.lower()):
+        name = _ALIAS_TO_TEST[_alias_key(match.group(1))]
+        if name in findings:
+            continue
+
+        test = LAB_TESTS[name]
+        raw = match.group(2).rstrip(".,")
+        raw = raw.replace(",", "") if test.get("thousands_separator") else raw.split(",")[0]
+        try:
+            value = float(raw)
+        except ValueError:
+            continue
+
+        low, high = test["normal_range"]
+        findings[name] = LabFinding(name, value, test["unit"], low, high)
+        if len(findings) == len(LAB_TESTS):
+            break
+    return findings
@@ -1,17 +1,27 @@
 """HealthMitra Scan – LLM Service (Real Ollama Integration)"""
 import json
+import time
+import heapq
+import asyncio
 import logging
+import threading
+import itertools
+import queue
+from concurrent.futures import Future
 
 logger = logging.getLogger(__name__)
 
 # Try to import ollama SDK
 try:
     import ollama
+    import httpx
     OLLAMA_AVAILABLE = True
 except ImportError:
     OLLAMA_AVAILABLE = False
     logger.warning("ollama package not installed. Using fallback responses.")
 
+from services.answer_cache import answer_cache
+
 
 # ── Fallback responses when Ollama is not available ─────────────────
 FALLBACK_EXPLANATIONS = {
@@ -58,41 +68,296 @@ FALLBACK_QA = {
 }
 
 
+# ── Ollama model registry ───────────────────────────────────────────
+try:
+    from config import OLLAMA_MODEL, OLLAMA_PROBE_INTERVAL, OLLAMA_PROBE_MIN_BACKOFF, OLLAMA_PROBE_MAX_BACKOFF
+except Exception:
+    OLLAMA_MODEL, OLLAMA_PROBE_INTERVAL, OLLAMA_PROBE_MIN_BACKOFF, OLLAMA_PROBE_MAX_BACKOFF = "phi3", 30.0, 5.0, 300.0
+
+
+class ModelRegistry:
+    """
+    Cached view of the local Ollama server: whether it is reachable and which
+    model to use. A background task refreshes it, so request paths only read
+    memory and never wait on ollama.list().
+    """
+
+    def __init__(self):
+        self.running = False
+        self.model = None
+        self.models = []
+        self.last_probe = None
+        self.failures = 0
+        self._lock = threading.Lock()
+
+    def probe(self) -> bool:
+        """Query Ollama once and update the cached state."""
+        running, models = False, []
+        if OLLAMA_AVAILABLE:
+            try:
+                listing = ollama.list()
+                running = True
+                if listing and hasattr(listing, 'models'):
+                    models = [m.model for m in listing.models]
+            except Exception:
+                running = False
+
+        with self._lock:
+            was_running = self.running
+            self.running = running
+            self.models = models
+            self.model = self._pick_model(models)
+            self.last_probe = time.time()
+            self.failures = 0 if running else self.failures + 1
+
+        if running != was_running:
+            logger.info(f"Ollama is now {'online' if running else 'offline'} (model: {self.model or 'none'})")
+        return running
+
+    @staticmethod
+    def _pick_model(models: list) -> str | None:
+        """Prefer the configured OLLAMA_MODEL (e.g. phi3 → phi3:latest), else the first model."""
+        for name in models:
+            if name == OLLAMA_MODEL or name.split(":")[0] == OLLAMA_MODEL:
+                return name
+        return models[0] if models else None
+
+    def mark_offline(self):
+        """Record a failed call so later requests fall back until the next probe succeeds."""
+        with self._lock:
+            if self.running:
+                logger.warning("Ollama request failed to connect – marking offline")
+            self.running = False
+
+    def next_delay(self) -> float:
+        """Poll steadily while online; back off exponentially while offline."""
+        if self.running:
+            return OLLAMA_PROBE_INTERVAL
+        return min(OLLAMA_PROBE_MAX_BACKOFF, OLLAMA_PROBE_MIN_BACKOFF * 2 ** max(self.failures - 1, 0))
+
+    def ensure_probed(self):
+        """Probe synchronously once if the background task has not run yet (scripts, tests)."""
+        if self.last_probe is None:
+            self.probe()
+
+
+model_registry = ModelRegistry()
+_probe_task = None
+
+
+async def _probe_loop():
+    while True:
+        await asyncio.to_thread(model_registry.probe)
+        await asyncio.sleep(model_registry.next_delay())
+
+
+def start_model_probe():
+    """Start the background Ollama health probe (call from the app startup hook)."""
+    global _probe_task
+    if _probe_task is None and OLLAMA_AVAILABLE:
+        _probe_task = asyncio.get_running_loop().create_task(_probe_loop())
+
+
+async def stop_model_probe():
+    global _probe_task
+    if _probe_task is not None:
+        _probe_task.cancel()
+        try:
+            await _probe_task
+        except asyncio.CancelledError:
+            pass
+        _probe_task = None
+
+
+def _is_connection_error(e: Exception) -> bool:
+    return isinstance(e, (ConnectionError, httpx.TransportError))
+
+
+# ── LLM scheduler ───────────────────────────────────────────────────
+# Lower number = served first. Reports flagged critical by the emergency
+# check jump ahead of routine explanations and general Q&A.
+PRIORITY_EMERGENCY = 0
+PRIORITY_REPORT = 1
+PRIORITY_QA = 2
+
+try:
+    from config import LLM_CONCURRENCY, LLM_QUEUE_SIZE, LLM_MAX_QUEUE_WAIT
+except Exception:
+    LLM_CONCURRENCY, LLM_QUEUE_SIZE, LLM_MAX_QUEUE_WAIT = 2, 16, 60.0
+
+
+class LLMScheduler:
+    """
+    Single bounded priority queue in front of the local Ollama instance.
+    Every job carries a deadline (latest start time) and a fallback value:
+    when the queue is full, or a job waits past its deadline, its future
+    resolves to the fallback instead of timing out. A watchdog thread
+    resolves overdue jobs at their deadline, even while every worker is
+    busy. A full queue admits a more urgent job by dropping the least
+    urgent queued one. Futures the caller has cancelled are skipped.
+    """
+
+    def __init__(self, workers: int, max_queue: int):
+        self.workers = max(1, workers)
+        self.max_queue = max(1, max_queue)
+        self._heap = []
+        self._seq = itertools.count()
+        self._cond = threading.Condition()
+        self._threads = []
+        self._watchdog = None
+        self.running = 0
+        self.completed = 0
+        self.rejected = 0
+        self.expired = 0
+
+    def submit(self, func, *args, priority: int = PRIORITY_QA, timeout: float = None, fallback=None) -> Future:
+        """Queue func(*args) and return a Future for its result (or the fallback)."""
+        future = Future()
+        deadline = time.monotonic() + (timeout if timeout is not None else LLM_MAX_QUEUE_WAIT)
+        job = (priority, next(self._seq), deadline, func, args, fallback, future)
+
+        with self._cond:
+            self._start_workers()
+            if len(self._heap) >= self.max_queue:
+                least_urgent = max(self._heap, key=lambda j: (j[0], j[1]))
+                if least_urgent[0] <= priority:
+                    self.rejected += 1
+                    logger.warning(f"LLM queue full ({self.max_queue}) – degrading priority {priority} request")
+                    _resolve(future, fallback)
+                    return future
+                self._heap.remove(least_urgent)
+                heapq.heapify(self._heap)
+                self.rejected += 1
+                _resolve(least_urgent[6], least_urgent[5])
+            heapq.heappush(self._heap, job)
+            self._cond.notify_all()  # a worker, and the watchdog in case this deadline is the nearest
+        return future
+
+    def _start_workers(self):
+        """Start the workers and the watchdog, replacing any thread that has died."""
+        self._threads = [thread for thread in self._threads if thread.is_alive()]
+        names = {thread.name for thread in self._threads}
+        for index in range(self.workers):
+            if len(self._threads) >= self.workers:
+                break
+            if f"llm-{index}" not in names:
+                thread = threading.Thread(target=self._work, name=f"llm-{index}", daemon=True)
+                thread.start()
+                self._threads.append(thread)
+        if self._watchdog is None or not self._watchdog.is_alive():
+            self._watchdog = threading.Thread(target=self._expire_overdue, name="llm-watchdog", daemon=True)
+            self._watchdog.start()
+
+    def _work(self):
+        while True:
+            with self._cond:
+                while not self._heap:
+                    self._cond.wait()
+                priority, _, deadline, func, args, fallback, future = heapq.heappop(self._heap)
+                if time.monotonic() > deadline:
+                    self.expired += 1
+                    _resolve(future, fallback)
+                    continue
+                self.running += 1
+
+            try:
+                if future.set_running_or_notify_cancel():
+                    try:
+                        future.set_result(func(*args))
+                    except Exception as e:
+                        future.set_exception(e)
+            except Exception as e:
+                logger.error(f"LLM job failed on {threading.current_thread().name}: {e}")
+            finally:
+                with self._cond:
+                    self.running -= 1
+                    self.completed += 1
+
+    def _expire_overdue(self):
+        """Resolve queued jobs to their fallback as soon as their deadline passes."""
+        while True:
+            with self._cond:
+                now = time.monotonic()
+                overdue = [job for job in self._heap if job[2] <= now]
+                if overdue:
+                    self._heap = [job for job in self._heap if job[2] > now]
+                    heapq.heapify(self._heap)
+                    self.expired += len(overdue)
+                    for job in overdue:
+                        _resolve(job[6], job[5])
+                    continue
+                nearest = min((job[2] for job in self._heap), default=None)
+                self._cond.wait(None if nearest is None else nearest - now)
+
+    def stats(self) -> dict:
+        with self._cond:
+            queued = {"emergency": 0, "report": 0, "qa": 0}
+            names = {PRIORITY_EMERGENCY: "emergency", PRIORITY_REPORT: "report", PRIORITY_QA: "qa"}
+            for job in self._heap:
+                queued[names.get(job[0], "qa")] += 1
+            return {
+                "queued": queued,
+                "running": self.running,
+                "completed": self.completed,
+                "rejected": self.rejected,
+                "expired": self.expired,
+                "capacity": self.max_queue,
+                "concurrency": self.workers,
+            }
+
+
+llm_scheduler = LLMScheduler(LLM_CONCURRENCY, LLM_QUEUE_SIZE)
+
+
+def _resolve(future: Future, value):
+    """Set a queued job's result unless its caller has already cancelled it."""
+    if future.set_running_or_notify_cancel():
+        future.set_result(value)
+
+
+def _completed(value) -> Future:
+    future = Future()
+    future.set_result(value)
+    return future
+
+
 # ── Ollama LLM calls ────────────────────────────────────────────────
 def _check_ollama_running() -> bool:
-    """Check if Ollama server is running and accessible."""
+    """Check if Ollama server is running and accessible (cached, no network call)."""
     if not OLLAMA_AVAILABLE:
         return False
-    try:
-        ollama.list()
-        return True
-    except Exception:
-        return False
+    model_registry.ensure_probed()
+    return model_registry.running
 
 
 def _get_available_model() -> str | None:
-    """Get the first available model from Ollama."""
-    try:
-        models = ollama.list()
-        if models and hasattr(models, 'models') and len(models.models) > 0:
-            return models.models[0].model
+    """Get the model to use from the registry (cached, no network call)."""
+    return model_registry.model
+
+
+def _chat(prompt: str, num_predict: int) -> str | None:
+    """Run one Ollama chat on a scheduler worker; None on failure so callers fall back."""
+    model = _get_available_model()
+    if not model:
         return None
-    except Exception:
+    try:
+        response = ollama.chat(
+            model=model,
+            messages=[{"role": "user", "content": prompt}],
+            options={"temperature": 0.7, "num_predict": num_predict}
+        )
+        return response["message"]["content"]
+    except Exception as e:
+        logger.error(f"Ollama error: {e}")
+        if _is_connection_error(e):
+            model_registry.mark_offline()
         return None
 
 
-def explain_report(ocr_text: str, risk_level: str = "moderate", language: str = "en") -> str:
-    """
-    Explain a medical report in simple language.
-    Uses Ollama if available, falls back to pre-built responses.
-    """
-    if _check_ollama_running():
-        model = _get_available_model()
-        if model:
-            try:
-                lang_instruction = "in simple English" if language == "en" else "in simple Hindi (Devanagari script)"
+def _build_report_prompt(ocr_text: str, language: str = "en") -> str:
+    lang_instruction = "in simple English" if language == "en" else "in simple Hindi (Devanagari script)"
 
-                prompt = f"""You are HealthMitra, a caring and knowledgeable AI health assistant for Indian patients.
+    return f"""You are HealthMitra, a caring and knowledgeable AI health assistant for Indian patients.
 Analyze this medical report and explain it {lang_instruction} that a common person can understand.
 
 Instructions:
@@ -108,34 +373,40 @@ Medical Report:
 
 Provide your explanation:"""
 
-                response = ollama.chat(
-                    model=model,
-                    messages=[{"role": "user", "content": prompt}],
-                    options={"temperature": 0.7, "num_predict": 500}
-                )
-                return response["message"]["content"]
-            except Exception as e:
-                logger.error(f"Ollama error: {e}")
 
-    # Fallback
-    return FALLBACK_EXPLANATIONS.get(language, FALLBACK_EXPLANATIONS["en"]).get(
+def submit_report_explanation(ocr_text: str, risk_level: str = "moderate", language: str = "en",
+                              priority: int = PRIORITY_REPORT) -> Future:
+    """
+    Queue a report explanation on the LLM scheduler. The returned Future always
+    resolves to text: the pre-built explanation is used when Ollama is offline,
+    the queue is full, the deadline passes or generation fails.
+    """
+    fallback = FALLBACK_EXPLANATIONS.get(language, FALLBACK_EXPLANATIONS["en"]).get(
         risk_level, FALLBACK_EXPLANATIONS["en"]["moderate"]
     )
+    if not _check_ollama_running() or not _get_available_model():
+        return _completed(fallback)
 
+    def generate():
+        return _chat(_build_report_prompt(ocr_text, language), 500) or fallback
 
-def answer_health_question(question: str, language: str = "en", context: str = "") -> str:
+    return llm_scheduler.submit(generate, priority=priority, fallback=fallback)
+
+
+def explain_report(ocr_text: str, risk_level: str = "moderate", language: str = "en",
+                   priority: int = PRIORITY_REPORT) -> str:
     """
-    Answer a health-related question using LLM.
-    Uses Ollama if available, falls back to generic response.
+    Explain a medical report in simple language.
+    Uses Ollama if available, falls back to pre-built responses.
     """
-    if _check_ollama_running():
-        model = _get_available_model()
-        if model:
-            try:
-                lang_instruction = "in English" if language == "en" else "in Hindi (Devanagari script)"
-                context_text = f"\nPatient context: {context}" if context else ""
+    return submit_report_explanation(ocr_text, risk_level, language, priority).result()
 
-                prompt = f"""You are HealthMitra, a caring AI health assistant for Indian patients.
+
+def _build_qa_prompt(question: str, language: str = "en", context: str = "") -> str:
+    lang_instruction = "in English" if language == "en" else "in Hindi (Devanagari script)"
+    context_text = f"\nPatient context: {context}" if context else ""
+
+    return f"""You are HealthMitra, a caring AI health assistant for Indian patients.
 Answer the following health question {lang_instruction} in a helpful, empathetic manner.
 {context_text}
 
@@ -151,17 +422,109 @@ Question: {question}
 
 Your answer:"""
 
-                response = ollama.chat(
-                    model=model,
-                    messages=[{"role": "user", "content": prompt}],
-                    options={"temperature": 0.7, "num_predict": 400}
-                )
-                return response["message"]["content"]
-            except Exception as e:
-                logger.error(f"Ollama error: {e}")
 
-    # Fallback
-    return FALLBACK_QA.get(language, FALLBACK_QA["en"])
+def submit_health_answer(question: str, language: str = "en", context: str = "",
+                         priority: int = PRIORITY_QA) -> Future:
+    """
+    Queue a health answer on the LLM scheduler. Resolves to the cached answer,
+    the LLM answer, or the generic fallback when the LLM cannot serve it.
+    """
+    cached = answer_cache.get(question, language, context)
+    if cached:
+        return _completed(cached)
+
+    fallback = FALLBACK_QA.get(language, FALLBACK_QA["en"])
+    if not _check_ollama_running() or not _get_available_model():
+        return _completed(fallback)
+
+    def generate():
+        answer = _chat(_build_qa_prompt(question, language, context), 400)
+        if not answer:
+            return fallback
+        answer_cache.put(question, answer, language, context)
+        return answer
+
+    return llm_scheduler.submit(generate, priority=priority, fallback=fallback)
+
+
+def answer_health_question(question: str, language: str = "en", context: str = "") -> str:
+    """
+    Answer a health-related question using LLM.
+    Uses Ollama if available, falls back to generic response.
+    Real LLM answers are cached per language and patient context.
+    """
+    return submit_health_answer(question, language, context).result()
+
+
+_STREAM_END = object()
+
+
+def stream_health_answer(question: str, language: str = "en", context: str = ""):
+    """
+    Streaming variant of answer_health_question: yields text chunks as the
+    model generates them. The stream holds one scheduler slot for its whole
+    length. Yields the fallback answer in one chunk if Ollama is unavailable,
+    the queue rejects the request, or it fails before producing any text.
+    """
+    cached = answer_cache.get(question, language, context)
+    if cached:
+        yield cached
+        return
+
+    fallback = FALLBACK_QA.get(language, FALLBACK_QA["en"])
+    model = _get_available_model()
+    if not _check_ollama_running() or not model:
+        yield fallback
+        return
+
+    chunks = queue.Queue()
+    stopped = threading.Event()
+
+    def pump():
+        """Runs on a scheduler worker, forwarding tokens to the caller's thread."""
+        try:
+            stream = ollama.chat(
+                model=model,
+                messages=[{"role": "user", "content": _build_qa_prompt(question, language, context)}],
+                options={"temperature": 0.7, "num_predict": 400},
+                stream=True
+            )
+            parts = []
+            for chunk in stream:
+                if stopped.is_set():
+                    return  # caller went away – free the slot
+                text = chunk["message"]["content"]
+                if text:
+                    parts.append(text)
+                    chunks.put(text)
+            answer_cache.put(question, "".join(parts), language, context)
+        except Exception as e:
+            logger.error(f"Ollama streaming error: {e}")
+            if _is_connection_error(e):
+                model_registry.mark_offline()
+        finally:
+            chunks.put(_STREAM_END)
+
+    job = llm_scheduler.submit(pump, priority=PRIORITY_QA)
+    produced = False
+    try:
+        while True:
+            try:
+                item = chunks.get(timeout=0.25)
+            except queue.Empty:
+                if job.done() and chunks.empty():
+                    break  # rejected or expired in the queue – pump never ran
+                continue
+            if item is _STREAM_END:
+                break
+            produced = True
+            yield item
+    finally:
+        stopped.set()
+
+    # Fallback (keep any partial answer already sent)
+    if not produced:
+        yield fallback
 
 
 def get_ollama_status() -> dict:
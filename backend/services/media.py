@@ -0,0 +1,127 @@
+"""HealthMitra Scan – In-memory Media Ingest (decode uploads without a disk round-trip)"""
+import io
+import os
+import asyncio
+import logging
+import subprocess
+
+logger = logging.getLogger(__name__)
+
+try:
+    from PIL import Image, ImageOps
+    PIL_AVAILABLE = True
+except ImportError:
+    PIL_AVAILABLE = False
+    logger.warning("Pillow not installed. Uploaded images cannot be decoded in memory.")
+
+try:
+    import numpy as np
+    NUMPY_AVAILABLE = True
+except ImportError:
+    NUMPY_AVAILABLE = False
+
+try:
+    import aiofiles
+    AIOFILES_AVAILABLE = True
+except ImportError:
+    AIOFILES_AVAILABLE = False
+    logger.warning("aiofiles not installed. Uploads will be persisted from a worker thread.")
+
+try:
+    from config import UPLOAD_DIR, PERSIST_UPLOADS
+except Exception:
+    UPLOAD_DIR, PERSIST_UPLOADS = "uploads", True
+
+WHISPER_SAMPLE_RATE = 16000
+
+
+# ── Decoding ────────────────────────────────────────────────────────
+def decode_image(data: bytes | str):
+    """Decode uploaded bytes (or an image file's path) into an RGB PIL image; None if they are not an image."""
+    if not PIL_AVAILABLE:
+        return None
+    try:
+        image = Image.open(data if isinstance(data, str) else io.BytesIO(data))
+        image = ImageOps.exif_transpose(image)  # phone photos carry rotation in EXIF
+        return image.convert("RGB")
+    except Exception as e:
+        logger.warning(f"Could not decode uploaded image: {e}")
+        return None
+
+
+def decode_audio(data: bytes | str, sample_rate: int = WHISPER_SAMPLE_RATE):
+    """
+    Decode any ffmpeg-readable audio (webm, mp3, m4a, wav…) into the mono
+    float32 array Whisper expects, piping bytes through ffmpeg instead of a
+    temp file; a path (an assembled chunked upload) is read by ffmpeg itself.
+    None if ffmpeg is missing or the audio cannot be decoded.
+    """
+    if not NUMPY_AVAILABLE:
+        return None
+    from_path = isinstance(data, str)
+    cmd = [
+        "ffmpeg", "-nostdin", "-loglevel", "error", "-threads", "0",
+        "-i", data if from_path else "pipe:0",
+        "-f", "s16le", "-ac", "1", "-acodec", "pcm_s16le", "-ar", str(sample_rate),
+        "pipe:1",
+    ]
+    try:
+        out = subprocess.run(cmd, input=None if from_path else data, capture_output=True, check=True).stdout
+    except FileNotFoundError:
+        logger.error("ffmpeg not found – cannot decode uploaded audio")
+        return None
+    except subprocess.CalledProcessError as e:
+        logger.error(f"ffmpeg could not decode audio: {e.stderr.decode(errors='ignore').strip()}")
+        return None
+    return np.frombuffer(out, np.int16).astype(np.float32) / 32768.0
+
+
+# ── Optional persistence of the original upload ─────────────────────
+_pending_writes = set()
+
+
+def upload_path(filename: str, prefix: str = "") -> str:
+    return os.path.join(UPLOAD_DIR, f"{prefix}{os.path.basename(filename or 'upload')}")
+
+
+async def save_upload(data: bytes, file_path: str):
+    """Write an upload to disk without blocking the event loop."""
+    os.makedirs(os.path.dirname(file_path), exist_ok=True)
+    if AIOFILES_AVAILABLE:
+        async with aiofiles.open(file_path, "wb") as f:
+            await f.write(data)
+    else:
+        await asyncio.to_thread(_write_file, file_path, data)
+
+
+def _write_file(file_path: str, data: bytes):
+    with open(file_path, "wb") as f:
+        f.write(data)
+
+
+async def _save_in_background(data: bytes, file_path: str):
+    try:
+        await save_upload(data, file_path)
+    except OSError as e:
+        logger.error(f"Could not persist upload {file_path}: {e}")
+
+
+def persist_upload(data: bytes, filename: str, prefix: str = "") -> str | None:
+    """
+    Keep a copy of the original upload when PERSIST_UPLOADS is on. The write
+    runs in the background while the request is processed from memory; the
+    returned path is where the file will be, or None if nothing is kept.
+    """
+    if not PERSIST_UPLOADS:
+        return None
+    file_path = upload_path(filename, prefix)
+    task = asyncio.get_running_loop().create_task(_save_in_background(data, file_path))
+    _pending_writes.add(task)
+    task.add_done_callback(_pending_writes.discard)
+    return file_path
+
+
+async def flush_pending_uploads():
+    """Wait for background upload writes to finish (call from the shutdown hook)."""
+    if _pending_writes:
+        await asyncio.gather(*list(_pending_writes), return_exceptions=True)
@@ -0,0 +1,152 @@
+"""HealthMitra Scan – OCR Result Cache (SQLite, content-addressed, LRU)"""
+import os
+import json
+import time
+import sqlite3
+import hashlib
+import logging
+import threading
+
+logger = logging.getLogger(__name__)
+
+try:
+    from config import OCR_CACHE_PATH, OCR_CACHE_MAX_MB
+except Exception:
+    OCR_CACHE_PATH, OCR_CACHE_MAX_MB = "ocr_cache.db", 64.0
+
+
+def file_sha256(file_path: str) -> str:
+    """Hash a file in 1 MB blocks so large PDFs are never fully loaded."""
+    digest = hashlib.sha256()
+    with open(file_path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+class OCRCache:
+    """
+    Persistent cache of OCR results keyed by file hash + OCR settings.
+    Least-recently-used entries are evicted once the stored payload
+    exceeds the configured size limit.
+    """
+
+    def __init__(self, path: str, max_bytes: int):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._conn = None
+
+    def _connect(self) -> sqlite3.Connection:
+        if self._conn is None:
+            os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+            self._conn = sqlite3.connect(self.path, check_same_thread=False)
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("""
+                CREATE TABLE IF NOT EXISTS ocr_cache (
+                    cache_key TEXT PRIMARY KEY,
+                    ocr_text TEXT NOT NULL,
+                    findings TEXT,
+                    confidence REAL,
+                    risk_score REAL,
+                    risk_level TEXT,
+                    size_bytes INTEGER NOT NULL,
+                    created_at REAL NOT NULL,
+                    last_used REAL NOT NULL
+                )
+            """)
+            self._conn.execute("CREATE INDEX IF NOT EXISTS ix_ocr_cache_last_used ON ocr_cache (last_used)")
+            self._conn.commit()
+        return self._conn
+
+    @staticmethod
+    def make_key(file_hash: str, lang: str, dpi: int, preprocessing: str | None = None) -> str:
+        """`preprocessing` names the image preprocessing settings, so changing them misses old entries."""
+        return f"{file_hash}:{lang}:{dpi}" + (f":{preprocessing}" if preprocessing else "")
+
+    def get(self, key: str) -> dict | None:
+        """Return the cached OCR result for a key, or None on a miss."""
+        with self._lock:
+            try:
+                conn = self._connect()
+                row = conn.execute(
+                    "SELECT ocr_text, findings, confidence, risk_score, risk_level "
+                    "FROM ocr_cache WHERE cache_key = ?", (key,)
+                ).fetchone()
+                if row is None:
+                    self.misses += 1
+                    return None
+                conn.execute("UPDATE ocr_cache SET last_used = ? WHERE cache_key = ?", (time.time(), key))
+                conn.commit()
+            except sqlite3.Error as e:
+                logger.error(f"OCR cache read failed: {e}")
+                self.misses += 1
+                return None
+            self.hits += 1
+
+        ocr_text, findings, confidence, risk_score, risk_level = row
+        return {
+            "ocr_text": ocr_text,
+            "risk_score": risk_score,
+            "risk_level": risk_level,
+            "confidence": confidence,
+            "medical_findings": json.loads(findings) if findings else [],
+        }
+
+    def put(self, key: str, result: dict):
+        """Store an OCR result and evict LRU entries beyond the size limit."""
+        findings = json.dumps(result.get("medical_findings", []), ensure_ascii=False)
+        size = len(result["ocr_text"].encode("utf-8")) + len(findings.encode("utf-8"))
+        now = time.time()
+        with self._lock:
+            try:
+                conn = self._connect()
+                conn.execute(
+                    "INSERT OR REPLACE INTO ocr_cache (cache_key, ocr_text, findings, confidence, "
+                    "risk_score, risk_level, size_bytes, created_at, last_used) "
+                    "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                    (key, result["ocr_text"], findings, result.get("confidence"),
+                     result.get("risk_score"), result.get("risk_level"), size, now, now)
+                )
+                self._evict(conn)
+                conn.commit()
+            except sqlite3.Error as e:
+                logger.error(f"OCR cache write failed: {e}")
+
+    def _evict(self, conn: sqlite3.Connection):
+        total = conn.execute("SELECT COALESCE(SUM(size_bytes), 0) FROM ocr_cache").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        rows = conn.execute("SELECT cache_key, size_bytes FROM ocr_cache ORDER BY last_used ASC")
+        stale = []
+        for cache_key, size in rows:
+            if total <= self.max_bytes:
+                break
+            stale.append((cache_key,))
+            total -= size
+        conn.executemany("DELETE FROM ocr_cache WHERE cache_key = ?", stale)
+        logger.info(f"OCR cache evicted {len(stale)} entries")
+
+    def stats(self) -> dict:
+        """Hit/miss counters since startup plus current on-disk usage."""
+        with self._lock:
+            try:
+                entries, size = self._connect().execute(
+                    "SELECT COUNT(*), COALESCE(SUM(size_bytes), 0) FROM ocr_cache"
+                ).fetchone()
+            except sqlite3.Error:
+                entries, size = 0, 0
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_ratio": round(self.hits / lookups, 3) if lookups else 0.0,
+                "entries": entries,
+                "size_mb": round(size / (1024 * 1024), 2),
+                "max_mb": round(self.max_bytes / (1024 * 1024), 2),
+            }
+
+
+ocr_cache = OCRCache(OCR_CACHE_PATH, int(OCR_CACHE_MAX_MB * 1024 * 1024))
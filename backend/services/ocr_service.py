@@ -1,7 +1,8 @@
 """HealthMitra Scan – OCR Service (Real Tesseract OCR with fallback)"""
 import os
-import re
+import hashlib
 import logging
+from concurrent.futures import ProcessPoolExecutor
 
 logger = logging.getLogger(__name__)
 
@@ -15,7 +16,7 @@ except ImportError:
     logger.warning("pytesseract / Pillow not installed. Using simulated OCR.")
 
 try:
-    from pdf2image import convert_from_path
+    from pdf2image import convert_from_path, pdfinfo_from_path
     PDF_SUPPORT = True
 except ImportError:
     PDF_SUPPORT = False
@@ -30,111 +31,24 @@ if TESSERACT_AVAILABLE:
     except Exception:
         pass  # Use default system PATH
 
+try:
+    from config import OCR_LANG, OCR_DPI, OCR_PAGE_WORKERS, OCR_PREPROCESS
+except Exception:
+    OCR_LANG, OCR_DPI, OCR_PAGE_WORKERS, OCR_PREPROCESS = "eng+hin", 200, os.cpu_count() or 2, True
 
-# ── Medical value parsing for risk assessment ───────────────────────
-MEDICAL_PATTERNS = {
-    "hemoglobin": {
-        "pattern": r"(?:hemoglobin|hb|hgb)\s*[:\-]?\s*([\d.]+)\s*(?:g/?dl|gm/?dl)?",
-        "normal_range": (12.0, 17.0),
-        "unit": "g/dL"
-    },
-    "fasting_blood_sugar": {
-        "pattern": r"(?:fasting\s*(?:blood\s*)?sugar|fbs|glucose\s*fasting)\s*[:\-]?\s*([\d.]+)",
-        "normal_range": (70.0, 100.0),
-        "unit": "mg/dL"
-    },
-    "hba1c": {
-        "pattern": r"(?:hba1c|glycated\s*hemoglobin|a1c)\s*[:\-]?\s*([\d.]+)\s*%?",
-        "normal_range": (4.0, 5.7),
-        "unit": "%"
-    },
-    "total_cholesterol": {
-        "pattern": r"(?:total\s*cholesterol)\s*[:\-]?\s*([\d.]+)",
-        "normal_range": (0.0, 200.0),
-        "unit": "mg/dL"
-    },
-    "ldl": {
-        "pattern": r"(?:ldl|low\s*density)\s*[:\-]?\s*([\d.]+)",
-        "normal_range": (0.0, 100.0),
-        "unit": "mg/dL"
-    },
-    "hdl": {
-        "pattern": r"(?:hdl|high\s*density)\s*[:\-]?\s*([\d.]+)",
-        "normal_range": (40.0, 100.0),
-        "unit": "mg/dL"
-    },
-    "creatinine": {
-        "pattern": r"(?:creatinine|serum\s*creatinine)\s*[:\-]?\s*([\d.]+)",
-        "normal_range": (0.7, 1.3),
-        "unit": "mg/dL"
-    },
-    "sgpt": {
-        "pattern": r"(?:sgpt|alt|alanine)\s*[:\-]?\s*([\d.]+)",
-        "normal_range": (7.0, 56.0),
-        "unit": "U/L"
-    },
-    "sgot": {
-        "pattern": r"(?:sgot|ast|aspartate)\s*[:\-]?\s*([\d.]+)",
-        "normal_range": (10.0, 40.0),
-        "unit": "U/L"
-    },
-    "wbc": {
-        "pattern": r"(?:wbc|white\s*blood\s*cell|leucocyte)\s*(?:count)?\s*[:\-]?\s*([\d,]+)",
-        "normal_range": (4000.0, 11000.0),
-        "unit": "/cumm"
-    },
-    "tsh": {
-        "pattern": r"(?:tsh|thyroid\s*stimulating)\s*[:\-]?\s*([\d.]+)",
-        "normal_range": (0.4, 4.0),
-        "unit": "mIU/L"
-    },
-    "vitamin_d": {
-        "pattern": r"(?:vitamin\s*d|vit\s*d|25-oh)\s*[:\-]?\s*([\d.]+)",
-        "normal_range": (30.0, 100.0),
-        "unit": "ng/mL"
-    },
-    "vitamin_b12": {
-        "pattern": r"(?:vitamin\s*b12|vit\s*b12|cobalamin)\s*[:\-]?\s*([\d.]+)",
-        "normal_range": (200.0, 900.0),
-        "unit": "pg/mL"
-    },
-}
+from services.ocr_cache import ocr_cache, file_sha256
+from services.lab_parser import extract_lab_values
+from services.media import decode_image
+from services.image_preprocess import prepare_for_ocr, ocr_settings_tag
 
 
+# ── Medical value parsing for risk assessment ───────────────────────
 def _parse_medical_values(text: str) -> dict:
     """Parse medical values from OCR text and assess abnormalities."""
-    findings = []
-    abnormal_count = 0
-    total_checked = 0
-
-    text_lower = text.lower()
-
-    for name, config in MEDICAL_PATTERNS.items():
-        match = re.search(config["pattern"], text_lower)
-        if match:
-            try:
-                value_str = match.group(1).replace(",", "")
-                value = float(value_str)
-                low, high = config["normal_range"]
-                total_checked += 1
-
-                status = "normal"
-                if value < low:
-                    status = "low"
-                    abnormal_count += 1
-                elif value > high:
-                    status = "high"
-                    abnormal_count += 1
-
-                findings.append({
-                    "parameter": name,
-                    "value": value,
-                    "unit": config["unit"],
-                    "normal_range": f"{low}-{high}",
-                    "status": status
-                })
-            except (ValueError, IndexError):
-                continue
+    lab_values = extract_lab_values(text)
+    findings = [finding.to_dict() for finding in lab_values.values()]
+    abnormal_count = sum(1 for finding in lab_values.values() if finding.status != "normal")
+    total_checked = len(lab_values)
 
     # Calculate risk score based on abnormal findings
     if total_checked > 0:
@@ -159,36 +73,81 @@ def _parse_medical_values(text: str) -> dict:
     }
 
 
+def _ocr_image(image) -> str:
+    """Run Tesseract on a PIL image, dropping to English-only if Hindi data is missing."""
+    try:
+        text = pytesseract.image_to_string(image, lang=OCR_LANG)
+    except pytesseract.TesseractError:
+        text = pytesseract.image_to_string(image, lang="eng")
+    return text.strip()
+
+
 def _ocr_from_image(file_path: str) -> str:
     """Extract text from an image file using Tesseract."""
     try:
-        image = Image.open(file_path)
-        # Use English + Hindi language data if available
-        try:
-            text = pytesseract.image_to_string(image, lang="eng+hin")
-        except pytesseract.TesseractError:
-            text = pytesseract.image_to_string(image, lang="eng")
-        return text.strip()
+        image = prepare_for_ocr(file_path) if OCR_PREPROCESS else Image.open(file_path)
+        return _ocr_image(image) if image is not None else ""
     except Exception as e:
         logger.error(f"OCR image extraction error: {e}")
         return ""
 
 
+# ── Per-page PDF OCR on a process pool ──────────────────────────────
+_page_pool = None
+
+
+def get_page_pool() -> ProcessPoolExecutor:
+    """Process pool for PDF pages – Tesseract is CPU-bound, so one worker per core."""
+    global _page_pool
+    if _page_pool is None:
+        workers = max(1, OCR_PAGE_WORKERS)
+        logger.info(f"Starting PDF page OCR pool with {workers} processes")
+        _page_pool = ProcessPoolExecutor(max_workers=workers)
+    return _page_pool
+
+
+def shutdown_page_pool():
+    global _page_pool
+    if _page_pool is not None:
+        _page_pool.shutdown(wait=False, cancel_futures=True)
+        _page_pool = None
+
+
+def get_pdf_page_count(file_path: str) -> int:
+    """Read the page count from the PDF header without rendering anything."""
+    return int(pdfinfo_from_path(file_path)["Pages"])
+
+
+def ocr_pdf_page(file_path: str, page_number: int) -> str:
+    """Render a single PDF page (1-based) and OCR it. Runs inside a pool worker."""
+    pages = convert_from_path(file_path, dpi=OCR_DPI, first_page=page_number, last_page=page_number)
+    if not pages:
+        return ""
+    page = pages[0]
+    if OCR_PREPROCESS:
+        page = prepare_for_ocr(page, max_side=max(page.size))  # already rendered at OCR_DPI
+    return _ocr_image(page)
+
+
+def analyze_pdf_page(file_path: str, page_number: int) -> dict:
+    """OCR one PDF page and parse its lab values, for streamed page results."""
+    text = ocr_pdf_page(file_path, page_number)
+    return {
+        "page": page_number,
+        "text": text,
+        "findings": _parse_medical_values(text)["findings"],
+    }
+
+
 def _ocr_from_pdf(file_path: str) -> str:
-    """Extract text from a PDF file by converting pages to images first."""
+    """Extract text from a PDF, rendering and OCR-ing pages in parallel one at a time."""
     if not PDF_SUPPORT:
         logger.warning("pdf2image not available for PDF OCR")
         return ""
     try:
-        images = convert_from_path(file_path)
-        all_text = []
-        for page_img in images:
-            try:
-                text = pytesseract.image_to_string(page_img, lang="eng+hin")
-            except pytesseract.TesseractError:
-                text = pytesseract.image_to_string(page_img, lang="eng")
-            all_text.append(text.strip())
-        return "\n\n".join(all_text)
+        page_count = get_pdf_page_count(file_path)
+        pages = get_page_pool().map(ocr_pdf_page, [file_path] * page_count, range(1, page_count + 1))
+        return "\n\n".join(pages)
     except Exception as e:
         logger.error(f"OCR PDF extraction error: {e}")
         return ""
@@ -296,15 +255,74 @@ All values within normal range. Good health status.
 ]
 
 
+def lookup_ocr_cache(file_path: str) -> tuple[str | None, dict | None]:
+    """Return (cache_key, cached_result) for a file; the key is None if it cannot be hashed."""
+    try:
+        file_hash = file_sha256(file_path)
+    except OSError as e:
+        logger.error(f"Could not hash {file_path} for OCR cache: {e}")
+        return None, None
+    return _lookup_cache_key(file_hash, os.path.basename(file_path))
+
+
+def _lookup_cache_key(content_hash: str, label: str) -> tuple[str, dict | None]:
+    cache_key = ocr_cache.make_key(content_hash, OCR_LANG, OCR_DPI, ocr_settings_tag() if OCR_PREPROCESS else None)
+    cached = ocr_cache.get(cache_key)
+    if cached:
+        logger.info(f"OCR cache hit for {label}")
+        return cache_key, {**cached, "source": "ocr_cache"}
+    return cache_key, None
+
+
+def build_ocr_result(ocr_text: str) -> dict | None:
+    """Parse medical values from real OCR text; None if too little text was read."""
+    if not ocr_text or len(ocr_text.strip()) <= 20:
+        return None
+
+    analysis = _parse_medical_values(ocr_text)
+    confidence = min(0.95, 0.60 + (len(ocr_text) / 5000))
+
+    logger.info(f"Real OCR extracted {len(ocr_text)} chars, "
+                f"found {analysis['total_checked']} medical values, "
+                f"{analysis['abnormal_count']} abnormal")
+
+    return {
+        "ocr_text": ocr_text,
+        "risk_score": analysis["risk_score"],
+        "risk_level": analysis["risk_level"],
+        "confidence": round(confidence, 2),
+        "medical_findings": analysis["findings"],
+        "source": "tesseract_ocr"
+    }
+
+
+def simulated_ocr_result() -> dict:
+    """Pick a sample report when Tesseract is unavailable or OCR failed."""
+    logger.info("Using simulated OCR (Tesseract not available or OCR failed)")
+    report = random.choice(SAMPLE_REPORTS)
+    return {
+        "ocr_text": report["text"],
+        "risk_score": report["risk_score"],
+        "risk_level": report["risk_level"],
+        "confidence": round(random.uniform(0.85, 0.98), 2),
+        "source": "simulated"
+    }
+
+
 def extract_text_from_file(file_path: str) -> dict:
     """
     Extract text from a medical report using Tesseract OCR.
     Falls back to simulated data if Tesseract is not available.
 
     Supports: JPEG, PNG, BMP, TIFF (direct), PDF (via pdf2image).
+    Results are cached by file hash, so re-uploads of the same report skip OCR.
     """
     # ── Try real OCR first ──────────────────────────────────────────
     if TESSERACT_AVAILABLE:
+        cache_key, cached = lookup_ocr_cache(file_path)
+        if cached:
+            return cached
+
         try:
             ext = os.path.splitext(file_path)[1].lower()
 
@@ -316,36 +334,42 @@ def extract_text_from_file(file_path: str) -> dict:
                 # Try as image anyway
                 ocr_text = _ocr_from_image(file_path)
 
-            if ocr_text and len(ocr_text.strip()) > 20:
-                # Successfully extracted text — parse medical values
-                analysis = _parse_medical_values(ocr_text)
-                confidence = min(0.95, 0.60 + (len(ocr_text) / 5000))
-
-                logger.info(f"Real OCR extracted {len(ocr_text)} chars, "
-                            f"found {analysis['total_checked']} medical values, "
-                            f"{analysis['abnormal_count']} abnormal")
-
-                return {
-                    "ocr_text": ocr_text,
-                    "risk_score": analysis["risk_score"],
-                    "risk_level": analysis["risk_level"],
-                    "confidence": round(confidence, 2),
-                    "medical_findings": analysis["findings"],
-                    "source": "tesseract_ocr"
-                }
-            else:
-                logger.warning("OCR returned very little text, falling back to simulated data")
+            result = build_ocr_result(ocr_text)
+            if result:
+                if cache_key:
+                    ocr_cache.put(cache_key, result)
+                return result
+            logger.warning("OCR returned very little text, falling back to simulated data")
 
         except Exception as e:
             logger.error(f"Real OCR failed: {e}. Falling back to simulated data.")
 
     # ── Fallback: simulated OCR ─────────────────────────────────────
-    logger.info("Using simulated OCR (Tesseract not available or OCR failed)")
-    report = random.choice(SAMPLE_REPORTS)
-    return {
-        "ocr_text": report["text"],
-        "risk_score": report["risk_score"],
-        "risk_level": report["risk_level"],
-        "confidence": round(random.uniform(0.85, 0.98), 2),
-        "source": "simulated"
-    }
+    return simulated_ocr_result()
+
+
+def extract_text_from_image_bytes(data: bytes) -> dict:
+    """
+    In-memory variant of extract_text_from_file for image uploads: the bytes
+    are decoded straight into a PIL image, never written and re-read. Shares
+    the OCR cache with file uploads (same content hash), and the same
+    simulated fallback.
+    """
+    if TESSERACT_AVAILABLE:
+        cache_key, cached = _lookup_cache_key(hashlib.sha256(data).hexdigest(), "uploaded image")
+        if cached:
+            return cached
+
+        image = prepare_for_ocr(data) if OCR_PREPROCESS else decode_image(data)
+        if image is not None:
+            try:
+                result = build_ocr_result(_ocr_image(image))
+                if result:
+                    ocr_cache.put(cache_key, result)
+                    return result
+                logger.warning("OCR returned very little text, falling back to simulated data")
+            except Exception as e:
+                logger.error(f"Real OCR failed: {e}. Falling back to simulated data.")
+
+    # ── Fallback: simulated OCR ─────────────────────────────────────
+    return simulated_ocr_result()
@@ -0,0 +1,57 @@
+"""HealthMitra Scan – Keyset Pagination (opaque cursors over created_at, id)"""
+import json
+import base64
+import binascii
+from datetime import datetime
+
+from sqlalchemy import Select, and_, or_
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from config import PAGE_SIZE_MAX
+
+
+class InvalidCursor(ValueError):
+    """A cursor token that was not issued by this API (answered with HTTP 400)."""
+
+
+def encode_cursor(created_at: datetime, row_id: int) -> str:
+    raw = json.dumps([created_at.isoformat(), row_id], separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(token: str) -> tuple[datetime, int]:
+    try:
+        raw = base64.urlsafe_b64decode(token + "=" * (-len(token) % 4))
+        created_at, row_id = json.loads(raw)
+        return datetime.fromisoformat(created_at), int(row_id)
+    except (binascii.Error, ValueError, TypeError) as e:
+        raise InvalidCursor("Invalid or expired cursor") from e
+
+
+async def keyset_page(db: AsyncSession, stmt: Select, model, cursor: str | None,
+                      limit: int) -> tuple[list, str | None]:
+    """
+    One page of `stmt` (a select of `model`), newest first, ordered by (created_at, id) so ties are
+    stable. Instead of OFFSET, the cursor carries the last row's key and the
+    next page starts strictly after it, which with the (…, created_at)
+    indexes costs the same on page 1 and page 1000. Returns (rows,
+    next_cursor); next_cursor is None on the last page.
+    """
+    limit = max(1, min(limit, PAGE_SIZE_MAX))
+    stmt = stmt.order_by(model.created_at.desc(), model.id.desc())
+    if cursor:
+        created_at, row_id = decode_cursor(cursor)
+        stmt = stmt.where(or_(
+            model.created_at < created_at,
+            and_(model.created_at == created_at, model.id < row_id),
+        ))
+
+    rows = (await db.scalars(stmt.limit(limit + 1))).all()  # one extra row tells whether another page exists
+    if len(rows) <= limit:
+        return rows, None
+    last = rows[limit - 1]
+    return rows[:limit], encode_cursor(last.created_at, last.id)
+
+
+def page_response(items: list, next_cursor: str | None) -> dict:
+    return {"items": items, "next_cursor": next_cursor, "count": len(items)}
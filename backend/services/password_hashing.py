@@ -0,0 +1,49 @@
+"""HealthMitra Scan – Password Hashing Pool (bcrypt off the event loop)"""
+import asyncio
+import logging
+from concurrent.futures import ThreadPoolExecutor
+
+import bcrypt
+
+from config import BCRYPT_WORKERS
+
+logger = logging.getLogger(__name__)
+
+# ── Dedicated pool, separate from inference ─────────────────────────
+# A login burst must neither block the event loop nor queue behind OCR / LLM
+# calls on the inference pool; its size caps the cores hashing may take.
+_executor = None
+
+
+def get_hashing_executor() -> ThreadPoolExecutor:
+    global _executor
+    if _executor is None:
+        workers = max(1, BCRYPT_WORKERS)
+        logger.info(f"Starting password hashing executor with {workers} workers")
+        _executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="bcrypt")
+    return _executor
+
+
+def _hash(password: str) -> str:
+    return bcrypt.hashpw(password.encode(), bcrypt.gensalt()).decode()
+
+
+def _check(password: str, hashed: str) -> bool:
+    return bcrypt.checkpw(password.encode(), hashed.encode())
+
+
+async def hash_password(password: str) -> str:
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(get_hashing_executor(), _hash, password)
+
+
+async def verify_password(password: str, hashed: str) -> bool:
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(get_hashing_executor(), _check, password, hashed)
+
+
+def shutdown_hashing_executor():
+    global _executor
+    if _executor is not None:
+        _executor.shutdown(wait=True, cancel_futures=True)
+        _executor = None
@@ -0,0 +1,79 @@
+"""HealthMitra Scan – Patient Summaries (report and activity aggregates in one query)"""
+from sqlalchemy import select, func, and_
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from models import Patient, MedicalReport, HealthTimeline
+
+
+def _empty_summary() -> dict:
+    return {
+        "report_count": 0,
+        "avg_risk_score": 0.0,
+        "latest_risk_score": None,
+        "latest_risk_level": None,
+        "last_activity": None,
+    }
+
+
+async def patient_summaries(db: AsyncSession, patient_ids: list[int]) -> dict[int, dict]:
+    """
+    Report count, average and latest risk, and last activity for every
+    patient in `patient_ids`, in a single SQL statement however many
+    patients are asked for. Window functions rank each patient's reports and
+    total them in the same pass; timeline events give the last activity.
+    """
+    if not patient_ids:
+        return {}
+
+    by_patient = MedicalReport.patient_id
+    reports = select(
+        by_patient.label("patient_id"),
+        MedicalReport.risk_score,
+        MedicalReport.risk_level,
+        MedicalReport.created_at,
+        func.row_number().over(
+            partition_by=by_patient, order_by=(MedicalReport.created_at.desc(), MedicalReport.id.desc())
+        ).label("recency"),
+        func.count().over(partition_by=by_patient).label("report_count"),
+        # Unscored reports count as 0 towards the average, as before
+        func.sum(func.coalesce(MedicalReport.risk_score, 0)).over(partition_by=by_patient).label("risk_total"),
+    ).where(by_patient.in_(patient_ids)).subquery()
+
+    activity = select(
+        HealthTimeline.patient_id,
+        func.max(HealthTimeline.created_at).label("last_activity"),
+    ).where(HealthTimeline.patient_id.in_(patient_ids)).group_by(HealthTimeline.patient_id).subquery()
+
+    stmt = (
+        select(
+            Patient.id,
+            reports.c.report_count,
+            reports.c.risk_total,
+            reports.c.risk_score,
+            reports.c.risk_level,
+            reports.c.created_at,
+            activity.c.last_activity,
+        )
+        .outerjoin(reports, and_(reports.c.patient_id == Patient.id, reports.c.recency == 1))
+        .outerjoin(activity, activity.c.patient_id == Patient.id)
+        .where(Patient.id.in_(patient_ids))
+    )
+
+    summaries = {}
+    for patient_id, count, risk_total, latest_score, latest_level, last_report, last_timeline in await db.execute(stmt):
+        summary = _empty_summary()
+        if count:
+            summary.update(
+                report_count=count,
+                avg_risk_score=round(risk_total / count, 1),
+                latest_risk_score=latest_score,
+                latest_risk_level=latest_level,
+            )
+        last = max((t for t in (last_report, last_timeline) if t is not None), default=None)
+        summary["last_activity"] = last.isoformat() if last else None
+        summaries[patient_id] = summary
+    return summaries
+
+
+async def patient_summary(db: AsyncSession, patient_id: int) -> dict:
+    return (await patient_summaries(db, [patient_id])).get(patient_id, _empty_summary())
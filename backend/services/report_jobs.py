@@ -0,0 +1,259 @@
+"""HealthMitra Scan – Background Report Jobs (submit, dispatch, recover)
+
+An upload is hashed, written to UPLOAD_DIR/jobs and recorded as a queued
+ReportJob before the client gets its job id, so a dropped connection loses
+nothing: the client polls for the result, or gets it by webhook. Uploading
+the same file for the same patient again returns the existing job, and
+retries it if it had failed. Jobs run in a pool of worker processes
+(services/report_worker.py); a periodic sweep requeues jobs whose worker
+stopped heartbeating, which after a restart is every job that was running.
+"""
+import os
+import json
+import time
+import uuid
+import asyncio
+import hashlib
+import logging
+import multiprocessing
+import urllib.request
+from datetime import datetime, timedelta, timezone
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+from sqlalchemy import select, update, func
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from config import (UPLOAD_DIR, REPORT_JOB_WORKERS, REPORT_JOB_MAX_ATTEMPTS, REPORT_JOB_HEARTBEAT_SECONDS,
+                    REPORT_JOB_SWEEP_SECONDS, REPORT_JOB_WEBHOOK_TIMEOUT, REPORT_JOB_WEBHOOK_RETRIES)
+from database import SessionLocal
+from models import ReportJob
+from services.media import save_upload
+from services.report_worker import run_report_job
+
+logger = logging.getLogger(__name__)
+
+JOB_UPLOAD_DIR = os.path.join(UPLOAD_DIR, "jobs")
+
+# ── Worker process pool ─────────────────────────────────────────────
+# Spawned, not forked: the server process already runs threads and holds
+# database connections that must not be shared with a child.
+_job_pool = None
+_inflight = {}  # job id -> Future, for jobs submitted by this process
+_sweep_task = None
+# Webhook deliveries (with their retry backoff) run here, not in a job worker
+_webhook_pool = ThreadPoolExecutor(max_workers=2, thread_name_prefix="report-webhook")
+
+
+def get_job_pool() -> ProcessPoolExecutor:
+    global _job_pool
+    if _job_pool is None:
+        workers = max(1, REPORT_JOB_WORKERS)
+        logger.info(f"Starting report job pool with {workers} processes")
+        _job_pool = ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn"))
+    return _job_pool
+
+
+def dispatch(job_id: str):
+    """Hand a queued job to the pool unless this process already has it in flight."""
+    global _job_pool
+    if job_id in _inflight:
+        return
+    try:
+        future = get_job_pool().submit(run_report_job, job_id)
+    except BrokenProcessPool:
+        _job_pool = None  # a worker died; start a fresh pool
+        future = get_job_pool().submit(run_report_job, job_id)
+    _inflight[job_id] = future
+    future.add_done_callback(lambda f: _finished(job_id, f))
+
+
+def _finished(job_id: str, future):
+    _inflight.pop(job_id, None)
+    if future.cancelled():
+        return
+    error = future.exception()
+    if error is not None:
+        # The worker process died or could not reach the database; a job it had
+        # claimed stays "running" until its heartbeat goes stale and a sweep requeues it
+        logger.error(f"Report job {job_id} did not complete in its worker: {error!r}")
+        return
+    _, delivery = future.result()
+    if delivery is not None:
+        _webhook_pool.submit(notify_webhook, job_id, *delivery)
+
+
+def notify_webhook(job_id: str, webhook_url: str, payload: dict):
+    """POST the outcome to the job's webhook, retrying with backoff; the delivery status is recorded on the job."""
+    body = json.dumps(payload, ensure_ascii=False).encode()
+    status = "failed"
+    for attempt in range(REPORT_JOB_WEBHOOK_RETRIES):
+        try:
+            request = urllib.request.Request(webhook_url, data=body, method="POST",
+                                             headers={"Content-Type": "application/json"})
+            with urllib.request.urlopen(request, timeout=REPORT_JOB_WEBHOOK_TIMEOUT) as response:
+                status = f"delivered ({response.status})"
+                break
+        except Exception as e:
+            status = f"failed: {e}"[:200]
+            logger.warning(f"Webhook for job {job_id} failed (attempt {attempt + 1}): {e}")
+            if attempt + 1 < REPORT_JOB_WEBHOOK_RETRIES:
+                time.sleep(2 ** attempt)
+    db = SessionLocal()
+    try:
+        db.execute(update(ReportJob).where(ReportJob.id == job_id).values(webhook_status=status))
+        db.commit()
+    finally:
+        db.close()
+
+
+def shutdown_job_pool():
+    """Stop taking work; running jobs finish, queued ones are picked up after the next start."""
+    global _job_pool
+    if _job_pool is not None:
+        _job_pool.shutdown(wait=False, cancel_futures=True)
+        _job_pool = None
+
+
+# ── Recovery ────────────────────────────────────────────────────────
+
+def recover_jobs() -> dict:
+    """
+    Requeue running jobs whose heartbeat is stale (failing those out of
+    attempts), then dispatch every queued job not already in flight here.
+    """
+    stale = datetime.now(timezone.utc) - timedelta(seconds=3 * REPORT_JOB_HEARTBEAT_SECONDS)
+    orphaned = (ReportJob.status == "running") & (func.coalesce(ReportJob.heartbeat_at, ReportJob.started_at) < stale)
+    db = SessionLocal()
+    try:
+        failed = db.execute(update(ReportJob).where(orphaned, ReportJob.attempts >= REPORT_JOB_MAX_ATTEMPTS).values(
+            status="failed", error=f"Worker stopped {REPORT_JOB_MAX_ATTEMPTS} times while processing this report",
+            finished_at=datetime.now(timezone.utc),
+        )).rowcount
+        requeued = db.execute(update(ReportJob).where(orphaned).values(status="queued")).rowcount
+        queued = db.scalars(
+            select(ReportJob.id).where(ReportJob.status == "queued").order_by(ReportJob.created_at)
+        ).all()
+        db.commit()
+    finally:
+        db.close()
+
+    for job_id in queued:
+        dispatch(job_id)
+    if failed or requeued or queued:
+        logger.info(f"Report jobs: {requeued} requeued, {failed} failed, {len(queued)} dispatched")
+    return {"requeued": requeued, "failed": failed, "dispatched": len(queued)}
+
+
+async def _sweep_loop():
+    while True:
+        try:
+            await asyncio.to_thread(recover_jobs)
+        except Exception as e:
+            logger.error(f"Report job sweep failed: {e}")
+        await asyncio.sleep(REPORT_JOB_SWEEP_SECONDS)
+
+
+def start_job_sweeper():
+    """Recover jobs left over from the last run now, then keep sweeping (call from the startup hook)."""
+    global _sweep_task
+    if _sweep_task is None:
+        _sweep_task = asyncio.get_running_loop().create_task(_sweep_loop())
+
+
+async def stop_job_sweeper():
+    global _sweep_task
+    if _sweep_task is not None:
+        _sweep_task.cancel()
+        try:
+            await _sweep_task
+        except asyncio.CancelledError:
+            pass
+        _sweep_task = None
+
+
+# ── Submission and status ───────────────────────────────────────────
+
+def _idempotency_key(file_hash: str, patient_id: int | None) -> str:
+    return f"{file_hash}:{patient_id or ''}"
+
+
+async def submit_report_job(db: AsyncSession, content: bytes, filename: str, patient_id: int | None,
+                            webhook_url: str | None = None) -> tuple[ReportJob, bool]:
+    """
+    Persist and dispatch a job for an uploaded report. Returns (job, created);
+    created is False when the same file was already submitted for this patient.
+    """
+    file_hash = await asyncio.to_thread(lambda: hashlib.sha256(content).hexdigest())
+    return await _submit(db, file_hash, filename, patient_id, webhook_url,
+                         lambda file_path: save_upload(content, file_path))
+
+
+async def submit_report_file(db: AsyncSession, source_path: str, file_hash: str, filename: str,
+                             patient_id: int | None, webhook_url: str | None = None) -> tuple[ReportJob, bool]:
+    """
+    submit_report_job for a file already on disk (an assembled chunked
+    upload), moved into place instead of rewritten. A duplicate leaves it where it is.
+    """
+    return await _submit(db, file_hash, filename, patient_id, webhook_url,
+                         lambda file_path: asyncio.to_thread(os.replace, source_path, file_path))
+
+
+async def _submit(db: AsyncSession, file_hash: str, filename: str, patient_id: int | None,
+                  webhook_url: str | None, store) -> tuple[ReportJob, bool]:
+    key = _idempotency_key(file_hash, patient_id)
+
+    job = await db.scalar(select(ReportJob).where(ReportJob.idempotency_key == key))
+    if job is not None:
+        if job.status == "failed":
+            # Retrying a failed report: run the same job again
+            job.status, job.error, job.attempts, job.finished_at = "queued", None, 0, None
+            job.webhook_url = webhook_url or job.webhook_url
+            await db.commit()
+            dispatch(job.id)
+        return job, False
+
+    ext = os.path.splitext(filename or "")[1].lower()
+    file_path = os.path.join(JOB_UPLOAD_DIR, f"{file_hash}{ext}")
+    if not os.path.exists(file_path):
+        os.makedirs(JOB_UPLOAD_DIR, exist_ok=True)
+        await store(file_path)
+
+    job = ReportJob(id=uuid.uuid4().hex, idempotency_key=key, file_hash=file_hash, file_path=file_path,
+                    filename=filename, patient_id=patient_id, webhook_url=webhook_url, status="queued")
+    db.add(job)
+    try:
+        await db.commit()
+    except IntegrityError:
+        # The same upload raced in on another connection; return that job
+        await db.rollback()
+        return await db.scalar(select(ReportJob).where(ReportJob.idempotency_key == key)), False
+    dispatch(job.id)
+    return job, True
+
+
+def _iso(value: datetime | None) -> str | None:
+    return value.isoformat() if value else None
+
+
+def job_status(job: ReportJob) -> dict:
+    return {
+        "job_id": job.id,
+        "status": job.status,
+        "filename": job.filename,
+        "patient_id": job.patient_id,
+        "attempts": job.attempts,
+        "report_id": job.report_id,
+        "error": job.error,
+        "webhook_status": job.webhook_status,
+        "created_at": _iso(job.created_at),
+        "started_at": _iso(job.started_at),
+        "finished_at": _iso(job.finished_at),
+        "status_url": f"/api/reports/jobs/{job.id}",
+        "result_url": f"/api/reports/jobs/{job.id}/result",
+    }
+
+
+def job_result(job: ReportJob) -> dict | None:
+    return json.loads(job.result_json) if job.result_json else None
@@ -0,0 +1,63 @@
+"""HealthMitra Scan – Report Pipeline Steps (shared by /api/reports and background jobs)"""
+import json
+from concurrent.futures import Future
+
+from models import MedicalReport, HealthTimeline
+from services.alert_service import check_emergency_from_text
+from services.llm_service import submit_report_explanation, PRIORITY_EMERGENCY, PRIORITY_REPORT
+
+
+def submit_explanations(ocr_result: dict) -> tuple[dict, Future, Future]:
+    """
+    Run the emergency scan and queue both explanations. The scan is a single
+    regex pass, so it runs first and decides where the explanations land in
+    the LLM queue. Returns (emergency, english_future, hindi_future).
+    """
+    ocr_text = ocr_result["ocr_text"]
+    emergency = check_emergency_from_text(ocr_text)
+    priority = PRIORITY_EMERGENCY if emergency["is_emergency"] else PRIORITY_REPORT
+    return (
+        emergency,
+        submit_report_explanation(ocr_text, ocr_result["risk_level"], "en", priority),
+        submit_report_explanation(ocr_text, ocr_result["risk_level"], "hi", priority),
+    )
+
+
+def new_report(ocr_result: dict, filename: str, patient_id: int | None,
+               explanation_en: str, explanation_hi: str, emergency: dict) -> MedicalReport:
+    return MedicalReport(
+        patient_id=patient_id,
+        filename=filename,
+        ocr_text=ocr_result["ocr_text"],
+        explanation_en=explanation_en,
+        explanation_hi=explanation_hi,
+        risk_score=ocr_result["risk_score"],
+        risk_level=ocr_result["risk_level"],
+        critical_alerts=json.dumps(emergency["alerts"]) if emergency["alerts"] else None
+    )
+
+
+def report_timeline_entry(report: MedicalReport) -> HealthTimeline:
+    """Timeline entry for a flushed report (its id must be assigned)."""
+    return HealthTimeline(
+        patient_id=report.patient_id,
+        event_type="report",
+        title=f"Medical Report: {report.filename}",
+        description=f"Risk Score: {report.risk_score}% ({report.risk_level})",
+        risk_score=report.risk_score,
+        data_json=json.dumps({"report_id": report.id})
+    )
+
+
+def report_response(report: MedicalReport, ocr_result: dict, emergency: dict) -> dict:
+    return {
+        "id": report.id,
+        "filename": report.filename,
+        "ocr_text": report.ocr_text,
+        "explanation_en": report.explanation_en,
+        "explanation_hi": report.explanation_hi,
+        "risk_score": ocr_result["risk_score"],
+        "risk_level": ocr_result["risk_level"],
+        "emergency": emergency,
+        "ocr_confidence": ocr_result["confidence"]
+    }
@@ -0,0 +1,122 @@
+"""HealthMitra Scan – Report Job Worker (runs inside the job worker processes)
+
+Everything here is synchronous and process-local: each worker process has
+its own database connections, OCR page pool and LLM scheduler. Jobs are
+claimed with a conditional UPDATE, so a job dispatched twice (by a recovery
+sweep, or by two server processes) still runs once. Every later write is
+conditioned on that claim (status running, same attempt): a worker whose job
+was requeued and claimed by another saves nothing.
+"""
+import json
+import logging
+import threading
+from datetime import datetime, timezone
+
+from sqlalchemy import update
+
+from config import REPORT_JOB_HEARTBEAT_SECONDS
+from database import SessionLocal
+from models import ReportJob
+from services import health_stats  # noqa: F401  (registers the flush hook in this process)
+from services.ocr_service import extract_text_from_file
+from services.llm_service import model_registry
+from services.report_pipeline import submit_explanations, new_report, report_timeline_entry, report_response
+
+logger = logging.getLogger(__name__)
+
+
+class JobSuperseded(RuntimeError):
+    """The job was requeued and claimed by another worker while this one processed it."""
+
+
+def _now() -> datetime:
+    return datetime.now(timezone.utc)
+
+
+def _claim(job: ReportJob) -> tuple:
+    """Conditions that hold only while this worker's claim on `job` stands."""
+    return ReportJob.status == "running", ReportJob.attempts == job.attempts
+
+
+def _update_job(job_id: str, *conditions, **values) -> bool:
+    db = SessionLocal()
+    try:
+        result = db.execute(update(ReportJob).where(ReportJob.id == job_id, *conditions).values(**values))
+        db.commit()
+        return result.rowcount == 1
+    finally:
+        db.close()
+
+
+def _heartbeat(job: ReportJob, stop: threading.Event):
+    """Show the job is alive, so recovery sweeps leave it alone."""
+    while not stop.wait(REPORT_JOB_HEARTBEAT_SECONDS):
+        try:
+            _update_job(job.id, *_claim(job), heartbeat_at=_now())
+        except Exception as e:
+            logger.warning(f"Heartbeat for job {job.id} failed: {e}")
+
+
+def _process(job: ReportJob) -> tuple[int, dict]:
+    """OCR, explain and save one report. The report and the job's completion commit together."""
+    model_registry.probe()  # the server's background probe does not run in worker processes
+    ocr_result = extract_text_from_file(job.file_path)
+    emergency, explain_en, explain_hi = submit_explanations(ocr_result)
+    explanation_en, explanation_hi = explain_en.result(), explain_hi.result()
+
+    db = SessionLocal()
+    try:
+        report = new_report(ocr_result, job.filename, job.patient_id, explanation_en, explanation_hi, emergency)
+        db.add(report)
+        db.flush()
+        db.add(report_timeline_entry(report))
+        result = report_response(report, ocr_result, emergency)
+        completed = db.execute(update(ReportJob).where(ReportJob.id == job.id, *_claim(job)).values(
+            status="done", report_id=report.id, result_json=json.dumps(result, ensure_ascii=False),
+            error=None, finished_at=_now(),
+        ))
+        if completed.rowcount != 1:
+            db.rollback()
+            raise JobSuperseded(f"Report job {job.id} was claimed by another worker")
+        db.commit()
+        return report.id, result
+    finally:
+        db.close()
+
+
+def run_report_job(job_id: str) -> tuple[str, tuple | None]:
+    """
+    Process one queued job. Returns its final status ("skipped" if another
+    worker has it) and, when the job has a webhook, the (url, payload) to
+    deliver; the server process sends it, so retries do not hold a job slot.
+    """
+    now = _now()
+    claimed = _update_job(job_id, ReportJob.status == "queued", status="running",
+                          attempts=ReportJob.attempts + 1, started_at=now, heartbeat_at=now)
+    if not claimed:
+        return "skipped", None
+
+    db = SessionLocal()
+    job = db.get(ReportJob, job_id)
+    db.expunge(job)
+    db.close()
+
+    stop = threading.Event()
+    heartbeat = threading.Thread(target=_heartbeat, args=(job, stop), daemon=True)
+    heartbeat.start()
+    try:
+        report_id, result = _process(job)
+        payload = {"job_id": job_id, "status": "done", "report_id": report_id, "result": result}
+    except JobSuperseded as e:
+        logger.warning(f"{e}; discarding this worker's result")
+        return "skipped", None
+    except Exception as e:
+        logger.exception(f"Report job {job_id} failed")
+        if not _update_job(job_id, *_claim(job), status="failed", error=str(e)[:2000], finished_at=_now()):
+            return "skipped", None
+        payload = {"job_id": job_id, "status": "failed", "error": str(e)}
+    finally:
+        stop.set()
+        heartbeat.join()
+
+    return payload["status"], ((job.webhook_url, payload) if job.webhook_url else None)
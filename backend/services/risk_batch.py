@@ -0,0 +1,147 @@
+"""HealthMitra Scan – Batch Risk Engine (columnar NumPy scoring for screening camps)"""
+import numpy as np
+
+from services.rules import get_rules, RuleSet
+
+
+def to_columns(rows: list, rules: RuleSet = None) -> dict:
+    """
+    Turn a list of vitals dicts into one NumPy array per field the rules read.
+    Numbers and booleans become float columns with NaN for missing readings;
+    each rule applies its own default. Case keys (gender) stay as given, with
+    the rule's default_case only where the key is missing.
+    """
+    rules = rules or get_rules()
+    columns = {}
+    for model in rules.risk.values():
+        for rule in model.rules:
+            if rule.field not in columns:
+                columns[rule.field] = np.array([row.get(rule.field) for row in rows], dtype=np.float64)  # None → NaN
+            if rule.by and rule.by not in columns:
+                columns[rule.by] = np.array([row.get(rule.by, rule.default_case) for row in rows], dtype=object)
+    columns["_rows"] = len(rows)
+    return columns
+
+
+def score_columns(c: dict, rules: RuleSet = None) -> dict:
+    """
+    Score every row at once. Returns arrays: diabetes_risk / heart_risk (int),
+    diabetes_level / heart_level (str) and `flags`, an (n_rows, len(codes))
+    boolean matrix of recommendation codes, plus the `codes` and
+    `recommendations` of the rule table it was scored with.
+    """
+    rules = rules or get_rules()
+    n = c["_rows"]
+    codes = list(dict.fromkeys(code for model in rules.risk.values() for code in model.codes))
+    col = {code: i for i, code in enumerate(codes)}
+    flags = np.zeros((n, len(codes)), dtype=bool, order="F")  # filled column by column
+    level_names = np.array([band.get("level", "") for band in rules.levels.bands] + [""])
+    scored = {}
+
+    for name, model in rules.risk.items():
+        score = np.zeros(n, dtype=np.int64)
+        for rule in model.rules:
+            for mask, compiled, bands in rule.apply_columns(c):
+                # Index NO_BAND (-1) hits the trailing 0 points
+                points = np.array([band.get("points", 0) for band in compiled.bands] + [0])
+                if mask is None:
+                    score += points[bands]
+                else:
+                    score[mask] += points[bands]
+                for b, band in enumerate(compiled.bands):
+                    if band.get("code"):
+                        fired = bands == b
+                        if mask is None:
+                            flags[:, col[band["code"]]] |= fired
+                        else:
+                            flags[np.flatnonzero(mask)[fired], col[band["code"]]] = True
+
+        model_cols = [col[code] for code in model.codes if code != model.default_code]
+        flags[:, col[model.default_code]] = ~flags[:, model_cols].any(axis=1)
+        risk = np.clip(score, model.low, model.high).astype(np.int64)
+        scored[f"{name}_risk"] = risk
+        scored[f"{name}_level"] = level_names[rules.levels.bands_for(risk)]
+
+    scored["flags"] = flags
+    scored["codes"] = codes
+    scored["level_names"] = [str(level) for level in level_names[:-1] if level]
+    scored["recommendations"] = {code: rules.recommendations[code] for code in codes}
+    return scored
+
+
+def _code_sets(scored: dict) -> tuple[list, np.ndarray]:
+    """
+    Distinct recommendation-code combinations and each row's index into them.
+    Only a few thousand combinations exist, so code lists are built once per
+    combination instead of once per row.
+    """
+    flags, codes = scored["flags"], scored["codes"]
+    if len(codes) < 63:
+        bitmasks = flags @ (1 << np.arange(len(codes), dtype=np.int64))
+        patterns, set_ids = np.unique(bitmasks, return_inverse=True)
+        code_sets = [[code for i, code in enumerate(codes) if int(p) >> i & 1] for p in patterns]
+    else:
+        patterns, set_ids = np.unique(flags, axis=0, return_inverse=True)
+        code_sets = [[code for code, flag in zip(codes, p) if flag] for p in patterns]
+    return code_sets, set_ids.reshape(-1)
+
+
+def predict_risks_batch(rows: list) -> list:
+    """
+    Batch counterpart of risk_engine.predict_risks. Returns one dict per row with
+    the same risks, levels and recommendation_codes (text via recommendation_texts).
+    """
+    if not rows:
+        return []
+    rules = get_rules()
+    return rows_view(score_columns(to_columns(rows, rules), rules))
+
+
+def rows_view(scored: dict) -> list:
+    """One result dict per row."""
+    code_sets, set_ids = _code_sets(scored)
+    return [
+        {
+            "diabetes_risk": d_risk,
+            "diabetes_level": d_level,
+            "heart_risk": h_risk,
+            "heart_level": h_level,
+            "recommendation_codes": list(code_sets[set_id]),
+        }
+        for d_risk, d_level, h_risk, h_level, set_id in zip(
+            scored["diabetes_risk"].tolist(), scored["diabetes_level"].tolist(),
+            scored["heart_risk"].tolist(), scored["heart_level"].tolist(), set_ids.tolist()
+        )
+    ]
+
+
+def columns_view(scored: dict) -> dict:
+    """
+    Column-oriented results: one list per field, and recommendation codes as
+    an index per row into `recommendation_sets`. Far cheaper to build and
+    serialize than per-row dicts for large camps, and loads straight into a
+    dataframe.
+    """
+    code_sets, set_ids = _code_sets(scored)
+    return {
+        "diabetes_risk": scored["diabetes_risk"].tolist(),
+        "diabetes_level": scored["diabetes_level"].tolist(),
+        "heart_risk": scored["heart_risk"].tolist(),
+        "heart_level": scored["heart_level"].tolist(),
+        "recommendation_set": set_ids.tolist(),
+        "recommendation_sets": code_sets,
+    }
+
+
+def summarize(scored: dict) -> dict:
+    """Counts per risk level, for the camp overview."""
+    summary = {}
+    for disease in ("diabetes", "heart"):
+        levels = scored[f"{disease}_level"]
+        summary[disease] = {level: int(np.count_nonzero(levels == level)) for level in scored["level_names"]}
+    return summary
+
+
+def recommendation_texts(scored: dict) -> dict:
+    """Text for every code the scoring could emit."""
+    return scored["recommendations"]
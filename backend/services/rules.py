@@ -0,0 +1,298 @@
+"""HealthMitra Scan – Rule Tables (risk and emergency thresholds from rules/health_rules.json)"""
+import os
+import json
+import time
+import bisect
+import logging
+import threading
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+try:
+    from config import RULES_PATH, RULES_RELOAD_CHECK_SECONDS
+except Exception:
+    RULES_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "rules", "health_rules.json")
+    RULES_RELOAD_CHECK_SECONDS = 2.0
+
+OPERATORS = {
+    "gt": lambda v, t: v > t,
+    "ge": lambda v, t: v >= t,
+    "lt": lambda v, t: v < t,
+    "le": lambda v, t: v <= t,
+}
+NO_BAND = -1
+
+
+# ── Compiled threshold rules ────────────────────────────────────────
+class ThresholdRule:
+    """
+    One field's bands ("first matching band wins"), compiled into sorted cut
+    points. The cuts split the number line into 2k+1 regions – the open
+    intervals between cuts and the cuts themselves – and every value in a
+    region matches the same band, so evaluating is one bisect (or one
+    np.searchsorted for a whole column) plus a table lookup instead of a
+    chain of comparisons.
+    """
+
+    def __init__(self, field: str, bands: list, default=None, optional: bool = False):
+        self.field = field
+        self.bands = bands
+        self.default = default
+        self.optional = optional  # None / 0 mean "not measured", like `x and x > t`
+
+        tests = []
+        for band in bands:
+            ops = [(OPERATORS[op], float(band[op])) for op in OPERATORS if op in band]
+            tests.append(ops)
+        self.cuts = sorted({t for ops in tests for _, t in ops})
+
+        representatives = []
+        for i, cut in enumerate(self.cuts):
+            below = self.cuts[i - 1] if i else cut - 1.0
+            representatives += [(below + cut) / 2, cut]
+        representatives.append(self.cuts[-1] + 1.0 if self.cuts else 0.0)
+
+        def first_band(value):
+            for index, ops in enumerate(tests):
+                if all(test(value, t) for test, t in ops):
+                    return index
+            return NO_BAND
+
+        self.region_band = [first_band(v) for v in representatives]
+        self._cuts_array = np.array(self.cuts, dtype=np.float64)
+        self._cuts_padded = np.append(self._cuts_array, np.nan)
+        self._region_array = np.array(self.region_band, dtype=np.int64)
+
+    def per_region(self, key: str, missing=None) -> list:
+        """A band attribute laid out per region, so lookups skip the band dicts."""
+        return [self.bands[b].get(key, missing) if b != NO_BAND else missing for b in self.region_band]
+
+    def region(self, value) -> int:
+        """Region index of `value` (missing → default), or NO_BAND if not measured."""
+        if value is None:
+            value = self.default
+        if value is None or value != value or (self.optional and not value):  # None, NaN, optional 0
+            return NO_BAND
+        i = bisect.bisect_left(self.cuts, value)
+        if i < len(self.cuts) and self.cuts[i] == value:
+            return 2 * i + 1
+        return 2 * i
+
+    def band_for(self, value) -> int:
+        """Index of the band `value` falls in, or NO_BAND."""
+        region = self.region(value)
+        return NO_BAND if region == NO_BAND else self.region_band[region]
+
+    def bands_for(self, values: np.ndarray) -> np.ndarray:
+        """Vectorized band_for over a float column (NaN = missing)."""
+        values = np.asarray(values, dtype=np.float64)
+        missing = np.isnan(values)
+        if self.default is not None and missing.any():
+            values = np.where(missing, float(self.default), values)
+            missing = np.isnan(values)
+        i = np.searchsorted(self._cuts_array, values, side="left")
+        region = 2 * i + (self._cuts_padded[i] == values)  # the NaN pad never equals a value
+        bands = self._region_array[region]
+        if self.optional:
+            missing |= values == 0
+        bands[missing] = NO_BAND
+        return bands
+
+
+class ScoringRule:
+    """A threshold rule whose bands add points and, optionally, a recommendation code."""
+
+    def __init__(self, spec: dict):
+        self.field = spec["field"]
+        self.by = spec.get("by")
+        if self.by:
+            self.default_case = spec.get("default_case")
+            self.cases = {case: self._compile(spec, bands) for case, bands in spec["cases"].items()}
+            self.cases.setdefault("*", self._compile(spec, []))  # other keys score nothing
+            band_lists = spec["cases"].values()
+        elif "is" in spec:
+            # Boolean flag: true → 1.0, which is the only value above 0.5
+            band = {"gt" if spec["is"] else "lt": 0.5, "points": spec.get("points", 0), "code": spec.get("code")}
+            self.cases = {"*": ThresholdRule(self.field, [band], default=0)}
+            band_lists = [[band]]
+        else:
+            self.cases = {"*": self._compile(spec, spec["bands"])}
+            band_lists = [spec["bands"]]
+        self.codes = [band["code"] for bands in band_lists for band in bands if band.get("code")]
+        for rule in self.cases.values():
+            rule.points, rule.region_codes = rule.per_region("points", 0), rule.per_region("code")
+        self.only = None if self.by else self.cases["*"]
+
+    def _compile(self, spec: dict, bands: list) -> ThresholdRule:
+        return ThresholdRule(self.field, bands, spec.get("default"), spec.get("optional", False))
+
+    def case(self, key) -> ThresholdRule:
+        return self.cases.get(key) or self.cases["*"]
+
+    def apply_columns(self, columns: dict) -> list[tuple[np.ndarray, ThresholdRule, np.ndarray]]:
+        """(row mask, rule, band per masked row) for every case present in the columns."""
+        values = columns[self.field]
+        if not self.by:
+            return [(None, self.cases["*"], self.cases["*"].bands_for(values))]
+        keys = columns[self.by]  # to_columns fills default_case in for rows without the key
+        out = []
+        remaining = np.ones(len(values), dtype=bool)
+        for case, rule in self.cases.items():
+            if case == "*":
+                continue
+            mask = keys == case
+            remaining &= ~mask
+            out.append((mask, rule, rule.bands_for(values[mask])))
+        if "*" in self.cases:
+            out.append((remaining, self.cases["*"], self.cases["*"].bands_for(values[remaining])))
+        return out
+
+
+class RiskModel:
+    """Scoring rules for one disease, plus clamping, levels and the all-clear code."""
+
+    def __init__(self, name: str, spec: dict, levels: ThresholdRule):
+        self.name = name
+        self.rules = [ScoringRule(rule) for rule in spec["rules"]]
+        self.level_names = levels.per_region("level")
+        self.low, self.high = spec.get("clamp", [5, 95])
+        self.default_code = spec["default_code"]
+        self.levels = levels
+        # Codes in the order score() appends them
+        self.codes = [code for rule in self.rules for code in rule.codes] + [self.default_code]
+
+    def score(self, vitals: dict) -> tuple[int, str, list]:
+        """Returns (risk_percentage, risk_level, recommendation_codes)."""
+        score = 0
+        codes = []
+        get = vitals.get
+        for rule in self.rules:
+            # default_case stands in only for a missing key; "" or None matches no case
+            t = rule.only or rule.case(get(rule.by, rule.default_case))
+            value = get(t.field)
+            if value is None:
+                value = t.default
+            if value is None or value != value or (t.optional and not value):
+                continue
+            # ThresholdRule.region(), inlined: this loop runs ~15 times per person
+            i = bisect.bisect_left(t.cuts, value)
+            region = 2 * i + 1 if i < len(t.cuts) and t.cuts[i] == value else 2 * i
+            score += t.points[region]
+            code = t.region_codes[region]
+            if code:
+                codes.append(code)
+        risk = min(max(score, self.low), self.high)
+        if not codes:
+            codes.append(self.default_code)
+        return risk, self.level_names[self.levels.region(risk)], codes
+
+
+class AlertRule:
+    """Emergency bands for one lab parameter or vital sign."""
+
+    def __init__(self, spec: dict):
+        self.field = spec["field"]
+        self.label = spec["label"]
+        self.unit = spec["unit"]
+        self.threshold = ThresholdRule(self.field, spec["bands"], optional=spec.get("optional", False))
+
+    def alert(self, value) -> dict | None:
+        band = self.threshold.band_for(value)
+        if band == NO_BAND:
+            return None
+        band = self.threshold.bands[band]
+        return {
+            "parameter": self.label,
+            "value": value,
+            "unit": self.unit,
+            "severity": band["severity"],
+            "message_en": band["message_en"].format(value=value),
+            "message_hi": band["message_hi"].format(value=value),
+        }
+
+
+class RuleSet:
+    """A compiled health_rules.json."""
+
+    def __init__(self, spec: dict, path: str = None, mtime: float = None):
+        self.version = spec.get("version")
+        self.path = path
+        self.mtime = mtime
+        self.loaded_at = time.time()
+        self.levels = ThresholdRule("risk", spec["risk_levels"])
+        self.risk = {name: RiskModel(name, model, self.levels) for name, model in spec["risk"].items()}
+        self.recommendations = dict(spec.get("recommendations", {}))
+        self.lab_alerts = [AlertRule(rule) for rule in spec["emergency"]["lab"]]
+        self.vital_alerts = [AlertRule(rule) for rule in spec["emergency"]["vitals"]]
+
+        missing = [code for model in self.risk.values() for code in model.codes if code not in self.recommendations]
+        if missing:
+            raise ValueError(f"No recommendation text for codes: {', '.join(missing)}")
+
+    def summary(self) -> dict:
+        return {
+            "version": self.version,
+            "path": self.path,
+            "loaded_at": self.loaded_at,
+            "risk_models": {name: len(model.rules) for name, model in self.risk.items()},
+            "lab_alerts": len(self.lab_alerts),
+            "vital_alerts": len(self.vital_alerts),
+        }
+
+
+# ── Loading and hot reload ──────────────────────────────────────────
+_lock = threading.Lock()
+_rules: RuleSet | None = None
+_last_check = 0.0
+_failed_mtime = None  # a broken edit is reported once, not on every check
+
+
+def load_rules(path: str = RULES_PATH) -> RuleSet:
+    """Read and compile a rule file. Raises on invalid JSON or rules."""
+    mtime = os.path.getmtime(path)
+    with open(path, "r", encoding="utf-8") as f:
+        spec = json.load(f)
+    try:
+        return RuleSet(spec, path, mtime)
+    except (KeyError, TypeError, ValueError) as e:
+        raise ValueError(f"Invalid rule table {path}: {e!r}") from e
+
+
+def reload_rules() -> RuleSet:
+    """Recompile the rule file now. On error the current rules stay active and the error is raised."""
+    global _rules, _last_check
+    with _lock:
+        rules = load_rules(RULES_PATH)
+        _rules, _last_check = rules, time.monotonic()
+    logger.info(f"Loaded rule table v{rules.version} from {RULES_PATH}")
+    return rules
+
+
+def get_rules() -> RuleSet:
+    """
+    The active rule set. The file's mtime is checked at most every
+    RULES_RELOAD_CHECK_SECONDS, so edits go live without a restart; a broken
+    edit is logged and the previous rules keep serving.
+    """
+    global _rules, _last_check, _failed_mtime
+    rules = _rules
+    if rules is not None and time.monotonic() - _last_check < RULES_RELOAD_CHECK_SECONDS:
+        return rules
+    with _lock:
+        if _rules is not None and time.monotonic() - _last_check < RULES_RELOAD_CHECK_SECONDS:
+            return _rules
+        _last_check = time.monotonic()
+        mtime = None
+        try:
+            mtime = os.path.getmtime(RULES_PATH)
+            if _rules is None or mtime not in (_rules.mtime, _failed_mtime):
+                _rules = load_rules(RULES_PATH)
+                logger.info(f"Loaded rule table v{_rules.version} from {RULES_PATH}")
+        except (OSError, ValueError) as e:
+            if _rules is None:
+                raise
+            _failed_mtime = mtime
+            logger.error(f"Keeping previous rule table: {e}")
+        return _rules
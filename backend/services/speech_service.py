@@ -1,35 +1,157 @@
 """HealthMitra Scan – Speech Service (Real Whisper STT with fallback)"""
 import os
+import time
 import random
+import asyncio
 import logging
+import threading
+
+from services.media import decode_audio, WHISPER_SAMPLE_RATE
+from services.inference_pool import run_inference
 
 logger = logging.getLogger(__name__)
 
-# ── Try to import Whisper ───────────────────────────────────────────
+# ── Try to import the STT engines ───────────────────────────────────
 try:
     import whisper
     WHISPER_AVAILABLE = True
 except ImportError:
     WHISPER_AVAILABLE = False
-    logger.warning("openai-whisper not installed. Using simulated speech-to-text.")
 
+try:
+    from faster_whisper import WhisperModel
+    FASTER_WHISPER_AVAILABLE = True
+except ImportError:
+    FASTER_WHISPER_AVAILABLE = False
+
+STT_AVAILABLE = WHISPER_AVAILABLE or FASTER_WHISPER_AVAILABLE
+if not STT_AVAILABLE:
+    logger.warning("Neither openai-whisper nor faster-whisper installed. Using simulated speech-to-text.")
 
-# ── Cached Whisper model ────────────────────────────────────────────
-_whisper_model = None
+try:
+    from config import WHISPER_MODEL_SIZE, STT_BACKEND, STT_COMPUTE_TYPE, STT_PRELOAD
+except Exception:
+    WHISPER_MODEL_SIZE, STT_BACKEND, STT_COMPUTE_TYPE, STT_PRELOAD = "base", "openai-whisper", "int8", True
 
 
-def _get_whisper_model():
-    """Load Whisper model (cached singleton)."""
-    global _whisper_model
-    if _whisper_model is None:
-        try:
-            from config import WHISPER_MODEL_SIZE
-            model_size = WHISPER_MODEL_SIZE
-        except Exception:
-            model_size = "base"
-        logger.info(f"Loading Whisper model: {model_size}")
-        _whisper_model = whisper.load_model(model_size)
-    return _whisper_model
+# ── STT backends ────────────────────────────────────────────────────
+# Each backend loads one model and exposes transcribe(audio, language) -> str,
+# where audio is a file path or a 16 kHz mono float32 array.
+class OpenAIWhisperBackend:
+    """Reference PyTorch implementation; FP32 on CPU."""
+    name = "openai-whisper"
+
+    def __init__(self, model_size: str):
+        self.model_size = model_size
+        self.model = whisper.load_model(model_size)
+
+    def transcribe(self, audio, language: str) -> str:
+        result = self.model.transcribe(
+            audio,
+            language=language,
+            fp16=False  # Use FP32 for CPU compatibility
+        )
+        return result.get("text", "").strip()
+
+
+class FasterWhisperBackend:
+    """CTranslate2 re-implementation; int8-quantized weights run several times faster on CPU."""
+    name = "faster-whisper"
+
+    def __init__(self, model_size: str, compute_type: str = "int8"):
+        self.model_size = model_size
+        self.model = WhisperModel(model_size, device="cpu", compute_type=compute_type)
+
+    def transcribe(self, audio, language: str) -> str:
+        segments, _ = self.model.transcribe(audio, language=language, beam_size=5)
+        return "".join(segment.text for segment in segments).strip()
+
+
+STT_BACKENDS = {
+    OpenAIWhisperBackend.name: (OpenAIWhisperBackend, WHISPER_AVAILABLE),
+    FasterWhisperBackend.name: (FasterWhisperBackend, FASTER_WHISPER_AVAILABLE),
+}
+
+
+def load_stt_backend(name: str, model_size: str, compute_type: str = STT_COMPUTE_TYPE):
+    """Instantiate a backend by name (raises if unknown or its package is missing)."""
+    backend_cls, available = STT_BACKENDS[name]
+    if not available:
+        raise ImportError(f"STT backend '{name}' is not installed")
+    if backend_cls is FasterWhisperBackend:
+        return backend_cls(model_size, compute_type)
+    return backend_cls(model_size)
+
+
+# ── Cached STT model ────────────────────────────────────────────────
+_stt_backend = None
+_stt_lock = threading.Lock()
+
+
+def _get_stt_backend():
+    """Load the configured STT backend (cached singleton), or any installed one as fallback."""
+    global _stt_backend
+    if _stt_backend is None:
+        with _stt_lock:
+            if _stt_backend is None:
+                names = [STT_BACKEND] + [n for n in STT_BACKENDS if n != STT_BACKEND]
+                name = next(n for n in names if n in STT_BACKENDS and STT_BACKENDS[n][1])
+                if name != STT_BACKEND:
+                    logger.warning(f"STT backend '{STT_BACKEND}' not available, using {name}")
+                logger.info(f"Loading STT model: {name} / {WHISPER_MODEL_SIZE}")
+                _stt_backend = load_stt_backend(name, WHISPER_MODEL_SIZE)
+    return _stt_backend
+
+
+def warm_up_clip(seconds: float = 1.0):
+    """A quiet tone: enough to run the encoder and decoder once without real speech."""
+    import numpy as np
+    t = np.arange(int(seconds * WHISPER_SAMPLE_RATE), dtype=np.float32) / WHISPER_SAMPLE_RATE
+    return (0.01 * np.sin(2 * np.pi * 440 * t)).astype(np.float32)
+
+
+def preload_stt_model() -> float | None:
+    """
+    Load the STT model and run one warm-up transcription, so the first voice
+    request does not pay model load and first-inference costs. Returns the
+    seconds taken, or None when no STT engine is installed or loading failed.
+    """
+    if not STT_AVAILABLE:
+        return None
+    start = time.perf_counter()
+    try:
+        backend = _get_stt_backend()
+        backend.transcribe(warm_up_clip(), "en")
+    except Exception as e:
+        logger.error(f"STT preload failed: {e}")
+        return None
+    elapsed = time.perf_counter() - start
+    logger.info(f"STT model {backend.name}/{backend.model_size} ready in {elapsed:.1f}s")
+    return elapsed
+
+
+_preload_task = None
+
+
+def start_stt_preload():
+    """
+    Preload the STT model on the inference pool (call from the app startup hook).
+    Runs in the background so the API starts serving immediately; a voice request
+    arriving mid-load waits for the same model instead of loading a second copy.
+    """
+    global _preload_task
+    if STT_PRELOAD and STT_AVAILABLE and _preload_task is None:
+        _preload_task = asyncio.get_running_loop().create_task(run_inference(preload_stt_model))
+
+
+def get_stt_status() -> dict:
+    backend = _stt_backend
+    return {
+        "backend": backend.name if backend else STT_BACKEND,
+        "model_size": WHISPER_MODEL_SIZE,
+        "loaded": backend is not None,
+        "available": STT_AVAILABLE,
+    }
 
 
 # ── Simulated fallback data ─────────────────────────────────────────
@@ -53,33 +175,29 @@ SAMPLE_TRANSCRIPTS = {
 }
 
 
-def transcribe_audio(audio_path: str, language: str = "en") -> str:
+def transcribe_audio(audio, language: str = "en") -> str:
     """
-    Transcribe audio using OpenAI Whisper.
-    Falls back to simulated transcripts if Whisper is not available.
+    Transcribe audio with the configured STT backend (openai-whisper or faster-whisper).
+    `audio` is a file path or a 16 kHz mono float32 array (see services.media.decode_audio).
+    Falls back to simulated transcripts if no Whisper engine is available.
 
     Supports: WAV, MP3, M4A, FLAC, OGG, WebM, and more.
     """
     # ── Try real Whisper STT ────────────────────────────────────────
-    if WHISPER_AVAILABLE:
+    if STT_AVAILABLE:
         try:
-            model = _get_whisper_model()
+            backend = _get_stt_backend()
 
             # Map language codes
             whisper_lang = "hi" if language == "hi" else "en"
 
-            logger.info(f"Transcribing audio: {audio_path} (language: {whisper_lang})")
-
-            result = model.transcribe(
-                audio_path,
-                language=whisper_lang,
-                fp16=False  # Use FP32 for CPU compatibility
-            )
+            source = audio if isinstance(audio, str) else f"{len(audio) / WHISPER_SAMPLE_RATE:.1f}s in-memory clip"
+            logger.info(f"Transcribing audio: {source} (language: {whisper_lang})")
 
-            transcript = result.get("text", "").strip()
+            transcript = backend.transcribe(audio, whisper_lang)
 
             if transcript:
-                logger.info(f"Whisper transcription successful: {len(transcript)} chars")
+                logger.info(f"Whisper transcription successful ({backend.name}): {len(transcript)} chars")
                 return transcript
             else:
                 logger.warning("Whisper returned empty transcript, falling back to simulated")
@@ -88,6 +206,36 @@ def transcribe_audio(audio_path: str, language: str = "en") -> str:
             logger.error(f"Whisper transcription failed: {e}. Falling back to simulated.")
 
     # ── Fallback: simulated transcript ──────────────────────────────
+    return simulated_transcript(language)
+
+
+def transcribe_audio_bytes(data: bytes | str, language: str = "en") -> str:
+    """Transcribe uploaded audio bytes (decoded through an ffmpeg pipe, not a temp file) or an audio file's path."""
+    samples = decode_audio(data) if STT_AVAILABLE else None
+    if samples is None or not len(samples):
+        if STT_AVAILABLE:
+            logger.warning("Uploaded audio could not be decoded, falling back to simulated")
+        return simulated_transcript(language)
+    return transcribe_audio(samples, language)
+
+
+def transcribe_segment(samples, language: str = "en") -> str:
+    """
+    Transcribe one VAD segment of a live stream. Unlike transcribe_audio this
+    never substitutes a simulated sentence; it returns "" when no STT engine
+    is installed or nothing was recognised.
+    """
+    if not STT_AVAILABLE:
+        return ""
+    try:
+        return _get_stt_backend().transcribe(samples, "hi" if language == "hi" else "en")
+    except Exception as e:
+        logger.error(f"Segment transcription failed: {e}")
+        return ""
+
+
+def simulated_transcript(language: str) -> str:
+    """Pick a sample question when no STT engine is installed (demo mode)."""
     logger.info("Using simulated speech-to-text")
     transcripts = SAMPLE_TRANSCRIPTS.get(language, SAMPLE_TRANSCRIPTS["en"])
     return random.choice(transcripts)
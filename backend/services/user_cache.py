@@ -0,0 +1,84 @@
+"""HealthMitra Scan – Authenticated User Cache (verified token → user snapshot)"""
+import time
+import threading
+from collections import OrderedDict, namedtuple
+
+from config import AUTH_CACHE_TTL_SECONDS, AUTH_CACHE_MAX_ENTRIES
+from models import User
+
+# Read-only copy of a users row, without the password hash. Routes that
+# change the user load the row itself and call user_cache.invalidate_user().
+UserSnapshot = namedtuple("UserSnapshot", [c.name for c in User.__table__.columns if c.name != "password_hash"])
+
+
+def snapshot_user(user: User) -> UserSnapshot:
+    return UserSnapshot(**{field: getattr(user, field) for field in UserSnapshot._fields})
+
+
+class UserCache:
+    """
+    LRU + TTL cache of users keyed by the bearer token that was verified to
+    identify them, so authenticated requests skip the JWT decode and the
+    users query. Entries never outlive the token's own expiry.
+    """
+
+    def __init__(self, max_entries: int, ttl_seconds: float):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()  # token -> (snapshot, expires_at)
+        self._tokens = {}  # user id -> set(tokens)
+        self._lock = threading.Lock()
+
+    def get(self, token: str) -> UserSnapshot | None:
+        with self._lock:
+            entry = self._entries.get(token)
+            if entry and entry[1] < time.time():
+                self._remove(token)
+                entry = None
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(token)
+            self.hits += 1
+            return entry[0]
+
+    def put(self, token: str, user: UserSnapshot, token_expires_at: float):
+        if self.ttl_seconds <= 0:
+            return
+        expires_at = min(time.time() + self.ttl_seconds, token_expires_at)
+        with self._lock:
+            if token in self._entries:
+                self._remove(token)
+            self._entries[token] = (user, expires_at)
+            self._tokens.setdefault(user.id, set()).add(token)
+            while len(self._entries) > self.max_entries:
+                self._remove(next(iter(self._entries)))
+
+    def invalidate_user(self, user_id: int):
+        """Drop every cached token of `user_id` (after the user row changed)."""
+        with self._lock:
+            for token in list(self._tokens.get(user_id, ())):
+                self._remove(token)
+
+    def _remove(self, token: str):
+        user, _ = self._entries.pop(token)
+        tokens = self._tokens.get(user.id)
+        if tokens:
+            tokens.discard(token)
+            if not tokens:
+                del self._tokens[user.id]
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_ratio": round(self.hits / lookups, 3) if lookups else 0.0,
+                "entries": len(self._entries),
+            }
+
+
+user_cache = UserCache(AUTH_CACHE_MAX_ENTRIES, AUTH_CACHE_TTL_SECONDS)
@@ -0,0 +1,128 @@
+"""HealthMitra Scan – Voice Activity Detection (segments live microphone audio)"""
+import logging
+from collections import deque
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+try:
+    import webrtcvad
+    WEBRTC_VAD_AVAILABLE = True
+except ImportError:
+    WEBRTC_VAD_AVAILABLE = False
+
+try:
+    from config import (VAD_AGGRESSIVENESS, VAD_ENERGY_THRESHOLD, VAD_SEGMENT_SILENCE_MS,
+                        VAD_END_SILENCE_MS, VAD_MAX_SEGMENT_SECONDS)
+except Exception:
+    VAD_AGGRESSIVENESS, VAD_ENERGY_THRESHOLD = 2, 0.01
+    VAD_SEGMENT_SILENCE_MS, VAD_END_SILENCE_MS, VAD_MAX_SEGMENT_SECONDS = 500, 1200, 20.0
+
+SAMPLE_RATE = 16000
+FRAME_MS = 30  # one of the frame sizes webrtcvad accepts
+PRE_ROLL_MS = 150  # audio kept from before speech starts, so first syllables are not clipped
+MIN_SPEECH_MS = 250  # shorter bursts (clicks, coughs) are dropped
+
+
+def pcm16_to_float32(data: bytes) -> np.ndarray:
+    """Little-endian 16-bit PCM → float32 in [-1, 1], the format Whisper takes."""
+    return np.frombuffer(data, np.int16).astype(np.float32) / 32768.0
+
+
+class SpeechSegmenter:
+    """
+    Splits a live 16 kHz mono stream into speech segments. feed() returns events:
+
+      ("speech_start", None)   the speaker started talking
+      ("segment", samples)     a phrase ended (short pause) – transcribe it
+      ("end", None)            a long pause after speech – the question is over
+
+    Uses webrtcvad when installed, otherwise an energy detector whose
+    threshold tracks the background noise floor.
+    """
+
+    def __init__(self, sample_rate: int = SAMPLE_RATE):
+        self.sample_rate = sample_rate
+        self.frame_len = sample_rate * FRAME_MS // 1000
+        self.segment_silence = VAD_SEGMENT_SILENCE_MS // FRAME_MS
+        self.end_silence = VAD_END_SILENCE_MS // FRAME_MS
+        self.max_frames = int(VAD_MAX_SEGMENT_SECONDS * 1000) // FRAME_MS
+        self.min_speech = MIN_SPEECH_MS // FRAME_MS
+
+        self._vad = webrtcvad.Vad(VAD_AGGRESSIVENESS) if WEBRTC_VAD_AVAILABLE else None
+        self._noise_floor = None
+        self._pending = np.zeros(0, np.float32)
+        self._pre_roll = deque(maxlen=PRE_ROLL_MS // FRAME_MS)
+        self._frames = []
+        self._speech_frames = 0
+        self._quiet_frames = 0
+        self._in_speech = False
+        self._heard_speech = False
+        self._ended = False
+
+    def _is_speech(self, frame: np.ndarray) -> bool:
+        if self._vad is not None:
+            pcm = (np.clip(frame, -1.0, 1.0) * 32767).astype(np.int16).tobytes()
+            return self._vad.is_speech(pcm, self.sample_rate)
+
+        rms = float(np.sqrt(np.mean(frame * frame)))
+        if self._noise_floor is None:
+            self._noise_floor = rms
+        speech = rms > max(VAD_ENERGY_THRESHOLD, self._noise_floor * 3.0)
+        if not speech:
+            self._noise_floor = 0.95 * self._noise_floor + 0.05 * rms
+        return speech
+
+    def feed(self, samples: np.ndarray) -> list:
+        """Consume new samples and return the events they complete."""
+        events = []
+        audio = np.concatenate([self._pending, samples]) if len(self._pending) else samples
+        n_frames = len(audio) // self.frame_len
+        self._pending = audio[n_frames * self.frame_len:]
+
+        for i in range(n_frames):
+            frame = audio[i * self.frame_len:(i + 1) * self.frame_len]
+            speech = self._is_speech(frame)
+            self._quiet_frames = 0 if speech else self._quiet_frames + 1
+
+            if not self._in_speech:
+                if speech:
+                    self._in_speech = True
+                    self._frames = list(self._pre_roll) + [frame]
+                    self._speech_frames = 1
+                    events.append(("speech_start", None))
+                else:
+                    self._pre_roll.append(frame)
+                    if self._heard_speech and not self._ended and self._quiet_frames >= self.end_silence:
+                        self._ended = True
+                        events.append(("end", None))
+                continue
+
+            self._frames.append(frame)
+            if speech:
+                self._speech_frames += 1
+            if self._quiet_frames >= self.segment_silence or len(self._frames) >= self.max_frames:
+                segment = self._close_segment()
+                if segment is not None:
+                    events.append(("segment", segment))
+        return events
+
+    def _close_segment(self) -> np.ndarray | None:
+        frames, speech_frames = self._frames, self._speech_frames
+        self._frames, self._speech_frames, self._in_speech = [], 0, False
+        self._pre_roll.clear()
+        if speech_frames < self.min_speech:
+            return None
+        self._heard_speech = True
+        self._ended = False
+        return np.concatenate(frames)
+
+    def flush(self) -> np.ndarray | None:
+        """Return the segment in progress when the stream stops mid-phrase."""
+        if not self._in_speech:
+            return None
+        if len(self._pending):
+            self._frames.append(self._pending)
+            self._pending = np.zeros(0, np.float32)
+        return self._close_segment()
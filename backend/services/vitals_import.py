@@ -0,0 +1,143 @@
+"""HealthMitra Scan – Vitals Import (streaming CSV / JSONL parsing and chunked risk assessment)"""
+import csv
+import json
+import codecs
+
+from pydantic import ValidationError
+
+from schemas import VitalsInput
+from services.rules import RuleSet
+from services.risk_batch import to_columns, score_columns, rows_view, summarize
+from services.alert_service import check_emergency_from_vitals
+from config import IMPORT_MAX_LINE_KB
+
+READ_BLOCK = 64 * 1024
+MAX_LINE = IMPORT_MAX_LINE_KB * 1024
+FORMATS = ("csv", "jsonl")
+
+
+def detect_format(filename: str | None, content_type: str | None) -> str | None:
+    """csv / jsonl from the file extension or content type, or None if unclear."""
+    name = (filename or "").lower()
+    content_type = (content_type or "").lower()
+    if name.endswith(".csv") or "csv" in content_type:
+        return "csv"
+    if name.endswith((".jsonl", ".ndjson")) or "ndjson" in content_type or "jsonl" in content_type:
+        return "jsonl"
+    return None
+
+
+# ── Streaming parser ────────────────────────────────────────────────
+async def iter_record_chunks(upload, fmt: str, chunk_rows: int):
+    """
+    Read an UploadFile block by block and yield lists of up to `chunk_rows`
+    (line_number, record, error) tuples; record is None when the line could
+    not be parsed. Only one block and one chunk are held in memory, so file
+    size does not matter. A line longer than IMPORT_MAX_LINE_KB is rejected
+    as invalid and the rest of it skipped unread. CSV needs a header row and
+    one record per line (no line breaks inside quoted cells).
+    """
+    decoder = codecs.getincrementaldecoder("utf-8-sig")(errors="replace")
+    pending = ""
+    skipping = False  # inside an over-long line, dropping text up to its newline
+    header = None
+    line_no = 0
+    chunk = []
+
+    while True:
+        data = await upload.read(READ_BLOCK)
+        text = decoder.decode(data, final=not data)
+        if skipping:
+            end = text.find("\n")
+            if end < 0 and data:
+                continue
+            text, skipping = text[end + 1:] if end >= 0 else "", False
+        pending += text
+        if data:
+            *lines, pending = pending.split("\n")
+        else:
+            lines, pending = pending.split("\n"), ""
+        if len(pending) > MAX_LINE:
+            lines.append(None)  # stands for the over-long line; its tail is skipped as it arrives
+            pending, skipping = "", True
+
+        for line in lines:
+            line_no += 1
+            if line is None or len(line) > MAX_LINE:
+                if fmt == "csv" and header is None:
+                    raise ValueError(f"CSV header is longer than {IMPORT_MAX_LINE_KB} KB")
+                chunk.append((line_no, None, f"Line is longer than {IMPORT_MAX_LINE_KB} KB"))
+            else:
+                line = line.rstrip("\r")
+                if not line.strip():
+                    continue
+                if fmt == "csv" and header is None:
+                    header = [name.strip() for name in next(csv.reader([line]))]
+                    continue
+                chunk.append((line_no, *_parse_line(line, fmt, header)))
+            if len(chunk) >= chunk_rows:
+                yield chunk
+                chunk = []
+
+        if not data:
+            break
+
+    if chunk:
+        yield chunk
+
+
+def _parse_line(line: str, fmt: str, header: list | None) -> tuple[dict | None, str | None]:
+    if fmt == "jsonl":
+        try:
+            record = json.loads(line)
+        except ValueError as e:
+            return None, f"Invalid JSON: {e}"
+        if not isinstance(record, dict):
+            return None, "Each line must be a JSON object"
+        return record, None
+
+    values = next(csv.reader([line]))
+    if len(values) > len(header):
+        return None, f"Expected {len(header)} fields, got {len(values)}"
+    # Blank cells mean "not measured", as in /predict-batch
+    return {key: value.strip() for key, value in zip(header, values) if key and value.strip()}, None
+
+
+# ── Chunk assessment ────────────────────────────────────────────────
+def assess_chunk(chunk: list, rules: RuleSet) -> dict:
+    """
+    Validate, score and emergency-check one chunk of parsed records.
+    Returns {"assessed": [(line, patient_id, result, emergency)], "invalid":
+    [{"line", "errors"}], "summary": level counts}. Each result has the same
+    shape as risk_engine.predict_risks.
+    """
+    lines, patient_ids, vitals, invalid = [], [], [], []
+    for line_no, record, error in chunk:
+        if error:
+            invalid.append({"line": line_no, "errors": [error]})
+            continue
+        try:
+            patient_id = record.pop("patient_id", None)
+            patient_id = int(patient_id) if patient_id not in (None, "") else None
+            vitals.append(VitalsInput.model_validate(record).model_dump())
+        except ValidationError as e:
+            invalid.append({"line": line_no, "errors": e.errors(include_url=False, include_input=False)})
+            continue
+        except (TypeError, ValueError):
+            invalid.append({"line": line_no, "errors": ["patient_id must be an integer"]})
+            continue
+        lines.append(line_no)
+        patient_ids.append(patient_id)
+
+    if not vitals:
+        return {"assessed": [], "invalid": invalid, "summary": None}
+
+    scored = score_columns(to_columns(vitals, rules), rules)
+    texts = scored["recommendations"]
+    assessed = []
+    for line_no, patient_id, row, result in zip(lines, patient_ids, vitals, rows_view(scored)):
+        codes = result.pop("recommendation_codes")
+        result["recommendations"] = list(set(texts[c] for c in codes))
+        result["recommendation_codes"] = codes
+        assessed.append((line_no, patient_id, result, check_emergency_from_vitals(row, rules)))
+    return {"assessed": assessed, "invalid": invalid, "summary": summarize(scored)}
@@ -0,0 +1,77 @@
+"""Query-count tests — patient list/detail summaries (run: pytest test_patient_summary.py)"""
+import os
+import sys
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+# conftest.py points DATABASE_URL and UPLOAD_DIR at a temp directory
+from datetime import datetime, timedelta
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import event, insert
+
+import main
+from database import engine, async_engine
+from models import Patient, MedicalReport, HealthTimeline
+
+# Unscored (None) and zero scores both count towards the average as 0
+SCORES = {1: [None, 0, 20, 45], 2: [80], 3: [], 4: [None], 5: [10, 35, 62.5]}
+
+
+@pytest.fixture(scope="module")
+def client():
+    with TestClient(main.app) as client:
+        start = datetime(2025, 1, 1)
+        with engine.begin() as conn:
+            conn.execute(insert(Patient), [
+                {"id": p, "name": f"Patient {p}", "age": 40 + p, "asha_worker_id": "asha-1",
+                 "created_at": start + timedelta(minutes=p)}
+                for p in SCORES
+            ])
+            conn.execute(insert(MedicalReport), [
+                {"patient_id": p, "filename": "report.pdf", "risk_score": score, "risk_level": "moderate",
+                 "created_at": start + timedelta(hours=i)}
+                for p, scores in SCORES.items() for i, score in enumerate(scores)
+            ])
+            conn.execute(insert(HealthTimeline), [
+                {"patient_id": p, "event_type": "scan", "title": "Food Scan", "created_at": start + timedelta(days=p)}
+                for p in SCORES
+            ])
+        yield client
+
+
+@pytest.fixture
+def statements():
+    seen = []
+
+    def record(conn, cursor, statement, *args):
+        seen.append(statement)
+    event.listen(async_engine.sync_engine, "before_cursor_execute", record)
+    yield seen
+    event.remove(async_engine.sync_engine, "before_cursor_execute", record)
+
+
+def _old_average(scores: list) -> float:
+    # What /api/patients/{id} computed in Python before the grouped query
+    return round(sum(s for s in scores if s) / max(len(scores), 1), 1)
+
+
+def test_list_runs_two_statements(client, statements):
+    response = client.get("/api/patients/list", params={"limit": 100})
+    response.raise_for_status()
+    assert len(statements) == 2, statements  # patients, summaries
+    items = {item["id"]: item for item in response.json()["items"]}
+    assert set(items) == set(SCORES)
+    for patient_id, scores in SCORES.items():
+        assert items[patient_id]["report_count"] == len(scores)
+        assert items[patient_id]["avg_risk_score"] == _old_average(scores)
+
+
+@pytest.mark.parametrize("patient_id", sorted(SCORES))
+def test_detail_runs_three_statements(client, statements, patient_id):
+    response = client.get(f"/api/patients/{patient_id}")
+    response.raise_for_status()
+    assert len(statements) == 3, statements  # patient, summary, timeline
+    detail = response.json()
+    assert detail["report_count"] == len(SCORES[patient_id])
+    assert detail["avg_risk_score"] == _old_average(SCORES[patient_id])
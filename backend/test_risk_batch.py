@@ -0,0 +1,34 @@
+"""Parity tests — batch risk scoring vs. the scalar engine (run: pytest test_risk_batch.py)"""
+import os
+import sys
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import pytest
+
+from services.risk_engine import predict_risks
+from services.risk_batch import predict_risks_batch
+from sample_vitals import make_rows
+
+SMOKER_58 = {"age": 58, "bmi": 27, "blood_pressure_systolic": 145, "cholesterol_total": 250, "smoking": True}
+MISSING = object()
+
+
+def _scores(result: dict) -> tuple:
+    return (result["diabetes_risk"], result["diabetes_level"], result["heart_risk"], result["heart_level"],
+            result["recommendation_codes"])
+
+
+def test_batch_matches_scalar():
+    # make_rows mixes male, female, other, "", None and missing genders with boundary values
+    rows = make_rows(5000)
+    assert [_scores(r) for r in predict_risks_batch(rows)] == [_scores(predict_risks(r)) for r in rows]
+
+
+# Heart risk the original if/elif risk_engine gave: only a missing gender counted as male
+@pytest.mark.parametrize("gender, heart_risk", [
+    ("male", 77), ("female", 77), (MISSING, 77), ("", 70), (None, 70), ("other", 70),
+])
+def test_gender_cases_match_original_engine(gender, heart_risk):
+    vitals = dict(SMOKER_58) if gender is MISSING else {**SMOKER_58, "gender": gender}
+    assert predict_risks(vitals)["heart_risk"] == heart_risk
+    assert predict_risks_batch([vitals])[0]["heart_risk"] == heart_risk
@@ -18,11 +18,21 @@ export default function ReportExplainer() {
         formData.append('language', language)
 
         try {
-            const res = await fetch('/api/reports/upload', { method: 'POST', body: formData })
+            const res = await fetch('/api/reports/jobs', { method: 'POST', body: formData })
             if (!res.ok) {
                 throw new Error(`Server error: ${res.status}`)
             }
-            const data = await res.json()
+            const job = await res.json()
+            // OCR + explanation runs in the background; poll until the result is ready
+            let poll = await fetch(job.result_url)
+            while (poll.status === 202) {
+                await new Promise(resolve => setTimeout(resolve, 1500))
+                poll = await fetch(job.result_url)
+            }
+            const data = await poll.json()
+            if (!poll.ok) {
+                throw new Error(data.detail || `Server error: ${poll.status}`)
+            }
             setResult(data)
         } catch (err) {
             console.error('Report upload failed:', err)
@@ -1,6 +1,33 @@
 import { useState, useRef } from 'react'
 import { Mic, MicOff, Send, Volume2, Languages } from 'lucide-react'
 
+// Runs on the audio thread: converts mic input (already resampled to 16 kHz by
+// the AudioContext) to PCM16 and posts it in ~100 ms chunks for the WebSocket
+const PCM_WORKLET = `
+class PcmCapture extends AudioWorkletProcessor {
+    constructor() {
+        super()
+        this.buffer = new Int16Array(1600)
+        this.length = 0
+    }
+    process(inputs) {
+        const input = inputs[0][0]
+        if (input) {
+            for (let i = 0; i < input.length; i++) {
+                this.buffer[this.length++] = Math.max(-1, Math.min(1, input[i])) * 0x7fff
+                if (this.length === this.buffer.length) {
+                    this.port.postMessage(this.buffer.buffer, [this.buffer.buffer])
+                    this.buffer = new Int16Array(1600)
+                    this.length = 0
+                }
+            }
+        }
+        return true
+    }
+}
+registerProcessor('pcm-capture', PcmCapture)
+`
+
 export default function VoiceDoctor() {
     const [isRecording, setIsRecording] = useState(false)
     const [textInput, setTextInput] = useState('')
@@ -12,6 +39,8 @@ export default function VoiceDoctor() {
     const chunksRef = useRef([])
     const timerRef = useRef(null)
     const streamRef = useRef(null)
+    const wsRef = useRef(null)
+    const audioCtxRef = useRef(null)
 
     const startRecording = async () => {
         try {
@@ -63,7 +92,84 @@ export default function VoiceDoctor() {
         }
     }
 
+    // ── Live mode: stream PCM over a WebSocket, the server detects pauses ──
+    const stopCapture = () => {
+        if (audioCtxRef.current) {
+            audioCtxRef.current.close()
+            audioCtxRef.current = null
+        }
+        if (streamRef.current) {
+            streamRef.current.getTracks().forEach(track => track.stop())
+            streamRef.current = null
+        }
+        if (timerRef.current) {
+            clearInterval(timerRef.current)
+            timerRef.current = null
+        }
+        setIsRecording(false)
+    }
+
+    const startLiveStream = async () => {
+        const stream = await navigator.mediaDevices.getUserMedia({
+            audio: { channelCount: 1, echoCancellation: true, noiseSuppression: true }
+        })
+        streamRef.current = stream
+        try {
+            const ctx = new AudioContext({ sampleRate: 16000 })
+            audioCtxRef.current = ctx
+            const workletUrl = URL.createObjectURL(new Blob([PCM_WORKLET], { type: 'application/javascript' }))
+            await ctx.audioWorklet.addModule(workletUrl)
+            const capture = new AudioWorkletNode(ctx, 'pcm-capture')
+            ctx.createMediaStreamSource(stream).connect(capture)
+
+            const proto = window.location.protocol === 'https:' ? 'wss' : 'ws'
+            const ws = new WebSocket(`${proto}://${window.location.host}/api/voice/stream?language=${language}`)
+            ws.binaryType = 'arraybuffer'
+            wsRef.current = ws
+            capture.port.onmessage = (e) => {
+                if (ws.readyState === WebSocket.OPEN) ws.send(e.data)
+            }
+
+            ws.onmessage = (e) => {
+                const msg = JSON.parse(e.data)
+                if (msg.type === 'partial') updateLast('user', () => `🎤 ${msg.transcript}`)
+                else if (msg.type === 'final') {
+                    updateLast('user', () => `🎤 ${msg.transcript}`)
+                    stopCapture()
+                    setLoading(true)
+                }
+                else if (msg.type === 'token') updateLast('ai', text => text + msg.text)
+                else if (msg.type === 'done') setLoading(false)
+                else if (msg.type === 'error') {
+                    updateLast('ai', () => `⚠️ ${msg.detail}`)
+                    setLoading(false)
+                }
+            }
+            ws.onclose = () => {
+                wsRef.current = null
+                stopCapture()
+                setLoading(false)
+            }
+        } catch (err) {
+            stopCapture()
+            throw err
+        }
+
+        setConversations(prev => [...prev, { type: 'user', text: '🎤 Listening…' }, { type: 'ai', text: '' }])
+        setIsRecording(true)
+        setRecordingTime(0)
+        timerRef.current = setInterval(() => {
+            setRecordingTime(prev => prev + 1)
+        }, 1000)
+    }
+
     const stopRecording = () => {
+        if (wsRef.current) {
+            // Live mode: ask the server to answer what it has heard so far
+            if (wsRef.current.readyState === WebSocket.OPEN) wsRef.current.send(JSON.stringify({ type: 'stop' }))
+            stopCapture()
+            return
+        }
         if (mediaRecorderRef.current && mediaRecorderRef.current.state !== 'inactive') {
             mediaRecorderRef.current.stop()
         }
@@ -82,31 +188,77 @@ export default function VoiceDoctor() {
         if (isRecording) {
             stopRecording()
         } else {
-            startRecording()
+            // Prefer live streaming; fall back to record-then-upload where
+            // AudioWorklet / 16 kHz AudioContext is unsupported
+            startLiveStream().catch(err => {
+                console.warn('Live voice unavailable, recording instead:', err)
+                startRecording()
+            })
         }
     }
 
+    // Parse a text/event-stream response, calling onEvent(event, data) per message
+    const readEventStream = async (res, onEvent) => {
+        const reader = res.body.getReader()
+        const decoder = new TextDecoder()
+        let buffer = ''
+        while (true) {
+            const { value, done } = await reader.read()
+            if (done) break
+            buffer += decoder.decode(value, { stream: true })
+            let boundary
+            while ((boundary = buffer.indexOf('\n\n')) !== -1) {
+                const message = buffer.slice(0, boundary)
+                buffer = buffer.slice(boundary + 2)
+                let event = 'message'
+                let data = ''
+                message.split('\n').forEach(line => {
+                    if (line.startsWith('event: ')) event = line.slice(7)
+                    else if (line.startsWith('data: ')) data += line.slice(6)
+                })
+                if (data) onEvent(event, JSON.parse(data))
+            }
+        }
+    }
+
+    // Update the latest user / AI bubble while an answer is streaming in
+    const updateLast = (type, update) => {
+        setConversations(prev => {
+            const next = [...prev]
+            for (let i = next.length - 1; i >= 0; i--) {
+                if (next[i].type === type) {
+                    next[i] = { ...next[i], text: update(next[i].text) }
+                    break
+                }
+            }
+            return next
+        })
+    }
+
+    const streamAnswer = async (url, formData) => {
+        const res = await fetch(url, { method: 'POST', body: formData })
+        if (!res.ok) throw new Error(`Server error: ${res.status}`)
+        await readEventStream(res, (event, data) => {
+            if (event === 'transcript') updateLast('user', () => `🎤 ${data.transcript || '(audio sent)'}`)
+            else if (event === 'token') updateLast('ai', text => text + data.text)
+            else if (event === 'error') throw new Error(data.detail)
+        })
+    }
+
     const sendAudioToBackend = async (audioBlob) => {
         setLoading(true)
+        setConversations(prev => [...prev,
+        { type: 'user', text: '🎤 (voice recording sent)' },
+        { type: 'ai', text: '' }
+        ])
         try {
             const formData = new FormData()
             formData.append('audio', audioBlob, 'recording.webm')
             formData.append('language', language)
-
-            const res = await fetch('/api/voice/ask', { method: 'POST', body: formData })
-            if (!res.ok) throw new Error(`Server error: ${res.status}`)
-            const data = await res.json()
-
-            setConversations(prev => [...prev,
-            { type: 'user', text: `🎤 ${data.transcript || '(audio sent)'}` },
-            { type: 'ai', text: data.ai_response }
-            ])
+            await streamAnswer('/api/voice/ask-stream', formData)
         } catch (err) {
             console.error('Voice request failed:', err)
-            setConversations(prev => [...prev,
-            { type: 'user', text: '🎤 (voice recording sent)' },
-            { type: 'ai', text: '⚠️ Could not process audio. Make sure the backend is running and ffmpeg is installed for Whisper. Try using text input instead.' }
-            ])
+            updateLast('ai', () => '⚠️ Could not process audio. Make sure the backend is running and ffmpeg is installed for Whisper. Try using text input instead.')
         }
         setLoading(false)
     }
@@ -116,21 +268,16 @@ export default function VoiceDoctor() {
         setLoading(true)
         const question = textInput
         setTextInput('')
+        setConversations(prev => [...prev, { type: 'user', text: question }, { type: 'ai', text: '' }])
 
         try {
             const formData = new FormData()
             formData.append('question', question)
             formData.append('language', language)
-            const res = await fetch('/api/voice/text-ask', { method: 'POST', body: formData })
-            if (!res.ok) throw new Error(`Server error: ${res.status}`)
-            const data = await res.json()
-            setConversations(prev => [...prev, { type: 'user', text: question }, { type: 'ai', text: data.ai_response }])
+            await streamAnswer('/api/voice/text-ask-stream', formData)
         } catch (err) {
             console.error('Text query failed:', err)
-            setConversations(prev => [...prev,
-            { type: 'user', text: question },
-            { type: 'ai', text: '⚠️ Could not reach the backend. Make sure the server is running on port 8000.\n\n_Tip: Use the text input when voice is unavailable._' }
-            ])
+            updateLast('ai', () => '⚠️ Could not reach the backend. Make sure the server is running on port 8000.\n\n_Tip: Use the text input when voice is unavailable._')
         }
         setLoading(false)
     }
@@ -162,12 +309,12 @@ export default function VoiceDoctor() {
                         </div>
                         <p style={{ marginTop: 16, fontSize: 13, color: 'var(--text-secondary)' }}>
                             {isRecording
-                                ? `🔴 Recording... ${formatTime(recordingTime)} – Click to stop & send`
+                                ? `🔴 Listening... ${formatTime(recordingTime)} – Pause or click to send`
                                 : 'Click to start voice recording'}
                         </p>
                         {isRecording && (
                             <div style={{ marginTop: 8, fontSize: 11, color: 'var(--text-muted)' }}>
-                                Speak your health question clearly
+                                Speak your health question clearly – it is sent when you pause
                             </div>
                         )}
                     </div>
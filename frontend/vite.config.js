@@ -9,6 +9,7 @@ export default defineConfig({
             '/api': {
                 target: 'http://localhost:8000',
                 changeOrigin: true,
+                ws: true,  // /api/voice/stream
             },
             '/uploads': {
                 target: 'http://localhost:8000',